@@ -0,0 +1,178 @@
+"""Static frontend pipeline: fingerprinted, precompressed, cache-friendly.
+
+On first use every file in `frontend/` is read once, given a content-hashed
+name (`admin.js` -> `admin.3f2a1b9c0d12.js`) and compressed ahead of time
+with gzip, plus brotli when the optional `brotli` package is installed.
+The HTML entry pages are rewritten to reference the hashed names, so:
+
+- `/assets/<hashed name>` is served with `Cache-Control: immutable` and a
+  one-year max-age: a changed file gets a new name, never a stale copy.
+- the entry pages (`/`, `/admin`, ... and the `.html` files) are served
+  with `Cache-Control: no-cache` and a strong ETag, so a reload costs one
+  `304 Not Modified` and the browser reuses every asset from its cache.
+- `/static/...` and `/frontend/...` keep working for unhashed references,
+  revalidated by ETag like the pages.
+
+Each representation picks the smallest precompressed variant the client
+accepts; nothing is compressed per request. Editing a frontend file is
+picked up on the next page request, and hashed names handed out earlier
+in the process stay servable for pages already loaded.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from .catalog import etag_matches
+from .serialization import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+FRONTEND_DIR = Path(__file__).resolve().parent.parent / "frontend"
+ASSET_PREFIX = "/assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+MIN_COMPRESS_BYTES = 256
+
+PAGES = {
+    "/": "index.html",
+    "/auth": "auth.html",
+    "/register": "register.html",
+    "/services": "services.html",
+    "/book": "book.html",
+    "/admin": "admin.html",
+    "/forgot-password": "forgot-password.html",
+    "/reset-password": "reset-password.html",
+    "/stylist-portal": "stylist.html",
+}
+
+# /static/<file> or /frontend/<file>, with an optional ?v= cache buster, inside src/href attributes.
+REFERENCE = re.compile(r'''(?P<attr>(?:src|href)=["'])/(?:static|frontend)/(?P<name>[\w.-]+)(?:\?v=[\w.-]*)?(?=["'])''')
+
+
+@dataclass
+class Asset:
+    media_type: str
+    etag: str
+    # coding ("identity", "gzip", "br") -> body, smallest first
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, name: str, body: bytes) -> "Asset":
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        asset = cls(media_type, hashlib.sha256(body).hexdigest()[:16])
+        variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=11)
+        asset.variants = dict(sorted(variants.items(), key=lambda item: len(item[1])))
+        return asset
+
+    def respond(self, request: Request, cache_control: str) -> Response:
+        accepted = accepted_encodings(request) | {"identity"}
+        coding = next(c for c in self.variants if c in accepted)
+        etag = f'"{self.etag}"' if coding == "identity" else f'"{self.etag}-{coding}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(self.variants[coding], media_type=self.media_type, headers=headers)
+
+
+def hashed_name(name: str, body: bytes) -> str:
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}.{suffix}" if dot else f"{name}.{hashlib.sha256(body).hexdigest()[:12]}"
+
+
+class AssetBundle:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.files: Dict[str, Asset] = {}   # plain name -> current content (pages already rewritten)
+        self.hashed: Dict[str, Asset] = {}  # hashed name -> content, kept across rebuilds
+        self.manifest: Dict[str, str] = {}  # plain name -> hashed name
+        self._stamp: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _current_stamp(self) -> Tuple:
+        with os.scandir(self.directory) as entries:
+            return tuple(sorted((e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in entries if e.is_file()))
+
+    def refresh(self) -> None:
+        """Rebuild when any frontend file was added, removed or modified since the last build."""
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            sources = {name: (self.directory / name).read_bytes() for name, _, _ in stamp}
+            manifest = {name: hashed_name(name, body) for name, body in sources.items() if not name.endswith(".html")}
+            files = {}
+            for name, body in sources.items():
+                if name.endswith(".html"):
+                    body = self.rewrite(body.decode("utf-8"), manifest).encode("utf-8")
+                files[name] = Asset.build(name, body)
+            self.hashed.update({manifest[name]: files[name] for name in manifest})
+            self.files, self.manifest, self._stamp = files, manifest, stamp
+            self.builds += 1
+
+    @staticmethod
+    def rewrite(html: str, manifest: Dict[str, str]) -> str:
+        def swap(match):
+            hashed = manifest.get(match["name"])
+            return f"{match['attr']}{ASSET_PREFIX}{hashed}" if hashed else match[0]
+        return REFERENCE.sub(swap, html)
+
+    def file(self, name: str) -> Asset:
+        self.refresh()
+        asset = self.files.get(name)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return asset
+
+    def fingerprinted(self, name: str) -> Asset:
+        asset = self.hashed.get(name)
+        if asset is None:
+            self.refresh()
+            asset = self.hashed.get(name)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return asset
+
+
+bundle = AssetBundle(FRONTEND_DIR)
+router = APIRouter(include_in_schema=False)
+
+
+def page(filename: str):
+    def serve_page(request: Request):
+        return bundle.file(filename).respond(request, REVALIDATE)
+    return serve_page
+
+
+for route, filename in PAGES.items():
+    router.add_api_route(route, page(filename), methods=["GET"], name=f"page_{filename.removesuffix('.html')}")
+
+
+@router.get(ASSET_PREFIX + "{name}")
+def hashed_asset(name: str, request: Request):
+    return bundle.fingerprinted(name).respond(request, IMMUTABLE)
+
+
+@router.get("/static/{name}", name="static")
+@router.get("/frontend/{name}", name="frontend")
+def plain_asset(name: str, request: Request):
+    return bundle.file(name).respond(request, REVALIDATE)
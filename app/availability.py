@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, date as date_type
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from sqlalchemy.orm import Session
+from . import models
+from .occupancy import occupancy_cache, build_bitmap, span_mask, day_start, Key
+
+SLOT_STEP_MINUTES = 60
+MAX_RANGE_DAYS = 31
+
+ACTIVE_STATUSES = (models.BookingStatus.CONFIRMED.value, models.BookingStatus.PENDING.value)
+
+Interval = Tuple[datetime, datetime]
+
+
+def date_range(start_date: date_type, end_date: date_type) -> List[date_type]:
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def working_window(stylist: models.Stylist, day: date_type) -> Interval:
+    return (
+        datetime(day.year, day.month, day.day, stylist.start_hour, 0),
+        datetime(day.year, day.month, day.day, stylist.end_hour, 0),
+    )
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and coalesce overlapping or touching intervals into a disjoint list."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def load_busy_by_stylist(db: Session, stylist_ids: Sequence[int], start: datetime, end: datetime) -> Dict[int, List[Interval]]:
+    """Fetch the active bookings of several stylists touching [start, end) in one query, grouped per stylist."""
+    grouped: Dict[int, List[Interval]] = {stylist_id: [] for stylist_id in stylist_ids}
+    if not grouped:
+        return grouped
+    rows = db.query(models.Booking.stylist_id, models.Booking.start_time, models.Booking.end_time).filter(
+        models.Booking.stylist_id.in_(list(grouped)),
+        models.Booking.status.in_(ACTIVE_STATUSES),
+        models.Booking.start_time < end,
+        models.Booking.end_time > start,
+    ).all()
+    for r in rows:
+        grouped[r.stylist_id].append((r.start_time, r.end_time))
+    return {stylist_id: merge_intervals(intervals) for stylist_id, intervals in grouped.items()}
+
+
+def load_busy_intervals(db: Session, stylist_id: int, start: datetime, end: datetime) -> List[Interval]:
+    """Fetch every active booking of a stylist touching [start, end) with a single range query."""
+    return load_busy_by_stylist(db, [stylist_id], start, end)[stylist_id]
+
+
+def load_bitmaps(db: Session, stylist_ids: Sequence[int], days: Sequence[date_type]) -> Dict[Key, int]:
+    """Occupancy bitmaps for every (stylist, day), served from the cache.
+
+    Whatever is missing is fetched with a single range query spanning the
+    missing stylists and days, then written back to the cache.
+    """
+    bitmaps: Dict[Key, int] = {}
+    missing: List[Key] = []
+    for stylist_id in stylist_ids:
+        for day in days:
+            bitmap = occupancy_cache.get((stylist_id, day))
+            if bitmap is None:
+                missing.append((stylist_id, day))
+            else:
+                bitmaps[(stylist_id, day)] = bitmap
+    if not missing:
+        return bitmaps
+
+    token = occupancy_cache.write_token()
+    first_day = min(day for _, day in missing)
+    last_day = max(day for _, day in missing)
+    busy = load_busy_by_stylist(
+        db, sorted({stylist_id for stylist_id, _ in missing}),
+        day_start(first_day), day_start(last_day) + timedelta(days=1),
+    )
+    for stylist_id, day in missing:
+        bitmap = build_bitmap(day, busy[stylist_id])
+        bitmaps[(stylist_id, day)] = bitmap
+        occupancy_cache.put((stylist_id, day), bitmap, token)
+    return bitmaps
+
+
+def free_slots(stylist: models.Stylist, duration_minutes: int, days: List[date_type], bitmaps: Dict[Key, int]) -> Iterator[Interval]:
+    """Candidate slots of every day whose 5-minute buckets are all clear in the stylist's bitmap."""
+    length = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=SLOT_STEP_MINUTES)
+    for day in days:
+        bitmap = bitmaps[(stylist.id, day)]
+        current, day_end = working_window(stylist, day)
+        while current + length <= day_end:
+            end = current + length
+            if not bitmap & span_mask(day, current, end):
+                yield current, end
+            current += step
+
+
+def stylist_availability(db: Session, stylist: models.Stylist, duration_minutes: int, start_date: date_type, end_date: date_type) -> List[Interval]:
+    days = date_range(start_date, end_date)
+    bitmaps = load_bitmaps(db, [stylist.id], days)
+    return list(free_slots(stylist, duration_minutes, days, bitmaps))
+
+
+def roster_availability(db: Session, stylists: Sequence[models.Stylist], duration_minutes: int, start_date: date_type, end_date: date_type) -> List[Tuple[datetime, datetime, List[int]]]:
+    """Open slots across the whole roster, each with the ids of the stylists free at that time."""
+    days = date_range(start_date, end_date)
+    bitmaps = load_bitmaps(db, [st.id for st in stylists], days)
+
+    merged: Dict[datetime, Tuple[datetime, List[int]]] = {}
+    for st in stylists:
+        for start, end in free_slots(st, duration_minutes, days, bitmaps):
+            merged.setdefault(start, (end, []))[1].append(st.id)
+    return [(start, end, ids) for start, (end, ids) in sorted(merged.items())]
+
+
+def month_days(year: int, month: int) -> List[date_type]:
+    first = date_type(year, month, 1)
+    next_month = date_type(year + month // 12, month % 12 + 1, 1)
+    return date_range(first, next_month - timedelta(days=1))
+
+
+def calendar_capacity(db: Session, stylists: Sequence[models.Stylist], duration_minutes: int, days: List[date_type]) -> Dict[date_type, Dict[int, int]]:
+    """Free-slot counts per day and stylist, from one bitmap load covering every stylist-day."""
+    bitmaps = load_bitmaps(db, [st.id for st in stylists], days)
+    counts: Dict[date_type, Dict[int, int]] = {day: {} for day in days}
+    for st in stylists:
+        for start, _ in free_slots(st, duration_minutes, days, bitmaps):
+            per_day = counts[start.date()]
+            per_day[st.id] = per_day.get(st.id, 0) + 1
+    return counts
+
+
+def is_slot_free_cached(stylist_id: int, start: datetime, end: datetime) -> bool | None:
+    """True when the cached bitmaps prove [start, end) free, None when the database must decide."""
+    for day in {start.date(), (end - timedelta(microseconds=1)).date()}:
+        bitmap = occupancy_cache.get((stylist_id, day))
+        if bitmap is None or bitmap & span_mask(day, start, end):
+            return None
+    return True
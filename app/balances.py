@@ -0,0 +1,92 @@
+"""Materialized payment totals on bookings.
+
+`bookings.amount_paid` is the sum of the booking's successful payments and
+`bookings.balance_due` what is left of `total_amount`. They change only
+through `settle()`, executed in the same transaction as the Payment insert,
+so balance checks and unpaid listings read one row or one index instead of
+aggregating `payments`. `settle()` is a conditional UPDATE on the paid
+amount the request read: of two concurrent payments for the same booking
+only one applies, the other sees rowcount 0.
+
+`drift()` compares the columns with the payments table; `backfill()`
+recomputes them (the one-time migration and `--fix`):
+
+    python -m app.balances          # report bookings whose totals disagree with payments
+    python -m app.balances --fix    # recompute them
+"""
+import sys
+from typing import List, Optional, Sequence
+from sqlalchemy import Connection, Row, Update, func, literal_column, or_, select, update
+from sqlalchemy.orm import Session
+from . import models
+
+# Literal 0, not a bound parameter: SQLite only uses the partial index ix_bookings_unpaid_time
+# when the query repeats its WHERE term verbatim.
+UNPAID = models.Booking.balance_due > literal_column("0")
+
+
+def settle(booking_id: int, amount: float, expected_paid: float) -> Update:
+    """Add `amount` to the booking's paid total, provided it still equals `expected_paid`."""
+    booking = models.Booking
+    return (
+        update(booking)
+        .where(booking.id == booking_id, booking.amount_paid == expected_paid)
+        .values(
+            amount_paid=func.round(booking.amount_paid + amount, 2),
+            balance_due=func.round(booking.total_amount - booking.amount_paid - amount, 2),
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def _payments_total():
+    payment = models.Payment
+    return (
+        select(func.round(func.coalesce(func.sum(payment.amount), 0), 2))
+        .where(payment.booking_id == models.Booking.id, payment.status == models.PaymentStatus.SUCCESS.value)
+        .scalar_subquery()
+    )
+
+
+def drift(db: Session, limit: Optional[int] = None) -> List[Row]:
+    """Bookings whose amount_paid / balance_due disagree with their successful payments."""
+    booking = models.Booking
+    paid = _payments_total()
+    stmt = (
+        select(booking.id, booking.total_amount, booking.amount_paid, booking.balance_due, paid.label("payments_total"))
+        .where(or_(
+            func.round(booking.amount_paid - paid, 2) != 0,
+            func.round(booking.total_amount - booking.amount_paid - booking.balance_due, 2) != 0,
+        ))
+        .order_by(booking.id)
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+def backfill(conn: Connection, booking_ids: Optional[Sequence[int]] = None) -> int:
+    """Recompute both columns from payments, for every booking or just `booking_ids`; returns rows updated."""
+    booking = models.Booking.__table__
+    paid = _payments_total()
+    stmt = update(booking).values(
+        amount_paid=paid,
+        balance_due=func.round(booking.c.total_amount - paid, 2),
+    )
+    if booking_ids is not None:
+        stmt = stmt.where(booking.c.id.in_(booking_ids))
+    return conn.execute(stmt).rowcount
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+    with SessionLocal() as db:
+        rows = drift(db)
+        for row in rows[:50]:
+            print(f"booking {row.id}: amount_paid={row.amount_paid} balance_due={row.balance_due} "
+                  f"total={row.total_amount} payments={row.payments_total}")
+        if rows and sys.argv[1:] == ["--fix"]:
+            fixed = backfill(db.connection(), [row.id for row in rows])
+            db.commit()
+            print(f"Recomputed {fixed} bookings.")
+        else:
+            print(f"{len(rows)} bookings out of step with payments." if rows else "Balances match payments.")
@@ -0,0 +1,104 @@
+"""Versioned in-memory cache of the public catalog (services and stylists).
+
+Every page load fetches `/services/` and `/stylists/`, but the catalog
+changes a few times a day. Each list is loaded once and kept with its
+rendered bodies; the endpoints that change services or stylists call
+`bump()`, which drops every entry. Responses carry a strong ETag (a hash
+of the exact bytes sent) and `Cache-Control: no-cache`, so browsers
+revalidate on each load and an unchanged catalog is answered with
+`304 Not Modified` without touching the database or sending a body.
+
+Other worker processes never see this process's bump; the TTL bounds how
+long they keep serving the old catalog. A rebuilt entry with the same
+content keeps the same ETag, so TTL refreshes do not break revalidation.
+"""
+import gzip
+import hashlib
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from .config import settings
+from .serialization import FastJSONResponse, MsgPackResponse, accepted_encodings, wants_msgpack
+
+CACHE_CONTROL = "public, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 prescribes for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class CatalogEntry:
+    def __init__(self, rows: Any):
+        self.rows = rows
+        self.built_at = time.monotonic()
+        self._variants: Dict[Tuple[str, bool], Tuple[bytes, str, str, Optional[str]]] = {}
+
+    def variant(self, msgpack: bool, gzip_ok: bool) -> Tuple[bytes, str, str, Optional[str]]:
+        """(body, ETag, media type, content encoding) of one representation, rendered on first use."""
+        response_class = MsgPackResponse if msgpack else FastJSONResponse
+        key = (response_class.media_type, gzip_ok)
+        if key not in self._variants:
+            body = response_class(self.rows).body
+            etag, encoding = hashlib.sha256(body).hexdigest()[:32], None
+            if gzip_ok and len(body) >= settings.GZIP_MINIMUM_SIZE:
+                body, encoding = gzip.compress(body, compresslevel=9, mtime=0), "gzip"
+                etag += "-gzip"
+            self._variants[key] = (body, f'"{etag}"', response_class.media_type, encoding)
+        return self._variants[key]
+
+
+class CatalogCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def bump(self) -> None:
+        """Forget every cached list; call after committing a service or stylist change."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    async def entry(self, name: str, load: Callable[[], Awaitable[Any]]) -> CatalogEntry:
+        entry = self._entries.get(name)
+        if entry is not None and time.monotonic() - entry.built_at < self.ttl_seconds:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        version = self.version
+        entry = CatalogEntry(await load())
+        with self._lock:
+            # A bump while loading means the rows may predate the change: serve them once, don't keep them.
+            if version == self.version and self.ttl_seconds > 0:
+                self._entries[name] = entry
+        return entry
+
+    async def respond(self, request: Request, name: str, load: Callable[[], Awaitable[Any]]) -> Response:
+        entry = await self.entry(name, load)
+        body, etag, media_type, encoding = entry.variant(wants_msgpack(request), "gzip" in accepted_encodings(request))
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept, Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=media_type, headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version, "entries": sorted(self._entries), "hits": self.hits,
+            "misses": self.misses, "not_modified": self.not_modified,
+        }
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_TTL_SECONDS)
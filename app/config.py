@@ -4,6 +4,22 @@ from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./salon.db"
+    # Defaults to DATABASE_URL with its asyncio driver (sqlite -> sqlite+aiosqlite).
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool, shared by the sync and async engines (ignored for in-memory SQLite).
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+
+    # Pragmas run on every new SQLite connection. WAL lets readers proceed while a
+    # writer commits; busy_timeout makes writers wait for the lock instead of failing.
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
     
     JWT_SECRET: str = "change-me"
     ALGORITHM: str = "HS256"
@@ -17,6 +33,55 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASS: Optional[str] = None
     SMTP_SENDER: str = "no-reply@salon.local"
+    SMTP_STARTTLS: bool = True
+    # Log in with SMTP_USER / SMTP_PASS. Without them mail is only logged; set false for an open relay or local sink.
+    SMTP_AUTH: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+
+    # Outbox delivery: messages per pass over one SMTP connection, retry policy, idle poll.
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 6
+    OUTBOX_RETRY_BASE_SECONDS: float = 30.0
+    OUTBOX_POLL_SECONDS: float = 2.0
+    OUTBOX_LEASE_SECONDS: float = 300.0
+
+    OCCUPANCY_CACHE_MAX_ENTRIES: int = 4096
+    OCCUPANCY_CACHE_TTL_SECONDS: float = 30.0
+
+    # Services/stylists lists; other workers pick up a catalog change within this many seconds.
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0
+
+    # Authenticated principals and verified tokens; the TTL bounds cross-worker staleness of role changes.
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+
+    # pbkdf2_sha256 cost; stored hashes below it are re-hashed on the next successful login.
+    PASSWORD_HASH_ROUNDS: int = 29000
+    # Hashing runs in this many worker processes (0 = the request threadpool).
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hash jobs allowed to wait for a worker before requests are refused with 503.
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+
+    # Replays of POSTs sent with an Idempotency-Key are kept this long; a claim whose request
+    # never finished (crashed worker) can be taken over after the lock timeout.
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = 2048
+
+    # Per-route threadpool queue wait in /metrics; wraps anyio's run_sync process-wide while the app runs.
+    METRICS_THREADPOOL_WAIT: bool = False
+
+    # Responses smaller than this go out uncompressed; level trades CPU for size (1-9).
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+
+    # `python -m app.serve`: worker processes (unset = one per usable CPU, capped), how long
+    # stopping workers may spend finishing in-flight requests, and how long a replacement
+    # worker may take to start during a SIGHUP rolling restart.
+    WEB_CONCURRENCY: Optional[int] = None
+    SERVE_MAX_WORKERS: int = 8
+    SERVE_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+    SERVE_WORKER_START_TIMEOUT_SECONDS: float = 60.0
 
     class Config:
         env_file = ".env"
@@ -1,14 +1,87 @@
-# app/database.py
-from sqlalchemy import create_engine
+from typing import Any, Dict, List
+from sqlalchemy import Insert, create_engine, event, insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "mysql": "mysql+aiomysql"}
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver unless one is already named."""
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(hide_password=False)
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return is_sqlite(url) and (parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory")
+
+def insert_ignoring_conflicts(table, dialect_name: str) -> Insert:
+    """INSERT that skips rows colliding with a unique key; rowcount counts only the rows inserted."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:  # MySQL / MariaDB
+        return insert(table).prefix_with("IGNORE")
+    return dialect_insert(table).on_conflict_do_nothing()
+
+def sqlite_pragmas() -> List[str]:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        # A negative cache_size is in KiB rather than pages.
+        f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KIB)}",
+    ]
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def engine_options(url: str, poolclass) -> Dict[str, Any]:
+    """Pool sizing from settings; in-memory SQLite keeps its single-connection pool."""
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    if not is_memory_sqlite(url):
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+def install_sqlite_profile(target: Engine) -> Engine:
+    """Run the configured pragmas on every new connection of a SQLite engine."""
+    if target.dialect.name == "sqlite":
+        event.listen(target, "connect", apply_sqlite_pragmas)
+    return target
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+
+engine = install_sqlite_profile(create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, QueuePool)))
+
+# aiosqlite defaults to NullPool for files, which would reopen (and re-run the pragmas) per session.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool))
+install_sqlite_profile(async_engine.sync_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 class Base(DeclarativeBase):
     pass
 
@@ -17,4 +90,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,26 +1,44 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db
 from .models import User, Role
 from .auth import decode_token
+from .principals import Principal, principal_cache, token_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
-    payload = decode_token(token)
+def verified_claims(token: str) -> dict | None:
+    """Decode and verify a bearer token, reusing the result for repeat requests with the same token."""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload and "exp" in payload:
+            token_cache.put(token, payload, expires_in=payload["exp"] - time.time())
+    return payload
+
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    payload = verified_claims(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.id == int(payload["sub"]))
-    user = user.first()
-    if not user or not user.is_active:
+    user_id = int(payload["sub"])
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = (await db.execute(select(User.id, User.role, User.is_active).where(User.id == user_id))).first()
+        if row:
+            principal = Principal(id=row.id, role=row.role, is_active=bool(row.is_active))
+            principal_cache.put(user_id, principal)
+    if not principal or not principal.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or not found")
-    return user
+    return principal
 
 
 def require_role(required: Role):
-    def checker(user: User = Depends(get_current_user)) -> User:
+    def checker(user: Principal = Depends(get_current_user)) -> Principal:
         if user.role != required.value:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return user
@@ -1,28 +1,75 @@
 
 import smtplib
+import time
 from email.message import EmailMessage
-from .config import settings  
+from .config import settings
+
+# Reconnect rather than trust a connection that has been idle this long; servers drop idle clients.
+IDLE_RECONNECT_SECONDS = 60.0
 
-def send_email(to_email: str, subject: str, body: str) -> None:
-    print("[EMAIL DEBUG] To:", to_email)
-    print("Subject:", subject)
-    print("Body:\n", body)
 
-    if not settings.SMTP_HOST or not settings.SMTP_USER or not settings.SMTP_PASS:
-        print("[EMAIL MOCK] SMTP not configured. Using mock mode (no real email sent).")
-        return
+def smtp_configured() -> bool:
+    """A host, plus credentials unless SMTP_AUTH=false; otherwise messages are only logged."""
+    return bool(settings.SMTP_HOST) and (not settings.SMTP_AUTH or bool(settings.SMTP_USER and settings.SMTP_PASS))
 
+
+def build_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
     msg["From"] = settings.SMTP_SENDER
     msg["To"] = to_email
     msg["Subject"] = subject
     msg.set_content(body)
+    return msg
+
+
+class SMTPConnection:
+    """One SMTP session (connect, STARTTLS, login) reused for many messages.
+
+    `send` opens the session on first use and after an error or a long idle
+    gap; the caller decides what a failure means for the message.
+    """
 
-    try:
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASS)
-            server.send_message(msg)
-        print("[EMAIL SUCCESS] Email sent successfully.")
-    except Exception as e:
-        print(f"[EMAIL ERROR] Failed to send email: {e}. Falling back to mock (link already printed above).")
\ No newline at end of file
+    def __init__(self):
+        self._smtp: smtplib.SMTP | None = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _open(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.SMTP_STARTTLS:
+                smtp.starttls()
+            if settings.SMTP_AUTH:
+                smtp.login(settings.SMTP_USER, settings.SMTP_PASS)
+        except Exception:
+            smtp.close()
+            raise
+        self.connects += 1
+        return smtp
+
+    def send(self, msg: EmailMessage) -> None:
+        if self._smtp is not None and time.monotonic() - self._last_used > IDLE_RECONNECT_SECONDS:
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._open()
+        try:
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+            self._smtp = None
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+
+def log_email(to_email: str, subject: str, body: str) -> None:
+    print("[EMAIL DEBUG] To:", to_email)
+    print("Subject:", subject)
+    print("Body:\n", body)
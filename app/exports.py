@@ -0,0 +1,72 @@
+"""Streaming CSV / NDJSON exports.
+
+The generators open their own session: request-scoped dependencies are
+closed before a StreamingResponse body is sent. Rows are fetched as plain
+column tuples in `yield_per` partitions, so memory stays flat however many
+rows match, and each partition is written out as one chunk.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator, List
+from sqlalchemy import Select, select
+from . import models
+from .database import SessionLocal
+
+EXPORT_CHUNK_ROWS = 1000
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {ExportFormat.NDJSON: "application/x-ndjson", ExportFormat.CSV: "text/csv"}
+
+BOOKING_COLUMNS = [
+    models.Booking.id, models.Booking.customer_id, models.Booking.customer_name, models.Booking.customer_email,
+    models.Booking.customer_phone, models.Booking.service_id, models.Booking.stylist_id, models.Booking.start_time,
+    models.Booking.end_time, models.Booking.status, models.Booking.is_walkin, models.Booking.service_price_snapshot,
+    models.Booking.total_amount, models.Booking.amount_paid, models.Booking.balance_due, models.Booking.created_at,
+]
+
+PAYMENT_COLUMNS = [
+    models.Payment.id, models.Payment.booking_id, models.Payment.amount, models.Payment.status,
+    models.Payment.provider, models.Payment.masked_details, models.Payment.created_at,
+]
+
+
+def bookings_query() -> Select:
+    return select(*BOOKING_COLUMNS).order_by(models.Booking.id)
+
+
+def payments_query() -> Select:
+    return select(*PAYMENT_COLUMNS).order_by(models.Payment.id)
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def stream_rows(stmt: Select, fmt: ExportFormat) -> Iterator[str]:
+    names: List[str] = [c.name for c in stmt.selected_columns]
+    with SessionLocal() as db:
+        result = db.execute(stmt, execution_options={"yield_per": EXPORT_CHUNK_ROWS})
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == ExportFormat.CSV:
+            writer.writerow(names)
+        for partition in result.partitions():
+            if fmt == ExportFormat.CSV:
+                writer.writerows([[_plain(v) for v in row] for row in partition])
+            else:
+                buffer.writelines(
+                    json.dumps(dict(zip(names, map(_plain, row))), ensure_ascii=False) + "\n" for row in partition
+                )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
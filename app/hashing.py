@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from .auth import get_password_hash, verify_and_update_password
+from .config import settings
+
+
+class PasswordHashPool:
+    """Runs pbkdf2 hashing and verification off the request threadpool.
+
+    Jobs go to a fixed set of worker processes. At most `workers + queue_limit`
+    jobs may be in flight; beyond that callers get an immediate 503 instead of
+    piling up behind a login burst, so booking and availability requests keep
+    their threads. With `workers=0` jobs run on a small thread pool instead,
+    which keeps the same admission limit without spawning processes.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                # spawn, not fork: the parent holds engine pools and aiosqlite threads.
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= max(self.workers, 1) + self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-in requests, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+            executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash) where new_hash is set when the stored hash should be upgraded."""
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT)
@@ -0,0 +1,45 @@
+"""Liveness and readiness probes.
+
+`/healthz` answers as long as the process serves requests and touches
+nothing else. `/readyz` also needs the database to answer and every
+migration to be applied (`python -m app.init`); until then it is a 503, so
+a load balancer keeps traffic away from a worker started against an
+uninitialised or half-migrated database. Once the schema has been seen up
+to date the check is a single `SELECT 1`.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db
+from .migrations import pending_versions
+
+router = APIRouter(tags=["health"])
+
+_schema_ready = False
+
+
+def schema_problem(conn: Connection) -> Optional[str]:
+    pending = pending_versions(conn)
+    return f"pending migrations {pending}, run `python -m app.init`" if pending else None
+
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(db: AsyncSession = Depends(get_async_db)):
+    global _schema_ready
+    try:
+        await db.execute(text("SELECT 1"))
+        if not _schema_ready:
+            problem = await db.run_sync(lambda session: schema_problem(session.connection()))
+            if problem:
+                raise HTTPException(status_code=503, detail=problem)
+            _schema_ready = True
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=503, detail=f"database unavailable: {e.__class__.__name__}")
+    return {"status": "ready"}
@@ -0,0 +1,229 @@
+"""Idempotency-Key support for the booking and payment POSTs.
+
+A client that may retry sends `Idempotency-Key: <unique string>`. The first
+request with a key runs normally and its response is stored; a retry with
+the same key and the same request gets the stored response back (marked
+`Idempotent-Replayed: true`) without the handler running again, so a retry
+over flaky Wi-Fi cannot book or charge twice.
+
+- Keys are scoped to the caller (the Authorization header) and stored
+  hashed in `idempotency_keys`, with the response, for
+  IDEMPOTENCY_TTL_SECONDS. Recent ones are also kept in memory.
+- Duplicates that arrive while the first request is still running in this
+  process wait for it and replay its response. If it is running in
+  another worker they get 409 and should retry shortly.
+- Reusing a key for a different request (path, query or body) is a 422.
+- 5xx responses are not stored: the next retry runs the handler again.
+
+The response is recorded right after the handler commits, in its own
+transaction; a worker dying in between leaves a claim that a retry can
+take over once IDEMPOTENCY_LOCK_SECONDS have passed.
+"""
+import asyncio
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, update
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from . import models
+from .config import settings
+from .database import AsyncSessionLocal, insert_ignoring_conflicts
+from .principals import TTLCache
+
+HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+PURGE_EVERY = 200
+
+IDEMPOTENT_ROUTES = re.compile(r"^/bookings/(guest|batch|\d+/pay|\d+/pay-deposit)?$")
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: Optional[int]
+    content_type: Optional[str]
+    body: bytes
+
+    @property
+    def complete(self) -> bool:
+        return self.status_code is not None
+
+
+def digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class IdempotencyStore:
+    """The `idempotency_keys` table behind a small in-memory cache of completed responses."""
+
+    def __init__(self, ttl_seconds: float, lock_seconds: float, cache_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.cache = TTLCache(cache_entries, ttl_seconds)
+        # key -> future resolved when the request holding the key in this process finishes
+        self.running: Dict[str, asyncio.Future] = {}
+        self.executions = 0
+        self.replays = 0
+        self.waits = 0
+        self._stores = 0
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Take `key` for this request; returns the existing record instead if someone holds or completed it."""
+        record = models.IdempotencyRecord
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(record).where(record.key == key, record.expires_at <= now))
+            taken = await db.execute(insert_ignoring_conflicts(record, db.bind.dialect.name).values(
+                key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=self.lock_seconds),
+            ))
+            existing = None
+            if taken.rowcount != 1:
+                row = await db.get(record, key)
+                existing = StoredResponse(row.fingerprint, row.status_code, row.content_type, row.body or b"")
+            await db.commit()
+        if existing is not None and existing.complete:
+            self.cache.put(key, existing)
+        return existing
+
+    async def finish(self, key: str, stored: Optional[StoredResponse]) -> None:
+        """Record the response for `key`, or release the claim when there is nothing to keep."""
+        record = models.IdempotencyRecord
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            if stored is None:
+                await db.execute(delete(record).where(record.key == key))
+            else:
+                await db.execute(update(record).where(record.key == key).values(
+                    status_code=stored.status_code, content_type=stored.content_type, body=stored.body,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                ))
+                self._stores += 1
+                if self._stores % PURGE_EVERY == 0:
+                    await db.execute(delete(record).where(record.expires_at <= now))
+            await db.commit()
+        if stored is not None:
+            self.cache.put(key, stored)
+
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions, "replays": self.replays, "waits": self.waits, "running": len(self.running),
+            "cache": self.cache.stats(),
+        }
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not IDEMPOTENT_ROUTES.match(scope["path"]):
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        raw_key = headers.get(HEADER)
+        if raw_key is None:
+            return await self.app(scope, receive, send)
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            detail = f"{HEADER.title()} must be 1-{MAX_KEY_LENGTH} characters"
+            return await JSONResponse({"detail": detail}, status_code=400)(scope, receive, send)
+
+        body = await read_body(receive)
+        key = digest(headers.get("authorization", ""), raw_key)
+        fingerprint = digest(scope["path"], scope.get("query_string", b""), body)
+
+        while True:
+            stored = self.store.cache.get(key)
+            if stored is not None:
+                return await self.replay(stored, fingerprint, scope, receive, send)
+            running = self.store.running.get(key)
+            if running is not None:
+                # Same key already executing in this process: wait for it, then replay (or retry if it failed).
+                self.store.waits += 1
+                await asyncio.shield(running)
+                continue
+            break
+
+        self.store.running[key] = asyncio.get_running_loop().create_future()
+        try:
+            existing = await self.store.claim(key, fingerprint)
+            if existing is not None:
+                if existing.complete or existing.fingerprint != fingerprint:
+                    return await self.replay(existing, fingerprint, scope, receive, send)
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still being processed"},
+                    status_code=409, headers={"Retry-After": "1"},
+                )
+                return await response(scope, receive, send)
+            await self.execute(key, fingerprint, body, scope, receive, send)
+        finally:
+            self.store.running.pop(key).set_result(None)
+
+    async def execute(self, key: str, fingerprint: str, body: bytes, scope: Scope, receive: Receive, send: Send) -> None:
+        self.store.executions += 1
+        start: Dict[str, object] = {}
+        chunks = []
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, replay_body(body, receive), capture)
+            status = start.get("status", 500)
+            if status < 500:
+                stored = StoredResponse(
+                    fingerprint, status, Headers(raw=start.get("headers", [])).get("content-type"), b"".join(chunks),
+                )
+        finally:
+            await self.store.finish(key, stored)
+
+    async def replay(self, stored: StoredResponse, fingerprint: str, scope: Scope, receive: Receive, send: Send) -> None:
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used for a different request"}, status_code=422,
+            )
+            return await response(scope, receive, send)
+        self.store.replays += 1
+        response = Response(
+            stored.body, status_code=stored.status_code,
+            headers={REPLAYED_HEADER: "true", **({"Content-Type": stored.content_type} if stored.content_type else {})},
+        )
+        await response(scope, receive, send)
+
+async def read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def replay_body(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def wrapped() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    return wrapped
+
+
+idempotency_store = IdempotencyStore(
+    settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_LOCK_SECONDS, settings.IDEMPOTENCY_CACHE_MAX_ENTRIES,
+)
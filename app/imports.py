@@ -0,0 +1,537 @@
+"""Bulk CSV / NDJSON import of users, bookings and payments.
+
+The counterpart of `exports.py`, for migrating another branch or system.
+Rows are read as a stream and handled `IMPORT_CHUNK_ROWS` at a time, one
+transaction per chunk:
+
+- services, stylists and customer emails are resolved from maps loaded
+  once per import, not looked up per row;
+- bookings are checked for overlaps per stylist in bulk: one query
+  loads the chunk's existing bookings, `partition_free` places the new ones
+  (against each other too), and the survivors go in with multi-row INSERTs
+  together with their payments and, for upcoming active bookings, their
+  slot claims (those must start and end on the 5-minute grid);
+- a row that fails validation or overlaps is reported with its line
+  number and skipped; the rest of the file still goes in.
+
+Columns (CSV header or NDJSON keys; empty values count as missing):
+
+    users     email, full_name, role (customer|stylist), hashed_password (pbkdf2_sha256),
+              display_name (stylists; defaults to full_name)
+    bookings  service or service_id, stylist or stylist_id, start_time, end_time, status,
+              customer_email, customer_name, customer_phone, total_amount, is_walkin,
+              amount_paid, paid_at, payment_provider, created_at
+    payments  booking_id or (stylist or stylist_id, start_time), amount, status, provider,
+              masked_details, created_at
+
+Users without a password hash get an unusable one and sign in after a
+password reset. Plain-text passwords are refused: hashing them row by row
+at full rounds would hold the import (and a request thread) for minutes.
+A `stylist` row also gets a Stylist profile with the default working hours,
+so it can be booked straight away.
+A booking's `customer_email` links it to an existing (or earlier imported)
+user, otherwise it is stored as a guest booking. `amount_paid` on a
+booking row records one successful payment; `payments` rows add more.
+
+    python -m app.imports bookings history.csv --errors errors.ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import secrets
+import sys
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import Connection, Engine, insert, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from . import models
+from .auth import get_password_hash, pwd_context
+from .balances import backfill
+from .catalog import catalog_cache
+from .exports import ExportFormat
+from .occupancy import BUCKET_MINUTES, occupancy_cache, on_grid
+from .reservations import ACTIVE_STATUSES, claim_buckets, partition_free
+
+IMPORT_CHUNK_ROWS = 5000
+MAX_REPORTED_ERRORS = 1000
+IMPORTABLE_ROLES = (models.Role.CUSTOMER.value, models.Role.STYLIST.value)
+
+
+class ImportKind(str, Enum):
+    USERS = "users"
+    BOOKINGS = "bookings"
+    PAYMENTS = "payments"
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    # The first `max_errors` failures (None keeps all); `failed` counts every one.
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    max_errors: Optional[int] = MAX_REPORTED_ERRORS
+
+    def fail(self, line: int, message: str) -> None:
+        self.failed += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind, "rows": self.rows, "imported": self.imported, "failed": self.failed,
+            "errors": self.errors, "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def read_rows(lines: Iterable[str], fmt: ExportFormat) -> Iterator[Tuple[int, Any]]:
+    """(line number, row dict) for each record; the dict is a RowError for unreadable lines."""
+    if fmt == ExportFormat.CSV:
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {k.strip(): (v.strip() or None if isinstance(v, str) else v) for k, v in row.items() if k}
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, RowError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield number, RowError("expected a JSON object")
+            continue
+        yield number, {k: (None if v == "" else v) for k, v in row.items()}
+
+
+def _required(row: dict, key: str) -> Any:
+    value = row.get(key)
+    if value is None:
+        raise RowError(f"{key} is required")
+    return value
+
+
+def _number(row: dict, key: str, default: Optional[float] = None) -> Optional[float]:
+    value = row.get(key)
+    if value is None:
+        return default
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} must be a number")
+
+
+def _timestamp(row: dict, key: str, default: Optional[datetime] = None) -> Optional[datetime]:
+    value = row.get(key)
+    if value is None:
+        return default
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise RowError(f"{key} must be an ISO 8601 date-time")
+
+
+def _flag(row: dict, key: str) -> bool:
+    value = row.get(key)
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    if str(value).lower() in ("1", "true", "yes", "y"):
+        return True
+    if str(value).lower() in ("0", "false", "no", "n"):
+        return False
+    raise RowError(f"{key} must be true or false")
+
+
+def _choice(row: dict, key: str, allowed: Iterable[str], default: str) -> str:
+    value = str(row.get(key) or default).lower()
+    if value not in allowed:
+        raise RowError(f"{key} must be one of {', '.join(allowed)}")
+    return value
+
+
+class Importer(ABC):
+    kind: ImportKind
+
+    @abstractmethod
+    def prepare(self, row: dict) -> Dict[str, Any]:
+        """Validate and resolve one row; raises RowError."""
+
+    @abstractmethod
+    def write(self, conn: Connection, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+        """Insert a chunk of prepared rows in the caller's transaction."""
+
+    def committed(self) -> None:
+        """Called after each chunk's transaction commits."""
+
+
+class UserImporter(Importer):
+    kind = ImportKind.USERS
+
+    def __init__(self, conn: Connection):
+        self.emails = set(conn.execute(select(models.User.email)).scalars())
+        # Shared by every passwordless row: a random secret nobody knows, hashed once.
+        self.unusable_hash = get_password_hash(secrets.token_urlsafe(32))
+        self.new_stylists = False
+
+    def prepare(self, row: dict) -> Dict[str, Any]:
+        email = str(_required(row, "email")).strip()
+        if "@" not in email:
+            raise RowError("email is not an email address")
+        if email in self.emails:
+            raise RowError(f"{email} already exists")
+        if row.get("password") is not None:
+            raise RowError("plain-text password is not accepted; give hashed_password, or leave it empty for a password reset")
+        hashed = row.get("hashed_password")
+        if hashed is not None and pwd_context.identify(hashed) is None:
+            raise RowError("hashed_password is not a pbkdf2_sha256 hash")
+        role = _choice(row, "role", IMPORTABLE_ROLES, models.Role.CUSTOMER.value)
+        prepared = {
+            "email": email, "full_name": row.get("full_name"), "role": role,
+            "hashed_password": hashed or self.unusable_hash,
+            "created_at": _timestamp(row, "created_at", datetime.utcnow()),
+            # Not a user column; stylists get a bookable Stylist profile under this name in write().
+            "display_name": (row.get("display_name") or row.get("full_name") or email.split("@")[0])
+            if role == models.Role.STYLIST.value else None,
+        }
+        self.emails.add(email)
+        return prepared
+
+    def write(self, conn: Connection, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+        rows = [row for _, row in chunk]
+        display_names = {row["email"]: row.pop("display_name") for row in rows}
+        if any(display_names.values()):
+            # RETURNING order is not guaranteed for multi-row inserts; match ids back by email.
+            returned = conn.execute(insert(models.User).returning(models.User.id, models.User.email), rows)
+            conn.execute(insert(models.Stylist), [
+                {"user_id": user_id, "display_name": display_names[email]}
+                for user_id, email in returned if display_names[email]
+            ])
+            self.new_stylists = True
+        else:
+            conn.execute(insert(models.User), rows)
+        report.imported += len(chunk)
+
+    def committed(self) -> None:
+        if self.new_stylists:
+            catalog_cache.bump()
+            self.new_stylists = False
+
+
+class BookingImporter(Importer):
+    kind = ImportKind.BOOKINGS
+
+    def __init__(self, conn: Connection):
+        self.services: Dict[Any, Any] = {}
+        for s in conn.execute(select(models.Service.id, models.Service.name, models.Service.price, models.Service.duration_minutes)):
+            self.services[s.id] = self.services[s.name.lower()] = s
+        self.stylists: Dict[Any, int] = {}
+        for s in conn.execute(select(models.Stylist.id, models.Stylist.display_name)):
+            self.stylists[s.id] = self.stylists[s.display_name.lower()] = s.id
+        self.customers = dict(conn.execute(select(models.User.email, models.User.id)).all())
+        self.marked: List[Tuple[int, datetime, datetime]] = []
+
+    def service(self, row: dict):
+        ref = row.get("service_id") or row.get("service")
+        if ref is None:
+            raise RowError("service or service_id is required")
+        found = self.services.get(int(ref) if str(ref).isdigit() else str(ref).lower())
+        if found is None:
+            raise RowError(f"unknown service {ref!r}")
+        return found
+
+    def stylist(self, row: dict, required: bool = False) -> Optional[int]:
+        ref = row.get("stylist_id") or row.get("stylist")
+        if ref is None:
+            if required:
+                raise RowError("stylist or stylist_id is required")
+            return None
+        found = self.stylists.get(int(ref) if str(ref).isdigit() else str(ref).lower())
+        if found is None:
+            raise RowError(f"unknown stylist {ref!r}")
+        return found
+
+    def prepare(self, row: dict) -> Dict[str, Any]:
+        service = self.service(row)
+        start = _timestamp(row, "start_time")
+        if start is None:
+            raise RowError("start_time is required")
+        end = _timestamp(row, "end_time", start + timedelta(minutes=service.duration_minutes))
+        if end <= start:
+            raise RowError("end_time must be after start_time")
+        now = datetime.now()
+        finished = models.BookingStatus.COMPLETED.value if end <= now else models.BookingStatus.CONFIRMED.value
+        total = _number(row, "total_amount", service.price)
+        paid = _number(row, "amount_paid", 0.0)
+        if total < 0 or paid < 0 or paid > total:
+            raise RowError("amounts must satisfy 0 <= amount_paid <= total_amount")
+        status = _choice(row, "status", [s.value for s in models.BookingStatus], finished)
+        if status in ACTIVE_STATUSES and end > now and not (on_grid(start) and on_grid(end)):
+            raise RowError(f"upcoming bookings must start and end on a {BUCKET_MINUTES}-minute boundary")
+        email = row.get("customer_email")
+        return {
+            "customer_id": self.customers.get(email) if email else None,
+            "customer_name": row.get("customer_name"), "customer_email": email, "customer_phone": row.get("customer_phone"),
+            "service_id": service.id, "stylist_id": self.stylist(row),
+            "start_time": start, "end_time": end,
+            "status": status,
+            "is_walkin": _flag(row, "is_walkin"),
+            "service_price_snapshot": total, "total_amount": total,
+            "amount_paid": paid, "balance_due": round(total - paid, 2),
+            "created_at": _timestamp(row, "created_at", start),
+            # Not booking columns; turned into a Payment row by write().
+            "paid_at": _timestamp(row, "paid_at", start), "payment_provider": row.get("payment_provider") or "import",
+        }
+
+    def busy_by_stylist(self, conn: Connection, rows: List[Dict[str, Any]]) -> Dict[int, List[Tuple[datetime, datetime]]]:
+        """Existing non-cancelled bookings of the chunk's stylists over its time span, merged into disjoint sorted spans."""
+        booking = models.Booking
+        stylist_ids = {row["stylist_id"] for row in rows}
+        first, last = min(row["start_time"] for row in rows), max(row["end_time"] for row in rows)
+        busy = defaultdict(list)
+        existing = conn.execute(
+            select(booking.stylist_id, booking.start_time, booking.end_time)
+            .where(booking.stylist_id.in_(stylist_ids), booking.status != models.BookingStatus.CANCELLED.value,
+                   booking.start_time < last, booking.end_time > first)
+            .order_by(booking.start_time)
+        )
+        for stylist_id, start, end in existing:
+            spans = busy[stylist_id]
+            # Legacy rows may overlap each other; partition_free wants disjoint spans.
+            if spans and start < spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+            else:
+                spans.append((start, end))
+        return busy
+
+    @staticmethod
+    def holds_slots(row: Dict[str, Any]) -> bool:
+        """Upcoming active bookings claim their 5-minute buckets, like live ones; history does not."""
+        return row["stylist_id"] is not None and row["status"] in ACTIVE_STATUSES and row["end_time"] > datetime.now()
+
+    def place(self, conn: Connection, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport):
+        """Drop rows that overlap an existing booking or an earlier row; returns the rest."""
+        placed, candidates = [], defaultdict(list)
+        for line, row in chunk:
+            if row["stylist_id"] is None or row["status"] == models.BookingStatus.CANCELLED.value:
+                placed.append((line, row))
+            else:
+                candidates[row["stylist_id"]].append((line, row))
+        if not candidates:
+            return placed
+        busy = self.busy_by_stylist(conn, [row for group in candidates.values() for _, row in group])
+        for stylist_id, group in candidates.items():
+            by_span = defaultdict(list)
+            for line, row in sorted(group, key=lambda item: item[0]):
+                by_span[row["start_time"], row["end_time"]].append((line, row))
+            # One span per row, so a duplicated row is reported as overlapping its first copy.
+            free, taken = partition_free(busy.get(stylist_id, []), [span for span, same in by_span.items() for _ in same])
+            for span in free:
+                placed.append(by_span[span].pop(0))
+            for span in taken:
+                line, _ = by_span[span].pop(0)
+                report.fail(line, f"overlaps another booking of stylist {stylist_id} at {span[0].isoformat()}")
+        return sorted(placed, key=lambda item: item[0])
+
+    @staticmethod
+    def insert_bookings(conn: Connection, rows: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Insert the rows, returning the ids of those that need one (claims, payments) in input order.
+
+        As in `reserve_bookings_bulk`, a multi-row INSERT's RETURNING order is
+        not guaranteed, so ids are matched back by (stylist_id, start_time),
+        unique among placed bookings that are not cancelled. The rare row
+        without that key but with a payment goes in on its own.
+        """
+        booking = models.Booking
+        keyed, unkeyed = [], []
+        for row in rows:
+            (keyed if row["stylist_id"] is not None and row["status"] != models.BookingStatus.CANCELLED.value else unkeyed).append(row)
+        by_key = {}
+        if keyed:
+            returned = conn.execute(insert(booking).returning(booking.id, booking.stylist_id, booking.start_time), keyed)
+            by_key = {(stylist_id, start): booking_id for booking_id, stylist_id, start in returned}
+        unpaid = [row for row in unkeyed if not row["amount_paid"]]
+        if unpaid:
+            conn.execute(insert(booking), unpaid)
+        ids = []
+        for row in rows:
+            if row["stylist_id"] is not None and row["status"] != models.BookingStatus.CANCELLED.value:
+                ids.append(by_key[row["stylist_id"], row["start_time"]])
+            elif row["amount_paid"]:
+                ids.append(conn.execute(insert(booking).returning(booking.id), row).scalar_one())
+            else:
+                ids.append(None)
+        return ids
+
+    def write(self, conn: Connection, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+        placed = self.place(conn, chunk, report)
+        if not placed:
+            return
+        extras = [(row.pop("paid_at"), row.pop("payment_provider")) for _, row in placed]
+        rows = [row for _, row in placed]
+        ids = self.insert_bookings(conn, rows)
+        claims = [
+            {"stylist_id": row["stylist_id"], "slot_start": bucket, "booking_id": booking_id}
+            for booking_id, row in zip(ids, rows) if self.holds_slots(row)
+            for bucket in claim_buckets(row["start_time"], row["end_time"])
+        ]
+        if claims:
+            conn.execute(insert(models.SlotClaim), claims)
+        payments = [
+            {"booking_id": booking_id, "amount": row["amount_paid"], "status": models.PaymentStatus.SUCCESS.value,
+             "provider": provider, "masked_details": "Imported", "created_at": paid_at}
+            for booking_id, row, (paid_at, provider) in zip(ids, rows, extras) if row["amount_paid"] > 0
+        ]
+        if payments:
+            conn.execute(insert(models.Payment), payments)
+        report.imported += len(rows)
+        self.marked = [(row["stylist_id"], row["start_time"], row["end_time"])
+                       for row in rows if row["stylist_id"] is not None and row["status"] in ACTIVE_STATUSES]
+
+    def committed(self) -> None:
+        for stylist_id, start, end in self.marked:
+            occupancy_cache.mark(stylist_id, start, end)
+        self.marked = []
+
+
+class PaymentImporter(BookingImporter):
+    kind = ImportKind.PAYMENTS
+
+    def prepare(self, row: dict) -> Dict[str, Any]:
+        booking_id = row.get("booking_id")
+        key = None
+        if booking_id is not None:
+            if not str(booking_id).isdigit():
+                raise RowError("booking_id must be an integer")
+            booking_id = int(booking_id)
+        else:
+            start = _timestamp(row, "start_time")
+            if start is None:
+                raise RowError("booking_id, or stylist and start_time, is required")
+            key = (self.stylist(row, required=True), start)
+        amount = _number(row, "amount")
+        if amount is None or amount <= 0:
+            raise RowError("amount must be a positive number")
+        return {
+            "booking_id": booking_id, "booking_key": key, "amount": amount,
+            "status": _choice(row, "status", [s.value for s in models.PaymentStatus], models.PaymentStatus.SUCCESS.value),
+            "provider": row.get("provider") or "import", "masked_details": row.get("masked_details") or "Imported",
+            "created_at": _timestamp(row, "created_at", datetime.utcnow()),
+        }
+
+    def write(self, conn: Connection, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+        booking = models.Booking
+        ids = {row["booking_id"] for _, row in chunk if row["booking_id"] is not None}
+        keys = {row["booking_key"] for _, row in chunk if row["booking_key"] is not None}
+        conditions = []
+        if ids:
+            conditions.append(booking.id.in_(ids))
+        if keys:
+            conditions.append(tuple_(booking.stylist_id, booking.start_time).in_(keys))
+        known, by_key = set(), {}
+        for booking_id, stylist_id, start in conn.execute(
+            select(booking.id, booking.stylist_id, booking.start_time).where(or_(*conditions))
+            # A cancelled booking and its replacement can share a start time; prefer the live one.
+            .order_by(booking.status == models.BookingStatus.CANCELLED.value, booking.id.desc())
+        ):
+            known.add(booking_id)
+            by_key.setdefault((stylist_id, start), booking_id)
+        rows = []
+        for line, row in chunk:
+            key = row.pop("booking_key")
+            if key is not None:
+                row["booking_id"] = by_key.get(key)
+                if row["booking_id"] is None:
+                    report.fail(line, f"no booking of stylist {key[0]} at {key[1].isoformat()}")
+                    continue
+            elif row["booking_id"] not in known:
+                report.fail(line, f"booking {row['booking_id']} does not exist")
+                continue
+            rows.append(row)
+        if not rows:
+            return
+        conn.execute(insert(models.Payment), rows)
+        backfill(conn, sorted({row["booking_id"] for row in rows}))
+        report.imported += len(rows)
+
+
+IMPORTERS = {ImportKind.USERS: UserImporter, ImportKind.BOOKINGS: BookingImporter, ImportKind.PAYMENTS: PaymentImporter}
+
+
+def run_import(lines: Iterable[str], kind: ImportKind, fmt: ExportFormat, target: Optional[Engine] = None,
+               max_errors: Optional[int] = MAX_REPORTED_ERRORS, chunk_rows: int = IMPORT_CHUNK_ROWS) -> ImportReport:
+    """Import every row of `lines`, committing each chunk on its own; never raises for bad rows."""
+    if target is None:
+        from .database import engine as target
+    report = ImportReport(kind.value, max_errors=max_errors)
+    with target.connect() as conn:
+        importer = IMPORTERS[kind](conn)
+        conn.rollback()
+
+        def flush(chunk):
+            before = (report.imported, report.failed, len(report.errors))
+            try:
+                with target.begin() as write_conn:
+                    importer.write(write_conn, chunk, report)
+            except IntegrityError as e:
+                # Someone else wrote a conflicting row (a live booking's slot, a new email) after the checks.
+                report.imported, report.failed = before[0], before[1]
+                del report.errors[before[2]:]
+                for line, _ in chunk:
+                    report.fail(line, f"chunk rolled back, retry these rows: {e.orig}")
+                return
+            importer.committed()
+
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for line, row in read_rows(lines, fmt):
+            report.rows += 1
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                chunk.append((line, importer.prepare(row)))
+            except RowError as e:
+                report.fail(line, str(e))
+                continue
+            if len(chunk) >= chunk_rows:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    return report
+
+
+def text_lines(binary) -> io.TextIOWrapper:
+    """Decode an uploaded or opened binary file, tolerating a UTF-8 byte order mark."""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", type=ImportKind, choices=list(ImportKind))
+    parser.add_argument("path")
+    parser.add_argument("--format", type=ExportFormat, choices=list(ExportFormat), help="default: from the file extension")
+    parser.add_argument("--errors", help="write every failed row as NDJSON here")
+    args = parser.parse_args()
+    fmt = args.format or (ExportFormat.CSV if args.path.lower().endswith(".csv") else ExportFormat.NDJSON)
+    started = datetime.now()
+    with open(args.path, "rb") as f:
+        result = run_import(text_lines(f), args.kind, fmt, max_errors=None)
+    seconds = (datetime.now() - started).total_seconds()
+    print(f"{result.imported} of {result.rows} {args.kind.value} rows imported in {seconds:.1f}s, {result.failed} failed.")
+    if args.errors:
+        with open(args.errors, "w") as out:
+            out.writelines(json.dumps(error) + "\n" for error in result.errors)
+    else:
+        for error in result.errors[:20]:
+            print(f"  line {error['line']}: {error['error']}")
+    sys.exit(1 if result.failed else 0)
@@ -0,0 +1,103 @@
+"""Explicit database setup: schema migrations, then first-run data.
+
+Importing `app.main` touches no database, so starting a worker (or the test
+suite) costs only the imports, and several workers starting together do not
+race each other on migrations. Run this once per deploy, before the workers
+start (`python -m app.serve` does it in its parent process); `/readyz`
+answers 503 until it has:
+
+    python -m app.init            # migrate, then seed the owner account and sample catalog
+    python -m app.init migrate    # migrations only
+"""
+import sys
+from typing import List, Optional
+from sqlalchemy import Engine, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .config import settings
+from .migrations import run_migrations
+
+SAMPLE_SERVICES = [
+    {
+        "name": "Women's Haircut",
+        "price": 40.0,
+        "duration_minutes": 60,
+        "description": "Wash, cut & blowdry styling."
+    },
+    {
+        "name": "Men's Haircut",
+        "price": 25.0,
+        "duration_minutes": 30,
+        "description": "Standard clipper or scissor cut."
+    },
+    {
+        "name": "Color & Style",
+        "price": 100.0,
+        "duration_minutes": 120,
+        "description": "Full hair coloring and professional styling."
+    }
+]
+
+
+def seed(db: Session) -> None:
+    """Owner account from ADMIN_EMAIL / ADMIN_PASSWORD, a first stylist and the sample services; idempotent."""
+    from .auth import get_password_hash
+    from .models import Role, Service, Stylist, User
+    from .principals import invalidate_principal
+
+    user = db.query(User).filter(User.email == settings.ADMIN_EMAIL).first()
+    if not user:
+        db.add(User(
+            email=settings.ADMIN_EMAIL,
+            hashed_password=get_password_hash(settings.ADMIN_PASSWORD),
+            role=Role.OWNER.value,
+            full_name="Store Owner"
+        ))
+        _commit_unless_exists(db)
+        user = db.query(User).filter(User.email == settings.ADMIN_EMAIL).one()
+    elif user.role != Role.OWNER.value:
+        user.role = Role.OWNER.value
+        db.commit()
+    invalidate_principal(user.id)
+
+    if db.query(Stylist.id).first() is None:
+        db.add(Stylist(
+            user_id=user.id,
+            display_name="Sam",
+            bio="Top Stylist",
+            start_hour=9,
+            end_hour=20
+        ))
+        _commit_unless_exists(db)
+
+    existing = set(db.scalars(select(Service.name).where(Service.name.in_([s["name"] for s in SAMPLE_SERVICES]))))
+    db.add_all([Service(**svc) for svc in SAMPLE_SERVICES if svc["name"] not in existing])
+    _commit_unless_exists(db)
+
+
+def _commit_unless_exists(db: Session) -> None:
+    """Commit seed rows; losing a unique-key race to another init run means they are already there."""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def init(target: Optional[Engine] = None) -> List[int]:
+    """Apply pending migrations and seed; returns the migration versions applied."""
+    if target is None:
+        from .database import engine as target
+    applied = run_migrations(target)
+    with Session(bind=target) as db:
+        seed(db)
+    return applied
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        applied = run_migrations()
+    elif not sys.argv[1:]:
+        applied = init()
+    else:
+        sys.exit("usage: python -m app.init [migrate]")
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
@@ -0,0 +1,286 @@
+"""Request metrics in Prometheus text format (`GET /metrics`, owner only).
+
+Per route template (`/bookings/{booking_id}/pay`, not the concrete path):
+
+- request latency histogram and a request count per status code,
+- SQL statements and SQL time, summed and as a per-request histogram of
+  statement counts (an N+1 loop shows up as a fat upper bucket),
+- time sync handlers and dependencies waited for a threadpool thread
+  (with METRICS_THREADPOOL_WAIT=true, see `instrument_threadpool`),
+
+plus in-flight requests, the threadpool's size / busy / waiting gauges and
+SQL issued outside any request (outbox worker, startup).
+
+The hot path is a few `perf_counter()` calls and integer additions: the
+SQL hooks add to the current request's `RequestStats` through a context
+variable, and the middleware folds those into the per-route series once,
+when the response has been sent. Nothing is formatted until a scrape.
+Counters live in the process, so with several workers each one reports
+its own.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import anyio.to_thread
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .deps import RequireOwner
+
+PREFIX = "salon"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED = "<unmatched>"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@dataclass
+class RequestStats:
+    """SQL and threadpool figures of the request running in this context."""
+    statements: int = 0
+    sql_seconds: float = 0.0
+    threadpool_wait: float = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, count in zip([*map(_number, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        braces = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{braces} {_number(self.sum)}")
+        lines.append(f"{name}_count{braces} {self.count}")
+        return lines
+
+
+class RouteSeries:
+    __slots__ = ("latency", "statuses", "statements", "sql_seconds", "threadpool_wait")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.threadpool_wait = 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteSeries] = {}
+        self.in_flight = 0
+        self.threadpool_wait = Histogram(WAIT_BUCKETS)
+        # SQL outside any request comes from other threads (outbox worker), hence the lock.
+        self._background_lock = threading.Lock()
+        self.background_statements = 0
+        self.background_sql_seconds = 0.0
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        series = self.routes.get((method, route))
+        if series is None:
+            series = self.routes[(method, route)] = RouteSeries()
+        series.latency.observe(seconds)
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+        series.statements.observe(stats.statements)
+        series.sql_seconds += stats.sql_seconds
+        series.threadpool_wait += stats.threadpool_wait
+
+    def record_background_sql(self, seconds: float) -> None:
+        with self._background_lock:
+            self.background_statements += 1
+            self.background_sql_seconds += seconds
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def render(self) -> str:
+        """Prometheus text exposition; call on the event loop (the threadpool gauges are per loop)."""
+        routes = sorted(self.routes.items())
+        out: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> str:
+            name = f"{PREFIX}_{name}"
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            return name
+
+        name = family("http_requests_total", "counter", "Requests by route template and status code.")
+        for (method, route), series in routes:
+            for status, count in sorted(series.statuses.items()):
+                out.append(f'{name}{{{_labels(method, route)},status="{status}"}} {count}')
+        name = family("http_request_duration_seconds", "histogram", "Time from request start to the last body chunk.")
+        for (method, route), series in routes:
+            out.extend(series.latency.lines(name, _labels(method, route)))
+        name = family("http_requests_in_flight", "gauge", "Requests currently being handled.")
+        out.append(f"{name} {self.in_flight}")
+
+        name = family("sql_statements_per_request", "histogram", "SQL statements executed per request.")
+        for (method, route), series in routes:
+            out.extend(series.statements.lines(name, _labels(method, route)))
+        name = family("sql_seconds_total", "counter", "Time spent executing SQL statements, per route.")
+        for (method, route), series in routes:
+            out.append(f"{name}{{{_labels(method, route)}}} {_number(series.sql_seconds)}")
+        name = family("sql_background_statements_total", "counter", "SQL statements executed outside any request.")
+        out.append(f"{name} {self.background_statements}")
+        name = family("sql_background_seconds_total", "counter", "Time spent on SQL outside any request.")
+        out.append(f"{name} {_number(self.background_sql_seconds)}")
+
+        name = family("threadpool_wait_seconds_total", "counter", "Time sync handlers and dependencies queued for a thread, per route.")
+        for (method, route), series in routes:
+            out.append(f"{name}{{{_labels(method, route)}}} {_number(series.threadpool_wait)}")
+        name = family("threadpool_wait_seconds", "histogram", "Queue wait of each job handed to the threadpool.")
+        out.extend(self.threadpool_wait.lines(name, ""))
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        statistics = limiter.statistics()
+        for suffix, value, help_text in (
+            ("threadpool_threads", limiter.total_tokens, "Threadpool size."),
+            ("threadpool_busy", statistics.borrowed_tokens, "Threads running a job."),
+            ("threadpool_queued", statistics.tasks_waiting, "Jobs waiting for a thread."),
+        ):
+            out.append(f"{family(suffix, 'gauge', help_text)} {_number(value)}")
+        return "\n".join(out) + "\n"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{method}",route="{_escape(route)}"'
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and files it under its route template; add it last (outermost)."""
+
+    def __init__(self, app: ASGIApp, registry: Optional[Metrics] = None):
+        self.app = app
+        self.metrics = registry or metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def observe(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, observe)
+        finally:
+            self.metrics.in_flight -= 1
+            current_request.reset(token)
+            route = scope.get("route")
+            self.metrics.record(
+                scope["method"], getattr(route, "path", UNMATCHED), status, time.perf_counter() - started, stats,
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._metrics_started
+    stats = current_request.get()
+    if stats is None:
+        metrics.record_background_sql(elapsed)
+    else:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+
+
+def instrument_engine(target: Engine) -> Engine:
+    """Count and time the statements of a sync engine (or an async engine's `sync_engine`)."""
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    return target
+
+
+_original_run_sync = None
+
+
+async def _timed_run_sync(func, *args, **kwargs):
+    run_sync = _original_run_sync or anyio.to_thread.run_sync
+    if current_request.get() is None:
+        # Not one of our requests (another anyio user, a background job): leave it alone.
+        return await run_sync(func, *args, **kwargs)
+    submitted = time.perf_counter()
+
+    @functools.wraps(func)
+    def timed(*call_args):
+        # Runs on the worker thread, in a copy of the caller's context.
+        waited = time.perf_counter() - submitted
+        metrics.threadpool_wait.observe(waited)
+        current_request.get().threadpool_wait += waited
+        return func(*call_args)
+
+    return await run_sync(timed, *args, **kwargs)
+
+
+def instrument_threadpool() -> None:
+    """Measure queue wait of sync handlers and dependencies; opt-in with METRICS_THREADPOOL_WAIT.
+
+    Starlette's `run_in_threadpool` takes no limiter or hook, so this rebinds
+    `anyio.to_thread.run_sync`, which Starlette looks up on every call. The
+    rebinding is process-wide, so it is only installed on request (at app
+    startup), passes calls made outside a request straight through, and is
+    undone by `uninstrument_threadpool()` at shutdown.
+    """
+    global _original_run_sync
+    if _original_run_sync is None:
+        _original_run_sync = anyio.to_thread.run_sync
+        anyio.to_thread.run_sync = _timed_run_sync
+
+
+def uninstrument_threadpool() -> None:
+    global _original_run_sync
+    if _original_run_sync is not None:
+        anyio.to_thread.run_sync = _original_run_sync
+        _original_run_sync = None
+
+
+metrics = Metrics()
+router = APIRouter(tags=["admin"], dependencies=[Depends(RequireOwner)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request, SQL and threadpool metrics of this worker in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,165 @@
+"""Versioned schema migrations.
+
+`Base.metadata.create_all` only creates missing tables; it never adds an
+index or column to a table that already exists, so an existing salon.db
+would never pick up schema changes. Each migration here runs once, in its own
+transaction, and is recorded in `schema_migrations`. Steps are written to be
+safe on a fresh database too, where the baseline already created everything
+the current models declare.
+
+Run pending migrations with:
+
+    python -m app.migrations            # apply
+    python -m app.migrations status     # list applied / pending
+"""
+import logging
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import Connection, Engine, inspect, text
+from sqlalchemy.orm import Session
+from .database import Base, engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+
+def _baseline(conn: Connection) -> None:
+    from . import models  # noqa: F401  registers every table on Base.metadata
+    Base.metadata.create_all(bind=conn)
+
+
+def _booking_payment_indexes(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_bookings_stylist_status_time "
+        "ON bookings (stylist_id, status, start_time, end_time)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_payments_booking_status "
+        "ON payments (booking_id, status, amount)"
+    ))
+
+
+def _backfill_slot_claims(conn: Connection) -> None:
+    from .reservations import backfill_claims
+    with Session(bind=conn) as db:
+        backfill_claims(db)
+
+
+def _email_outbox(conn: Connection) -> None:
+    from .models import OutboxEmail
+    OutboxEmail.__table__.create(bind=conn, checkfirst=True)
+
+
+def _booking_list_indexes(conn: Connection) -> None:
+    for name, columns in (
+        ("ix_bookings_customer_time", "customer_id, start_time"),
+        ("ix_bookings_stylist_time", "stylist_id, start_time"),
+        ("ix_bookings_status_time", "status, start_time"),
+    ):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON bookings ({columns})"))
+
+
+def _booking_balances(conn: Connection) -> None:
+    from .balances import backfill
+    columns = {c["name"] for c in inspect(conn).get_columns("bookings")}
+    for name in ("amount_paid", "balance_due"):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE bookings ADD COLUMN {name} FLOAT NOT NULL DEFAULT 0"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_bookings_unpaid_time ON bookings (start_time) WHERE balance_due > 0"
+    ))
+    backfill(conn)
+
+
+def _idempotency_keys(conn: Connection) -> None:
+    from .models import IdempotencyRecord
+    IdempotencyRecord.__table__.create(bind=conn, checkfirst=True)
+
+
+def _reporting_rollups(conn: Connection) -> None:
+    from .models import DailyBookings, DailyRevenue
+    from .rollups import install_triggers, rebuild, require_sqlite
+    require_sqlite(conn)
+    DailyRevenue.__table__.create(bind=conn, checkfirst=True)
+    DailyBookings.__table__.create(bind=conn, checkfirst=True)
+    install_triggers(conn)
+    rebuild(conn)
+
+
+def _service_durations_on_grid(conn: Connection) -> None:
+    # Slot claims are 5-minute buckets; an off-grid duration made back-to-back bookings share one.
+    # Rounding up changes what the salon sells, so every change is reported to the operator.
+    off_grid = conn.execute(text(
+        "SELECT id, name, duration_minutes FROM services WHERE duration_minutes % 5 != 0 ORDER BY id"
+    )).all()
+    for service_id, name, minutes in off_grid:
+        rounded = (minutes + 4) // 5 * 5
+        conn.execute(text("UPDATE services SET duration_minutes = :m WHERE id = :id"), {"m": rounded, "id": service_id})
+        logger.warning("Service #%s %r: duration %s -> %s minutes (bookings must be on the 5-minute grid)",
+                       service_id, name, minutes, rounded)
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "baseline", _baseline),
+    (2, "booking_and_payment_composite_indexes", _booking_payment_indexes),
+    (3, "backfill_slot_claims", _backfill_slot_claims),
+    (4, "email_outbox", _email_outbox),
+    (5, "booking_list_indexes", _booking_list_indexes),
+    (6, "booking_balances", _booking_balances),
+    (7, "idempotency_keys", _idempotency_keys),
+    (8, "reporting_rollups", _reporting_rollups),
+    (9, "service_durations_on_grid", _service_durations_on_grid),
+]
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+
+def applied_versions(engine: Engine = default_engine) -> List[int]:
+    if not inspect(engine).has_table("schema_migrations"):
+        return []
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+
+def pending_versions(conn: Connection) -> List[int]:
+    """Versions not applied yet on this connection's database (all of them if it was never migrated)."""
+    if not inspect(conn).has_table("schema_migrations"):
+        return [version for version, _, _ in MIGRATIONS]
+    done = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+    return [version for version, _, _ in MIGRATIONS if version not in done]
+
+
+def run_migrations(engine: Engine = default_engine) -> List[int]:
+    """Apply every pending migration in order; returns the versions applied."""
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+    done = set(applied_versions(engine))
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()},
+            )
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["status"]:
+        done = set(applied_versions())
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:>4}  {'applied' if version in done else 'pending':8} {name}")
+    else:
+        applied = run_migrations()
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
@@ -1,6 +1,6 @@
 
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float
+from datetime import date, datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Float, UniqueConstraint, Index, LargeBinary, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func # Import func để tự động lấy giờ
 import enum
@@ -58,8 +58,21 @@ class BookingStatus(str, enum.Enum):
     CANCELLED = "cancelled"
     COMPLETED = "completed"
 
+def _initial_balance(context) -> float:
+    params = context.get_current_parameters()
+    return round(params["total_amount"] - (params.get("amount_paid") or 0), 2)
+
 class Booking(Base, TimestampMixin):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_stylist_status_time", "stylist_id", "status", "start_time", "end_time"),
+        # Keyset pagination seeks on (start_time, id); id is the rowid, which every SQLite index ends with.
+        Index("ix_bookings_customer_time", "customer_id", "start_time"),
+        Index("ix_bookings_stylist_time", "stylist_id", "start_time"),
+        Index("ix_bookings_status_time", "status", "start_time"),
+        # Only bookings with money outstanding, so the unpaid listing reads a small index in time order.
+        Index("ix_bookings_unpaid_time", "start_time", sqlite_where=text("balance_due > 0"), postgresql_where=text("balance_due > 0")),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     
     customer_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
@@ -72,6 +85,9 @@ class Booking(Base, TimestampMixin):
     
     service_price_snapshot: Mapped[float] = mapped_column(Float, nullable=False) 
     total_amount: Mapped[float] = mapped_column(Float, nullable=False) 
+    # Sum of successful payments and what is left of total_amount; maintained by app.balances.
+    amount_paid: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    balance_due: Mapped[float] = mapped_column(Float, nullable=False, default=_initial_balance, server_default="0")
     
     start_time: Mapped[datetime] = mapped_column(DateTime, index=True)
     end_time: Mapped[datetime] = mapped_column(DateTime, index=True)
@@ -82,6 +98,15 @@ class Booking(Base, TimestampMixin):
     service = relationship("Service", back_populates="bookings")
     stylist = relationship("Stylist", back_populates="bookings")
 
+class SlotClaim(Base):
+    """One row per 5-minute bucket an active booking holds; the unique key makes double booking impossible."""
+    __tablename__ = "slot_claims"
+    __table_args__ = (UniqueConstraint("stylist_id", "slot_start", name="uq_slot_claims_stylist_slot"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    stylist_id: Mapped[int] = mapped_column(ForeignKey("stylists.id"), nullable=False)
+    slot_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    booking_id: Mapped[int] = mapped_column(ForeignKey("bookings.id"), nullable=False, index=True)
+
 class PaymentStatus(str, enum.Enum):
     INITIATED = "initiated"
     SUCCESS = "success"
@@ -89,10 +114,70 @@ class PaymentStatus(str, enum.Enum):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_booking_status", "booking_id", "status", "amount"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     booking_id: Mapped[int] = mapped_column(ForeignKey("bookings.id"), unique=False)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String, default=PaymentStatus.INITIATED.value)
     provider: Mapped[str | None] = mapped_column(String, nullable=True)
     masked_details: Mapped[str | None] = mapped_column(String, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class EmailStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class OutboxEmail(Base):
+    """A queued email; request handlers insert rows and the outbox worker delivers them."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_due", "status", "next_attempt_at"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    to_email: Mapped[str] = mapped_column(String, nullable=False)
+    subject: Mapped[str] = mapped_column(String, nullable=False)
+    body: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, default=EmailStatus.PENDING.value, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # When a pending row is due, or when a claimed ("sending") row's lease runs out.
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    claim_token: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+class IdempotencyRecord(Base):
+    """The stored outcome of a POST sent with an Idempotency-Key; status_code is NULL while it runs."""
+    __tablename__ = "idempotency_keys"
+    # sha256 of the caller's credentials and the key, so keys are scoped per caller and fixed-size.
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # While running: when the claim may be taken over; once stored: when the record is purged.
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+# Reporting rollups, maintained by database triggers (see app.rollups). stylist_id 0 = no stylist.
+class DailyRevenue(Base):
+    """Successful payments per payment day, stylist and service."""
+    __tablename__ = "rollup_daily_revenue"
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    stylist_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    service_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    payments: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+class DailyBookings(Base):
+    """Bookings and their booked minutes per appointment day, stylist, service and status."""
+    __tablename__ = "rollup_daily_bookings"
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    stylist_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    service_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    bookings: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
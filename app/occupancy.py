@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, date as date_type
+from typing import Dict, Iterable, Optional, Tuple
+from .config import settings
+
+BUCKET_MINUTES = 5
+BUCKETS_PER_DAY = 24 * 60 // BUCKET_MINUTES
+
+Key = Tuple[int, date_type]
+
+
+def on_grid(moment: datetime) -> bool:
+    """True for bucket boundaries (hh:00, hh:05, ...), where bookings must start and end."""
+    return moment.second == 0 and moment.microsecond == 0 and moment.minute % BUCKET_MINUTES == 0
+
+
+def day_start(day: date_type) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+def days_touched(start: datetime, end: datetime) -> Iterable[date_type]:
+    day = start.date()
+    while day_start(day) < end:
+        yield day
+        day += timedelta(days=1)
+
+
+def span_mask(day: date_type, start: datetime, end: datetime) -> int:
+    """Bits of the 5-minute buckets of `day` that [start, end) touches."""
+    origin = day_start(day)
+    first = max(0, int((start - origin).total_seconds() // 60) // BUCKET_MINUTES)
+    end_minutes = (end - origin).total_seconds() / 60
+    last = min(BUCKETS_PER_DAY, -int(-end_minutes // BUCKET_MINUTES))
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def build_bitmap(day: date_type, intervals: Iterable[Tuple[datetime, datetime]]) -> int:
+    bitmap = 0
+    for start, end in intervals:
+        bitmap |= span_mask(day, start, end)
+    return bitmap
+
+
+class OccupancyCache:
+    """LRU of per-(stylist, day) occupancy bitmaps, one bit per 5-minute bucket.
+
+    A set bit means some active booking touches the bucket. Bookings start and
+    end on bucket boundaries (`on_grid`), so a mask is exact: clear means free,
+    set means a real overlap. Only legacy off-grid bookings occupy the whole of
+    their first and last buckets. Entries expire after `ttl_seconds`
+    to bound staleness when several processes write to the same database.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Key, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Key) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def write_token(self) -> int:
+        """Snapshot taken before loading from the database; see `put`."""
+        return self._writes
+
+    def put(self, key: Key, bitmap: int, token: int) -> None:
+        with self._lock:
+            # A booking written while the loader was querying may be missing from its bitmap.
+            if token != self._writes or self.max_entries <= 0:
+                return
+            self._entries[key] = (bitmap, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def mark(self, stylist_id: int, start: datetime, end: datetime) -> None:
+        """Write-through for a newly committed booking."""
+        with self._lock:
+            self._writes += 1
+            for day in days_touched(start, end):
+                entry = self._entries.get((stylist_id, day))
+                if entry is not None:
+                    self._entries[(stylist_id, day)] = (entry[0] | span_mask(day, start, end), entry[1])
+
+    def invalidate(self, stylist_id: int, day: Optional[date_type] = None) -> None:
+        with self._lock:
+            self._writes += 1
+            if day is not None:
+                self._entries.pop((stylist_id, day), None)
+                return
+            for key in [k for k in self._entries if k[0] == stylist_id]:
+                del self._entries[key]
+
+    def invalidate_span(self, stylist_id: int, start: datetime, end: datetime) -> None:
+        for day in days_touched(start, end):
+            self.invalidate(stylist_id, day)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bitmap_bytes": sum((bm.bit_length() + 7) // 8 for bm, _ in self._entries.values()),
+            }
+
+
+occupancy_cache = OccupancyCache(settings.OCCUPANCY_CACHE_MAX_ENTRIES, settings.OCCUPANCY_CACHE_TTL_SECONDS)
@@ -0,0 +1,188 @@
+"""Persistent email outbox.
+
+Request handlers call `queue_email`, which only adds a row to the caller's
+transaction, so a booking and its confirmation commit (or roll back)
+together and no request waits on SMTP. `OutboxWorker` runs in a background
+thread: it claims due rows in batches, delivers them over one reused SMTP
+connection, and records the outcome on each row. Failed deliveries are
+retried with exponential backoff up to OUTBOX_MAX_ATTEMPTS.
+
+Claims are leases: a claimed row carries a token and is due again once
+OUTBOX_LEASE_SECONDS pass, so rows held by a crashed process are picked up
+again, and several app processes can run workers against one database.
+"""
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from . import models
+from .config import settings
+from .database import SessionLocal
+from .email_utils import SMTPConnection, build_message, log_email, smtp_configured
+
+EmailStatus = models.EmailStatus
+
+
+_EMAIL_QUEUED = "outbox_email_queued"
+
+
+def _wake_worker(session: Session) -> None:
+    if session.info.pop(_EMAIL_QUEUED, False):
+        outbox_worker.notify()
+
+
+def queue_email(db: Session | AsyncSession, to_email: str, subject: str, body: str) -> models.OutboxEmail:
+    """Add a message to the outbox in the caller's transaction; the worker is woken once it commits."""
+    row = models.OutboxEmail(to_email=to_email, subject=subject, body=body)
+    db.add(row)
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info[_EMAIL_QUEUED] = True
+    # One listener per session, however many messages it queues.
+    if not event.contains(session, "after_commit", _wake_worker):
+        event.listen(session, "after_commit", _wake_worker)
+    return row
+
+
+def is_permanent(exc: Exception) -> bool:
+    """5xx replies about the message or recipient will not change on retry; auth and transport errors might."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def is_transport_error(exc: Exception) -> bool:
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+class OutboxWorker:
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int | None = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.connection = SMTPConnection()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.connection.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                delivered = self.deliver_batch()
+            except Exception as e:  # keep the worker alive through database hiccups
+                print(f"[EMAIL ERROR] Outbox pass failed: {e}")
+                delivered = 0
+            if delivered >= self.batch_size:
+                continue
+            self._wake.wait(settings.OUTBOX_POLL_SECONDS)
+            self._wake.clear()
+        self.connection.close()
+
+    def claim(self, db: Session) -> List[models.OutboxEmail]:
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = (
+            models.OutboxEmail.status.in_((EmailStatus.PENDING.value, EmailStatus.SENDING.value)),
+            models.OutboxEmail.next_attempt_at <= now,
+        )
+        ids = select(models.OutboxEmail.id).where(*due).order_by(models.OutboxEmail.id).limit(self.batch_size)
+        db.execute(
+            update(models.OutboxEmail)
+            .where(models.OutboxEmail.id.in_(ids), *due)
+            .values(
+                status=EmailStatus.SENDING.value,
+                claim_token=token,
+                attempts=models.OutboxEmail.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return list(db.scalars(
+            select(models.OutboxEmail).where(models.OutboxEmail.claim_token == token).order_by(models.OutboxEmail.id)
+        ))
+
+    def deliver_batch(self) -> int:
+        """Claim and deliver one batch; returns how many rows were claimed."""
+        with self.session_factory() as db:
+            rows = self.claim(db)
+            for i, row in enumerate(rows):
+                try:
+                    if smtp_configured():
+                        self.connection.send(build_message(row.to_email, row.subject, row.body))
+                    else:
+                        log_email(row.to_email, row.subject, row.body)
+                        print("[EMAIL MOCK] SMTP not configured. Using mock mode (no real email sent).")
+                except Exception as e:
+                    self._record_failure(row, e)
+                    if is_transport_error(e):
+                        # The server is unreachable; hand the rest of the batch back untouched.
+                        for rest in rows[i + 1:]:
+                            rest.status = EmailStatus.PENDING.value
+                            rest.attempts -= 1
+                            rest.claim_token = None
+                            rest.next_attempt_at = row.next_attempt_at
+                        break
+                    continue
+                row.status = EmailStatus.SENT.value
+                row.sent_at = datetime.utcnow()
+                row.claim_token = None
+                row.last_error = None
+                self.sent += 1
+            db.commit()
+            return len(rows)
+
+    def _record_failure(self, row: models.OutboxEmail, exc: Exception) -> None:
+        row.last_error = f"{type(exc).__name__}: {exc}"[:500]
+        row.claim_token = None
+        if is_permanent(exc) or row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            row.status = EmailStatus.FAILED.value
+            self.failed += 1
+        else:
+            row.status = EmailStatus.PENDING.value
+            row.next_attempt_at = datetime.utcnow() + retry_delay(row.attempts)
+            self.retried += 1
+
+    def stats(self, db: Session) -> Dict[str, int]:
+        counts = dict(db.execute(
+            select(models.OutboxEmail.status, func.count()).group_by(models.OutboxEmail.status)
+        ).all())
+        return {
+            **{status.value: counts.get(status.value, 0) for status in EmailStatus},
+            "worker_sent": self.sent,
+            "worker_retried": self.retried,
+            "worker_failed": self.failed,
+            "smtp_connects": self.connection.connects,
+        }
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,119 @@
+import bisect
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import insert, select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+from .database import insert_ignoring_conflicts
+from .occupancy import BUCKET_MINUTES
+
+ACTIVE_STATUSES = (models.BookingStatus.CONFIRMED.value, models.BookingStatus.PENDING.value)
+
+
+def claim_buckets(start: datetime, end: datetime) -> List[datetime]:
+    """Start times of every 5-minute bucket that [start, end) touches."""
+    bucket = start.replace(second=0, microsecond=0)
+    bucket -= timedelta(minutes=bucket.minute % BUCKET_MINUTES)
+    step = timedelta(minutes=BUCKET_MINUTES)
+    buckets = []
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += step
+    return buckets
+
+
+def claim_slots(db: Session, booking: models.Booking) -> None:
+    """Insert the booking's bucket claims; raises IntegrityError if any bucket is already held."""
+    db.execute(insert(models.SlotClaim), [
+        {"stylist_id": booking.stylist_id, "slot_start": bucket, "booking_id": booking.id}
+        for bucket in claim_buckets(booking.start_time, booking.end_time)
+    ])
+
+
+def release_slots(db: Session, booking_id: int) -> None:
+    db.execute(delete(models.SlotClaim).where(models.SlotClaim.booking_id == booking_id))
+
+
+def reserve_booking(db: Session, booking: models.Booking, detail: str = "Stylist is unavailable at this time") -> models.Booking:
+    """Add the booking and atomically claim its time in the current transaction.
+
+    The unique (stylist_id, slot_start) key arbitrates concurrent requests in
+    the database itself: of two racing inserts for the same bucket exactly one
+    commits, the other gets a 409. No application-level lock is taken, so
+    bookings for different stylists or times never wait on each other here.
+    A conflict rolls the whole transaction back; otherwise the caller commits.
+    """
+    db.add(booking)
+    db.flush()
+    if booking.stylist_id is None:
+        return booking
+    try:
+        claim_slots(db, booking)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=detail)
+    return booking
+
+
+def partition_free(busy: List[Tuple[datetime, datetime]], candidates: List[Tuple[datetime, datetime]]):
+    """Split candidates into (free, conflicting) against sorted, disjoint busy intervals.
+
+    Accepted candidates join the busy list as they are placed, so candidates
+    that overlap each other are caught as well.
+    """
+    starts = [s for s, _ in busy]
+    ends = [e for _, e in busy]
+    free, taken = [], []
+    for start, end in sorted(candidates):
+        i = bisect.bisect_right(ends, start)
+        if i < len(starts) and starts[i] < end:
+            taken.append((start, end))
+            continue
+        free.append((start, end))
+        j = bisect.bisect_left(starts, start)
+        starts.insert(j, start)
+        ends.insert(j, end)
+    return free, taken
+
+
+def reserve_bookings_bulk(db: Session, rows: List[Dict[str, Any]], detail: str = "Some slots were taken concurrently, please retry") -> List[int]:
+    """Insert one stylist's non-overlapping bookings and their claims with two multi-row statements.
+
+    Returns the new ids in input order. RETURNING order is not guaranteed for
+    multi-row inserts, so ids are matched back by start_time, which is unique
+    among non-overlapping bookings of one stylist.
+    """
+    returned = db.execute(insert(models.Booking).returning(models.Booking.id, models.Booking.start_time), rows).all()
+    id_by_start = {start: booking_id for booking_id, start in returned}
+    ids = [id_by_start[row["start_time"]] for row in rows]
+    try:
+        db.execute(insert(models.SlotClaim), [
+            {"stylist_id": row["stylist_id"], "slot_start": bucket, "booking_id": booking_id}
+            for booking_id, row in zip(ids, rows)
+            for bucket in claim_buckets(row["start_time"], row["end_time"])
+        ])
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=detail)
+    return ids
+
+
+def backfill_claims(db: Session) -> int:
+    """Create claims for active bookings that predate the claim table; overlapping legacy rows are skipped."""
+    claimed = select(models.SlotClaim.booking_id).distinct()
+    # Columns, not entities: this runs as migration 3, before later migrations add columns to bookings.
+    bookings = db.query(models.Booking.id, models.Booking.stylist_id, models.Booking.start_time, models.Booking.end_time).filter(
+        models.Booking.stylist_id.is_not(None),
+        models.Booking.status.in_(ACTIVE_STATUSES),
+        models.Booking.id.not_in(claimed),
+    ).all()
+    rows = [
+        {"stylist_id": b.stylist_id, "slot_start": bucket, "booking_id": b.id}
+        for b in bookings for bucket in claim_buckets(b.start_time, b.end_time)
+    ]
+    if rows:
+        db.execute(insert_ignoring_conflicts(models.SlotClaim, db.get_bind().dialect.name), rows)
+        db.commit()
+    return len(bookings)
@@ -0,0 +1,232 @@
+"""Pre-aggregated reporting tables.
+
+`rollup_daily_revenue` holds successful payments per payment day, stylist
+and service; `rollup_daily_bookings` holds booking counts and booked
+minutes per appointment day, stylist, service and status. SQLite triggers
+on `payments` and `bookings` adjust the affected rows in the same
+transaction as every insert, delete, status change or reschedule, whatever
+code path made it (ORM, bulk insert, raw SQL). A year of reports is then a
+few hundred rows per stylist instead of a scan of every payment joined to
+its booking.
+
+The triggers and the rebuild are SQLite SQL (`date()`, `julianday()`,
+trigger bodies), so migration 8 refuses to run on any other database
+instead of half-installing them; porting the rollups means PL/pgSQL or
+MySQL trigger bodies, or maintaining them in the application. The report
+queries themselves are dialect-neutral.
+
+The triggers are installed by migration 8. To recompute both tables from
+scratch (after restoring data, or to check the triggers):
+
+    python -m app.rollups rebuild
+    python -m app.rollups check      # compare the tables with a fresh aggregate
+"""
+import sys
+from datetime import date, timedelta
+from enum import Enum
+from typing import Dict, List, Optional
+from sqlalchemy import Connection, func, select, text
+from sqlalchemy.orm import Session
+from . import models
+
+# Statuses whose minutes count as booked time for utilization.
+BOOKED_STATUSES = [models.BookingStatus.PENDING.value, models.BookingStatus.CONFIRMED.value, models.BookingStatus.COMPLETED.value]
+SUCCESS = models.PaymentStatus.SUCCESS.value
+
+
+def _bookings_delta(row: str, sign: str) -> str:
+    return f"""
+        INSERT INTO rollup_daily_bookings (day, stylist_id, service_id, status, bookings, minutes)
+        VALUES (date({row}.start_time), COALESCE({row}.stylist_id, 0), {row}.service_id, {row}.status, {sign}1,
+                {sign}CAST(ROUND((julianday({row}.end_time) - julianday({row}.start_time)) * 1440) AS INTEGER))
+        ON CONFLICT (day, stylist_id, service_id, status) DO UPDATE SET
+            bookings = bookings + excluded.bookings, minutes = minutes + excluded.minutes;"""
+
+
+def _payment_delta(row: str, sign: str) -> str:
+    return f"""
+        INSERT INTO rollup_daily_revenue (day, stylist_id, service_id, amount, payments)
+        SELECT date({row}.created_at), COALESCE(b.stylist_id, 0), b.service_id, {sign}{row}.amount, {sign}1
+        FROM bookings b WHERE b.id = {row}.booking_id AND {row}.status = '{SUCCESS}'
+        ON CONFLICT (day, stylist_id, service_id) DO UPDATE SET
+            amount = ROUND(amount + excluded.amount, 2), payments = payments + excluded.payments;"""
+
+
+def _revenue_move(row: str, sign: str) -> str:
+    """Re-attribute a booking's payments when its stylist or service changes."""
+    return f"""
+        INSERT INTO rollup_daily_revenue (day, stylist_id, service_id, amount, payments)
+        SELECT date(p.created_at), COALESCE({row}.stylist_id, 0), {row}.service_id, {sign}SUM(p.amount), {sign}COUNT(*)
+        FROM payments p WHERE p.booking_id = {row}.id AND p.status = '{SUCCESS}'
+        GROUP BY date(p.created_at)
+        ON CONFLICT (day, stylist_id, service_id) DO UPDATE SET
+            amount = ROUND(amount + excluded.amount, 2), payments = payments + excluded.payments;"""
+
+
+TRIGGERS: Dict[str, str] = {
+    "trg_rollup_booking_insert": f"AFTER INSERT ON bookings BEGIN {_bookings_delta('NEW', '+')} END",
+    "trg_rollup_booking_delete": f"AFTER DELETE ON bookings BEGIN {_bookings_delta('OLD', '-')} END",
+    "trg_rollup_booking_update": (
+        "AFTER UPDATE OF status, start_time, end_time, stylist_id, service_id ON bookings "
+        f"BEGIN {_bookings_delta('OLD', '-')} {_bookings_delta('NEW', '+')} END"
+    ),
+    "trg_rollup_booking_move": (
+        "AFTER UPDATE OF stylist_id, service_id ON bookings "
+        "WHEN OLD.stylist_id IS NOT NEW.stylist_id OR OLD.service_id IS NOT NEW.service_id "
+        f"BEGIN {_revenue_move('OLD', '-')} {_revenue_move('NEW', '+')} END"
+    ),
+    "trg_rollup_payment_insert": f"AFTER INSERT ON payments BEGIN {_payment_delta('NEW', '+')} END",
+    "trg_rollup_payment_delete": f"AFTER DELETE ON payments BEGIN {_payment_delta('OLD', '-')} END",
+    "trg_rollup_payment_update": (
+        "AFTER UPDATE OF amount, status, booking_id, created_at ON payments "
+        f"BEGIN {_payment_delta('OLD', '-')} {_payment_delta('NEW', '+')} END"
+    ),
+}
+
+REBUILD = [
+    "DELETE FROM rollup_daily_revenue",
+    "DELETE FROM rollup_daily_bookings",
+    f"""INSERT INTO rollup_daily_revenue (day, stylist_id, service_id, amount, payments)
+        SELECT date(p.created_at), COALESCE(b.stylist_id, 0), b.service_id, ROUND(SUM(p.amount), 2), COUNT(*)
+        FROM payments p JOIN bookings b ON b.id = p.booking_id WHERE p.status = '{SUCCESS}'
+        GROUP BY 1, 2, 3""",
+    """INSERT INTO rollup_daily_bookings (day, stylist_id, service_id, status, bookings, minutes)
+        SELECT date(start_time), COALESCE(stylist_id, 0), service_id, status, COUNT(*),
+               SUM(CAST(ROUND((julianday(end_time) - julianday(start_time)) * 1440) AS INTEGER))
+        FROM bookings GROUP BY 1, 2, 3, 4""",
+]
+
+
+def require_sqlite(conn: Connection) -> None:
+    if conn.dialect.name != "sqlite":
+        raise RuntimeError(
+            f"Reporting rollups are maintained by SQLite triggers and are not available on {conn.dialect.name}; "
+            "see app/rollups.py"
+        )
+
+
+def install_triggers(conn: Connection) -> None:
+    require_sqlite(conn)
+    for name, body in TRIGGERS.items():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+
+def rebuild(conn: Connection) -> None:
+    """Recompute both rollup tables from payments and bookings."""
+    require_sqlite(conn)
+    for statement in REBUILD:
+        conn.execute(text(statement))
+
+
+def snapshot(conn: Connection) -> Dict[str, set]:
+    """Every non-empty rollup row, for comparing the maintained tables with a rebuild."""
+    return {
+        "revenue": {tuple(r) for r in conn.execute(text(
+            "SELECT day, stylist_id, service_id, amount, payments FROM rollup_daily_revenue WHERE payments != 0"))},
+        "bookings": {tuple(r) for r in conn.execute(text(
+            "SELECT day, stylist_id, service_id, status, bookings, minutes FROM rollup_daily_bookings WHERE bookings != 0"))},
+    }
+
+
+class Period(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+    ALL = "all"
+
+
+class Dimension(str, Enum):
+    STYLIST = "stylist"
+    SERVICE = "service"
+
+
+def _month(day, dialect: str):
+    """`YYYY-MM` of a DATE column."""
+    if dialect == "postgresql":
+        return func.to_char(day, "YYYY-MM")
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(day, "%Y-%m")
+    return func.strftime("%Y-%m", day)
+
+
+def _grouped(db: Session, table, period: Period, by: Optional[Dimension]):
+    keys = []
+    if period == Period.DAY:
+        keys.append(table.day.label("period"))
+    elif period == Period.MONTH:
+        keys.append(_month(table.day, db.get_bind().dialect.name).label("period"))
+    if by == Dimension.STYLIST:
+        keys.append(table.stylist_id.label("stylist_id"))
+    elif by == Dimension.SERVICE:
+        keys.append(table.service_id.label("service_id"))
+    return keys
+
+
+def revenue_report(db: Session, date_from: date, date_to: date, period: Period, by: Optional[Dimension]) -> List[dict]:
+    table = models.DailyRevenue
+    keys = _grouped(db, table, period, by)
+    stmt = (
+        select(*keys, func.round(func.sum(table.amount), 2).label("amount"), func.sum(table.payments).label("payments"))
+        .where(table.day.between(date_from, date_to))
+        .group_by(*keys).order_by(*keys)
+        .having(func.sum(table.payments) != 0)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+def bookings_report(db: Session, date_from: date, date_to: date, period: Period, by: Optional[Dimension]) -> List[dict]:
+    table = models.DailyBookings
+    keys = _grouped(db, table, period, by) + [table.status]
+    stmt = (
+        select(*keys, func.sum(table.bookings).label("bookings"), func.sum(table.minutes).label("minutes"))
+        .where(table.day.between(date_from, date_to))
+        .group_by(*keys).order_by(*keys)
+        .having(func.sum(table.bookings) != 0)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+def utilization_report(db: Session, date_from: date, date_to: date) -> List[dict]:
+    """Booked minutes against working minutes (daily hours x days in range) for each stylist."""
+    table = models.DailyBookings
+    booked = dict(db.execute(
+        select(table.stylist_id, func.sum(table.minutes))
+        .where(table.day.between(date_from, date_to), table.status.in_(BOOKED_STATUSES))
+        .group_by(table.stylist_id)
+    ).all())
+    days = (date_to - date_from).days + 1
+    report = []
+    for stylist in db.execute(select(models.Stylist.id, models.Stylist.display_name, models.Stylist.start_hour, models.Stylist.end_hour).order_by(models.Stylist.id)):
+        capacity = max(stylist.end_hour - stylist.start_hour, 0) * 60 * days
+        minutes = booked.get(stylist.id) or 0
+        report.append({
+            "stylist_id": stylist.id, "display_name": stylist.display_name, "booked_minutes": minutes,
+            "capacity_minutes": capacity, "utilization": round(minutes / capacity, 4) if capacity else None,
+        })
+    return report
+
+
+def default_range(date_from: Optional[date], date_to: Optional[date]):
+    """Missing bounds default to the year up to today."""
+    date_to = date_to or date.today()
+    return date_from or date_to - timedelta(days=364), date_to
+
+
+if __name__ == "__main__":
+    from .database import engine
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "rebuild":
+        with engine.begin() as conn:
+            rebuild(conn)
+        print("Rollups rebuilt.")
+    elif command == "check":
+        with engine.connect() as conn:
+            with conn.begin() as trans:
+                maintained = snapshot(conn)
+                rebuild(conn)
+                fresh = snapshot(conn)
+                trans.rollback()
+        stale = {name: len(maintained[name] ^ fresh[name]) for name in fresh}
+        print("Rollups match." if not any(stale.values()) else f"Rollup rows differing from a rebuild: {stale}")
+    else:
+        sys.exit("usage: python -m app.rollups [check|rebuild]")
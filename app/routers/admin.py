@@ -1,20 +1,168 @@
-from fastapi import APIRouter, Depends, HTTPException
+import tempfile
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import schemas, models
+from .. import balances, schemas, models
+from ..rollups import Dimension, Period, bookings_report, default_range, revenue_report, utilization_report
 from ..deps import RequireOwner
+from ..occupancy import occupancy_cache
+from ..catalog import catalog_cache
+from ..principals import principal_cache, token_cache
+from ..hashing import password_pool
+from ..outbox import outbox_worker
+from ..idempotency import idempotency_store
+from ..exports import ExportFormat, MEDIA_TYPES, bookings_query, payments_query, stream_rows
+from ..imports import ImportKind, run_import, text_lines
+from ..pagination import BookingFilters, BookingPage, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, id_page
+from ..serialization import records, rows_response
 
 router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(RequireOwner)])
 
 
 @router.get("/users")
-def list_users(db: Session = Depends(get_db)):
-    users = db.query(models.User).all()
+def list_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    role: Optional[models.Role] = None,
+    db: Session = Depends(get_db),
+):
+    q = select(models.User.id, models.User.email, models.User.role, models.User.is_active)
+    if role:
+        q = q.where(models.User.role == role.value)
+    users = db.execute(id_page(q, models.User.id, limit, cursor)).all()
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = str(users[-1].id)
     return [{"id": u.id, "email": u.email, "role": u.role, "is_active": u.is_active} for u in users]
 
 @router.get("/bookings")
-def list_all_bookings(db: Session = Depends(get_db)):
-    """Owner can view all bookings."""
-    return db.query(models.Booking).order_by(models.Booking.start_time.desc()).all()
+def list_all_bookings(request: Request, response: Response, page: BookingPage = Depends(), db: Session = Depends(get_db)):
+    """Owner can view all bookings, newest first, a page at a time, with every booking column."""
+    rows = page.finish(db.execute(page.apply(select(*models.Booking.__table__.columns))).all(), response)
+    return rows_response(request, records(rows), response.headers)
 
+@router.get("/bookings/unpaid")
+def list_unpaid_bookings(request: Request, response: Response, page: BookingPage = Depends(), db: Session = Depends(get_db)):
+    """Bookings with a balance still due (cancelled ones excluded), newest first, a page at a time."""
+    q = select(*models.Booking.__table__.columns).where(
+        balances.UNPAID, models.Booking.status != models.BookingStatus.CANCELLED.value
+    )
+    rows = page.finish(db.execute(page.apply(q)).all(), response)
+    return rows_response(request, records(rows), response.headers)
 
+@router.get("/balances/check")
+def check_balances(limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    """Bookings whose amount_paid / balance_due disagree with their payments (should be empty)."""
+    rows = balances.drift(db, limit)
+    return {"mismatches": [row._asdict() for row in rows]}
+
+class ReportRange:
+    """Date range for reports; defaults to the year up to today."""
+
+    def __init__(
+        self,
+        date_from: Optional[date] = Query(None, description="First day, inclusive"),
+        date_to: Optional[date] = Query(None, description="Last day, inclusive"),
+    ):
+        self.date_from, self.date_to = default_range(date_from, date_to)
+        if self.date_to < self.date_from:
+            raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+        if (self.date_to - self.date_from).days > 3660:
+            raise HTTPException(status_code=400, detail="Reports cover at most 10 years")
+
+@router.get("/reports/revenue")
+def revenue(period: Period = Period.MONTH, by: Optional[Dimension] = None, span: ReportRange = Depends(), db: Session = Depends(get_db)):
+    """Successful payments by payment day or month, optionally per stylist or service."""
+    return revenue_report(db, span.date_from, span.date_to, period, by)
+
+@router.get("/reports/bookings")
+def booking_counts(period: Period = Period.MONTH, by: Optional[Dimension] = None, span: ReportRange = Depends(), db: Session = Depends(get_db)):
+    """Booking counts and booked minutes per status, by appointment day or month."""
+    return bookings_report(db, span.date_from, span.date_to, period, by)
+
+@router.get("/reports/utilization")
+def utilization(span: ReportRange = Depends(), db: Session = Depends(get_db)):
+    """Booked minutes against working hours for each stylist over the range."""
+    return utilization_report(db, span.date_from, span.date_to)
+
+@router.get("/export/bookings")
+def export_bookings(fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format"), filters: BookingFilters = Depends()):
+    """Every matching booking, streamed as NDJSON or CSV in constant memory."""
+    return export_response(filters.filter(bookings_query()), fmt, "bookings")
+
+@router.get("/export/payments")
+def export_payments(
+    fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    date_from: Optional[date] = Query(None, description="First day, inclusive"),
+    date_to: Optional[date] = Query(None, description="Last day, inclusive"),
+    status: Optional[models.PaymentStatus] = None,
+):
+    stmt = payments_query()
+    if date_from:
+        stmt = stmt.where(models.Payment.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        stmt = stmt.where(models.Payment.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if status:
+        stmt = stmt.where(models.Payment.status == status.value)
+    return export_response(stmt, fmt, "payments")
+
+def export_response(stmt, fmt: ExportFormat, name: str) -> StreamingResponse:
+    filename = f"{name}-{datetime.now():%Y%m%d-%H%M%S}.{fmt.value}"
+    return StreamingResponse(
+        stream_rows(stmt, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Uploads larger than this are spooled to a temporary file instead of held in memory.
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+@router.post("/import/{kind}")
+async def import_rows(kind: ImportKind, request: Request, fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format")):
+    """Bulk-load users, bookings or payments from a CSV or NDJSON request body.
+
+    Valid rows are committed in chunks; the response counts them and lists
+    the failed rows by line number (the first 1000).
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        report = await run_in_threadpool(run_import, text_lines(upload), kind, fmt)
+    return report.as_dict()
+
+@router.get("/cache/occupancy")
+def occupancy_cache_stats():
+    """Hit/miss counters and size of the availability occupancy cache."""
+    return occupancy_cache.stats()
+
+@router.get("/cache/catalog")
+def catalog_cache_stats():
+    """Version and hit/miss/304 counters of the services and stylists catalog cache."""
+    return catalog_cache.stats()
+
+@router.get("/cache/auth")
+def auth_cache_stats():
+    """Hit/miss counters of the principal and verified-token caches."""
+    return {"principals": principal_cache.stats(), "tokens": token_cache.stats()}
+
+@router.get("/password-pool")
+def password_pool_stats():
+    """In-flight, completed and rejected jobs of the password hashing pool."""
+    return password_pool.stats()
+
+@router.get("/idempotency")
+def idempotency_stats():
+    """Executions, replays and in-flight keys of the Idempotency-Key layer in this process."""
+    return idempotency_store.stats()
+
+@router.get("/outbox")
+def outbox_stats(db: Session = Depends(get_db)):
+    """Outbox rows per delivery state plus this process's worker counters."""
+    return outbox_worker.stats(db)
@@ -1,43 +1,39 @@
 # app/routers/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status, Body, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Body
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
+import hmac
 import os
 
-from ..database import get_db
+from ..database import get_db, get_async_db
 from .. import schemas, models
-from ..auth import get_password_hash, verify_password, create_access_token, decode_token
-from ..email_utils import send_email
+from ..auth import create_access_token, decode_token
+from ..hashing import password_pool
+from ..outbox import queue_email
 from ..config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=schemas.UserOut)
-def register(
+async def register(
     user_in: schemas.UserCreate, 
-    background_tasks: BackgroundTasks, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    existing = db.query(models.User).filter(models.User.email == user_in.email).first()
+    existing = await db.scalar(select(models.User.id).where(models.User.email == user_in.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user = models.User(
         email=user_in.email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await password_pool.hash(user_in.password),
         role=models.Role.CUSTOMER.value,
     )
     db.add(user)
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Email already registered")
-    db.refresh(user)
-
     subject = "Welcome to Salon Luxury! 🎉"
     body = (
         f"Hi {user.full_name or 'Friend'},\n\n"
@@ -45,27 +41,42 @@ def register(
         f"You can now log in to book appointments and track your history.\n\n"
         f"Best regards,\nSalon Luxury Team"
     )
-    background_tasks.add_task(send_email, user.email, subject, body)
+    queue_email(db, user.email, subject, body)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await db.refresh(user)
 
     return user
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    
-    if not user and form_data.username == settings.ADMIN_EMAIL:
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).where(models.User.email == form_data.username))
+
+    if not user:
+        # Recreate a missing owner row, but only hash once the password is known to match.
+        if form_data.username != settings.ADMIN_EMAIL or not hmac.compare_digest(
+            form_data.password.encode(), settings.ADMIN_PASSWORD.encode()
+        ):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         user = models.User(
             email=form_data.username,
             full_name="Store Owner",
-            hashed_password=get_password_hash(settings.ADMIN_PASSWORD),
+            hashed_password=await password_pool.hash(settings.ADMIN_PASSWORD),
             role=models.Role.OWNER.value,
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
-        
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        await db.commit()
+        await db.refresh(user)
+    else:
+        valid, new_hash = await password_pool.verify(form_data.password, user.hashed_password)
+        if not valid:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
     
     token = create_access_token({"sub": str(user.id), "role": user.role})
     return {"access_token": token, "token_type": "bearer"}
@@ -83,17 +94,18 @@ def forgot_password(payload: schemas.EmailIn, db: Session = Depends(get_db)):
     )
     link = f"http://localhost:8000/frontend/reset-password.html?token={reset_token}"
     
-    send_email(user.email, "Password Reset Request", f"Click here to reset your password: {link}")
+    queue_email(db, user.email, "Password Reset Request", f"Click here to reset your password: {link}")
+    db.commit()
     
     return {"msg": "Email sent"}
 @router.post("/reset-password")
-def reset_password(token: str = Body(...), new_password: str = Body(...), db: Session = Depends(get_db)):
+async def reset_password(token: str = Body(...), new_password: str = Body(...), db: AsyncSession = Depends(get_async_db)):
     payload = decode_token(token)
     if not payload or payload.get("type") != "reset":
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = db.query(models.User).filter(models.User.id == payload.get("sub")).first()
+    user = await db.get(models.User, int(payload.get("sub")))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    user.hashed_password = await password_pool.hash(new_password)
+    await db.commit()
     return {"msg": "Success"}
\ No newline at end of file
@@ -1,25 +1,36 @@
 
 from datetime import datetime, timedelta, time, date as date_type
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_async_db
 from .. import schemas, models
+from .. import availability as availability_engine
+from .. import balances
+from ..occupancy import occupancy_cache
+from ..reservations import reserve_booking, reserve_bookings_bulk, release_slots, partition_free
 from ..deps import get_current_user, RequireOwner, RequireStylist
-from ..email_utils import send_email
+from ..outbox import queue_email
+from ..pagination import BookingPage
 from ..payment import luhn_checksum, mask_card, validate_expiry
+from ..serialization import columns_for, records, rows_response
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
 DEPOSIT_PERCENTAGE = 0.30
+MAX_BATCH_OCCURRENCES = 104
 
-def get_service(db: Session, service_id: int) -> models.Service:
-    svc = db.get(models.Service, service_id)
+async def get_service(db: AsyncSession, service_id: int) -> models.Service:
+    svc = await db.get(models.Service, service_id)
     if not svc or not svc.is_active:
         raise HTTPException(status_code=404, detail="Service not found")
     return svc
 
 def is_overlapping(db: Session, stylist_id: int, start: datetime, end: datetime, exclude_booking_id: Optional[int] = None) -> bool:
+    if not exclude_booking_id and availability_engine.is_slot_free_cached(stylist_id, start, end):
+        return False
     q = db.query(models.Booking).filter(
         models.Booking.stylist_id == stylist_id,
         models.Booking.status.in_([models.BookingStatus.CONFIRMED.value, models.BookingStatus.PENDING.value]),
@@ -30,36 +41,91 @@ def is_overlapping(db: Session, stylist_id: int, start: datetime, end: datetime,
         q = q.filter(models.Booking.id != exclude_booking_id)
     return db.query(q.exists()).scalar()
 
+def resolve_date_range(date: Optional[date_type], start_date: Optional[date_type], end_date: Optional[date_type]):
+    start_date = start_date or date
+    if not start_date:
+        raise HTTPException(status_code=422, detail="Either date or start_date is required")
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= availability_engine.MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {availability_engine.MAX_RANGE_DAYS} days")
+    return start_date, end_date
+
+async def active_stylists(db: AsyncSession) -> List[models.Stylist]:
+    return (await db.scalars(select(models.Stylist).where(models.Stylist.is_active == True))).all()
+
 @router.get("/availability", response_model=List[schemas.TimeSlot])
-def availability(service_id: int, date: date_type, stylist_id: int = Query(...), db: Session = Depends(get_db)):
-    svc = get_service(db, service_id)
-    stylist = db.get(models.Stylist, stylist_id)
+async def availability(
+    request: Request,
+    service_id: int,
+    date: Optional[date_type] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    stylist_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Free slots for one stylist, or for the whole active roster when stylist_id is omitted."""
+    start_date, end_date = resolve_date_range(date, start_date, end_date)
+    svc = await get_service(db, service_id)
+
+    if stylist_id is None:
+        stylists = await active_stylists(db)
+        slots = await db.run_sync(availability_engine.roster_availability, stylists, svc.duration_minutes, start_date, end_date)
+        return rows_response(request, [
+            {"start_time": start, "end_time": end, "stylist_id": None, "stylist_ids": ids} for start, end, ids in slots
+        ])
+
+    stylist = await db.get(models.Stylist, stylist_id)
     if not stylist:
         raise HTTPException(status_code=404, detail="Stylist not found")
 
-    day_start = datetime(date.year, date.month, date.day, stylist.start_hour, 0)
-    day_end = datetime(date.year, date.month, date.day, stylist.end_hour, 0)
-    
-    slots: List[schemas.TimeSlot] = []
-    current = day_start
-    while current + timedelta(minutes=svc.duration_minutes) <= day_end:
-        end = current + timedelta(minutes=svc.duration_minutes)
-        if not is_overlapping(db, stylist_id, current, end):
-            slots.append(schemas.TimeSlot(start_time=current, end_time=end, stylist_id=stylist_id))
-        current += timedelta(minutes=60)
-    return slots
+    slots = await db.run_sync(availability_engine.stylist_availability, stylist, svc.duration_minutes, start_date, end_date)
+    return rows_response(request, [
+        {"start_time": start, "end_time": end, "stylist_id": stylist_id, "stylist_ids": [stylist_id]} for start, end in slots
+    ])
+
+@router.get("/calendar", response_model=List[schemas.CalendarDay])
+async def calendar(
+    service_id: int,
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    stylist_id: Optional[int] = None,
+    per_stylist: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Free-slot count for every day of a month (YYYY-MM), summed over the stylists considered.
+
+    per_stylist adds the breakdown by stylist id. Cost is one bitmap load for
+    the whole month, which is free once the occupancy cache is warm.
+    """
+    svc = await get_service(db, service_id)
+    if stylist_id is None:
+        stylists = await active_stylists(db)
+    else:
+        stylist = await db.get(models.Stylist, stylist_id)
+        if not stylist:
+            raise HTTPException(status_code=404, detail="Stylist not found")
+        stylists = [stylist]
+
+    year, month_number = (int(part) for part in month.split("-"))
+    days = availability_engine.month_days(year, month_number)
+    counts = await db.run_sync(availability_engine.calendar_capacity, stylists, svc.duration_minutes, days)
+    return [
+        schemas.CalendarDay(date=day, free_slots=sum(by_stylist.values()), stylists=by_stylist if per_stylist else None)
+        for day, by_stylist in counts.items()
+    ]
 
 @router.post("/", response_model=schemas.BookingOut)
-def create_booking(payload: schemas.BookingCreate, user=Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_booking(payload: schemas.BookingCreate, user=Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     try:
-        svc = get_service(db, payload.service_id)
+        svc = await get_service(db, payload.service_id)
         start = payload.start_time
         end = start + timedelta(minutes=svc.duration_minutes)
 
         if not payload.stylist_id:
             raise HTTPException(status_code=400, detail="Stylist selection is required")
 
-        if is_overlapping(db, payload.stylist_id, start, end):
+        if await db.run_sync(is_overlapping, payload.stylist_id, start, end):
             raise HTTPException(status_code=409, detail="Stylist is unavailable at this time")
             
         current_price = svc.price
@@ -75,29 +141,115 @@ def create_booking(payload: schemas.BookingCreate, user=Depends(get_current_user
             service_price_snapshot=current_price, 
             total_amount=current_price,         
         )
-        db.add(booking)
-        db.commit()
-        db.refresh(booking)
+        await db.run_sync(reserve_booking, booking)
+        await db.commit()
+        await db.refresh(booking)
+        occupancy_cache.mark(booking.stylist_id, start, end)
         return booking
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        raise e
+
+def expand_occurrences(payload: schemas.BookingBatchCreate) -> List[datetime]:
+    if payload.start_times:
+        starts = sorted(set(payload.start_times))
+    else:
+        rule = payload.recurrence
+        if not payload.start_time or not rule or (rule.count is None and rule.until is None):
+            raise HTTPException(status_code=422, detail="Provide start_times, or start_time with a recurrence count or until date")
+        step = timedelta(weeks=rule.interval_weeks)
+        starts, current = [], payload.start_time
+        while (rule.count is None or len(starts) < rule.count) and (rule.until is None or current.date() <= rule.until):
+            starts.append(current)
+            current += step
+            if len(starts) > MAX_BATCH_OCCURRENCES:
+                break
+    if not starts:
+        raise HTTPException(status_code=422, detail="The recurrence produces no occurrences")
+    if len(starts) > MAX_BATCH_OCCURRENCES:
+        raise HTTPException(status_code=400, detail=f"A batch is limited to {MAX_BATCH_OCCURRENCES} occurrences")
+    return starts
+
+def book_batch(db: Session, payload: schemas.BookingBatchCreate, svc: models.Service, stylist: models.Stylist, customer_id: Optional[int]) -> schemas.BookingBatchOut:
+    length = timedelta(minutes=svc.duration_minutes)
+    candidates = [(start, start + length) for start in expand_occurrences(payload)]
+    outside = set()
+    for start, end in candidates:
+        day_start, day_end = availability_engine.working_window(stylist, start.date())
+        if start < day_start or end > day_end:
+            outside.add((start, end))
+    busy = availability_engine.load_busy_intervals(db, stylist.id, candidates[0][0], candidates[-1][1])
+    free, taken = partition_free(busy, [c for c in candidates if c not in outside])
+
+    if (taken or outside) and not payload.skip_conflicts:
+        raise HTTPException(status_code=409, detail={
+            "msg": "Some occurrences are unavailable",
+            "conflicts": [start.isoformat() for start, _ in sorted(taken + list(outside))],
+        })
+
+    rows = [{
+        "customer_id": customer_id,
+        "customer_name": payload.customer_name,
+        "customer_email": payload.customer_email,
+        "customer_phone": payload.customer_phone,
+        "service_id": svc.id,
+        "stylist_id": stylist.id,
+        "start_time": start,
+        "end_time": end,
+        "status": models.BookingStatus.PENDING.value,
+        "is_walkin": False,
+        "service_price_snapshot": svc.price,
+        "total_amount": svc.price,
+    } for start, end in free]
+    ids = reserve_bookings_bulk(db, rows) if rows else []
+    db.commit()
+    for start, end in free:
+        occupancy_cache.mark(stylist.id, start, end)
+
+    booked = dict(zip(free, ids))
+    occurrences = []
+    for start, end in candidates:
+        if (start, end) in booked:
+            occurrences.append(schemas.BatchOccurrence(start_time=start, end_time=end, status="booked", booking_id=booked[(start, end)]))
+        else:
+            detail = "Stylist is not working at this time" if (start, end) in outside else "Stylist is unavailable at this time"
+            occurrences.append(schemas.BatchOccurrence(start_time=start, end_time=end, status="conflict", detail=detail))
+    return schemas.BookingBatchOut(booked=len(ids), conflicts=len(candidates) - len(ids), occurrences=occurrences)
+
+@router.post("/batch", response_model=schemas.BookingBatchOut)
+async def create_booking_batch(payload: schemas.BookingBatchCreate, user=Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """Book a recurrence rule or an explicit list of start times in one transaction.
+
+    All occurrences are checked against existing bookings with one range
+    query and inserted with one multi-row statement; conflicting occurrences
+    are reported individually (or fail the whole batch if skip_conflicts is false).
+    """
+    try:
+        svc = await get_service(db, payload.service_id)
+        stylist = await db.get(models.Stylist, payload.stylist_id)
+        if not stylist:
+            raise HTTPException(status_code=404, detail="Stylist not found")
+        customer_id = None if user.role == models.Role.OWNER.value else user.id
+        return await db.run_sync(book_batch, payload, svc, stylist, customer_id)
+    except Exception as e:
+        await db.rollback()
         raise e
 
 @router.post("/guest", response_model=schemas.BookingOut)
-def create_guest_booking(payload: schemas.WalkinBookingCreate, db: Session = Depends(get_db)):
+async def create_guest_booking(payload: schemas.WalkinBookingCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        svc = get_service(db, payload.service_id)
+        svc = await get_service(db, payload.service_id)
         start = payload.start_time
         end = start + timedelta(minutes=svc.duration_minutes)
 
-        stylist = db.get(models.Stylist, payload.stylist_id)
+        stylist = await db.get(models.Stylist, payload.stylist_id)
         if not stylist:
              raise HTTPException(status_code=404, detail="Stylist not found")
         
         if not (stylist.start_hour <= start.hour < stylist.end_hour):
              raise HTTPException(status_code=400, detail="Stylist is not working at this time")
 
-        if is_overlapping(db, payload.stylist_id, start, end):
+        if await db.run_sync(is_overlapping, payload.stylist_id, start, end):
             raise HTTPException(status_code=409, detail="Stylist is unavailable at this time")
             
         current_price = svc.price
@@ -117,30 +269,31 @@ def create_guest_booking(payload: schemas.WalkinBookingCreate, db: Session = Dep
             service_price_snapshot=current_price, 
             total_amount=current_price,          
         )
-        db.add(booking)
-        db.commit()
-        db.refresh(booking)
-        
+        await db.run_sync(reserve_booking, booking)
         if payload.customer_email:
-            send_email(
+            queue_email(
+                db,
                 payload.customer_email, 
                 "Booking Reserved - Payment Required", 
                 f"Hello {payload.customer_name},\n\nYour booking #{booking.id} is reserved. Please pay deposit to confirm."
             )
+        await db.commit()
+        await db.refresh(booking)
+        occupancy_cache.mark(booking.stylist_id, start, end)
 
         return booking
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 @router.post("/walkin", response_model=schemas.BookingOut, dependencies=[Depends(RequireOwner)])
-def create_walkin(payload: schemas.WalkinBookingCreate, db: Session = Depends(get_db)):
+async def create_walkin(payload: schemas.WalkinBookingCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        svc = get_service(db, payload.service_id)
+        svc = await get_service(db, payload.service_id)
         start = payload.start_time
         end = start + timedelta(minutes=svc.duration_minutes)
         
-        if is_overlapping(db, payload.stylist_id, start, end):
+        if await db.run_sync(is_overlapping, payload.stylist_id, start, end):
             raise HTTPException(status_code=409, detail="Stylist is unavailable")
             
         current_price = svc.price
@@ -159,9 +312,11 @@ def create_walkin(payload: schemas.WalkinBookingCreate, db: Session = Depends(ge
             
             service_price_snapshot=current_price, 
             total_amount=current_price,          
+            # Paid in cash at the desk, recorded by the payment below.
+            amount_paid=current_price,
+            balance_due=0,
         )
-        db.add(booking)
-        db.flush()
+        await db.run_sync(reserve_booking, booking, "Stylist is unavailable")
 
         payment = models.Payment(
             booking_id=booking.id,
@@ -172,16 +327,17 @@ def create_walkin(payload: schemas.WalkinBookingCreate, db: Session = Depends(ge
         )
         db.add(payment)
 
-        db.commit()
-        db.refresh(booking)
+        await db.commit()
+        await db.refresh(booking)
+        occupancy_cache.mark(booking.stylist_id, start, end)
         return booking
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 @router.put("/{booking_id}/cancel", response_model=schemas.BookingOut)
-def cancel_booking(booking_id: int, user=Depends(get_current_user), db: Session = Depends(get_db)):
-    booking = db.query(models.Booking).get(booking_id)
+async def cancel_booking(booking_id: int, user=Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    booking = await db.get(models.Booking, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -189,45 +345,50 @@ def cancel_booking(booking_id: int, user=Depends(get_current_user), db: Session
         raise HTTPException(status_code=403, detail="Not authorized")
         
     booking.status = models.BookingStatus.CANCELLED.value
-    db.commit()
-    db.refresh(booking)
+    await db.run_sync(release_slots, booking.id)
+    await db.commit()
+    await db.refresh(booking)
+    occupancy_cache.invalidate_span(booking.stylist_id, booking.start_time, booking.end_time)
     return booking
 
 @router.delete("/{booking_id}", dependencies=[Depends(RequireOwner)])
-def delete_booking(booking_id: int, db: Session = Depends(get_db)):
+async def delete_booking(booking_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        booking = db.query(models.Booking).get(booking_id)
+        booking = await db.get(models.Booking, booking_id)
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
         
-        db.query(models.Payment).filter(models.Payment.booking_id == booking.id).delete()
-        db.delete(booking)
-        db.commit()
+        stylist_id, start, end = booking.stylist_id, booking.start_time, booking.end_time
+        await db.execute(delete(models.Payment).where(models.Payment.booking_id == booking.id))
+        await db.run_sync(release_slots, booking.id)
+        await db.delete(booking)
+        await db.commit()
+        occupancy_cache.invalidate_span(stylist_id, start, end)
         return {"ok": True}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 @router.get("/me", response_model=List[schemas.BookingOut])
-def my_bookings(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    q = db.query(models.Booking).filter(models.Booking.customer_id == user.id)
-    return q.order_by(models.Booking.start_time.desc()).all()
+async def my_bookings(request: Request, response: Response, page: BookingPage = Depends(), user=Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    q = page.apply(select(*columns_for(schemas.BookingOut, models.Booking)).where(models.Booking.customer_id == user.id))
+    rows = page.finish((await db.execute(q)).all(), response)
+    return rows_response(request, records(rows), response.headers)
 
 @router.get("/stylist-schedule", response_model=List[schemas.BookingOut], dependencies=[Depends(RequireStylist)])
-def stylist_schedule(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    stylist = db.query(models.Stylist).filter(models.Stylist.user_id == user.id).first()
+async def stylist_schedule(response: Response, page: BookingPage = Depends(), user=Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    stylist = await db.scalar(select(models.Stylist).where(models.Stylist.user_id == user.id))
     if not stylist:
         raise HTTPException(status_code=404, detail="Stylist profile not found")
     
-    return db.query(models.Booking).filter(
-        models.Booking.stylist_id == stylist.id
-    ).order_by(models.Booking.start_time.desc()).all()
+    page.stylist_id = stylist.id
+    return page.finish((await db.scalars(page.apply(select(models.Booking)))).all(), response)
 
-def send_confirmation_email(booking, payment, paid_amount, note, db, bg_tasks):
+async def queue_confirmation_email(booking, paid_amount, note, db):
     recipient_email = booking.customer_email
     customer_name = booking.customer_name or "Valued Customer"
     if not recipient_email and booking.customer_id:
-        u = db.query(models.User).get(booking.customer_id)
+        u = await db.get(models.User, booking.customer_id)
         if u: recipient_email = u.email; customer_name = u.full_name or customer_name
 
     if recipient_email:
@@ -246,29 +407,33 @@ def send_confirmation_email(booking, payment, paid_amount, note, db, bg_tasks):
             f"💰 Total Price: ${booking.total_amount:.2f}\n" # Thêm tổng tiền
             f"\nSee you soon!\nSalon Luxury"
         )
-        bg_tasks.add_task(send_email, recipient_email, "Booking Confirmed", body)
+        queue_email(db, recipient_email, "Booking Confirmed", body)
+
+async def apply_payment(db: AsyncSession, booking: models.Booking, amount: float) -> None:
+    """Move the booking's paid total by `amount` unless another payment got there first."""
+    result = await db.execute(balances.settle(booking.id, amount, booking.amount_paid))
+    if result.rowcount != 1:
+        raise HTTPException(status_code=409, detail="Booking was paid concurrently; reload and try again")
 
 @router.post("/{booking_id}/pay", response_model=schemas.PaymentOut)
-def pay_booking(
+async def pay_booking(
     booking_id: int, 
     payload: schemas.PaymentRequest, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        booking = db.query(models.Booking).get(booking_id)
+        booking = await db.get(models.Booking, booking_id)
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
 
-        if booking.total_amount <= db.query(func.sum(models.Payment.amount)).filter(models.Payment.booking_id == booking_id, models.Payment.status == models.PaymentStatus.SUCCESS.value).scalar() or 0:
+        if booking.balance_due <= 0:
             raise HTTPException(status_code=400, detail="Booking already fully paid")
 
         if not luhn_checksum(payload.card_number) or not validate_expiry(payload.expiry_month, payload.expiry_year):
             raise HTTPException(status_code=400, detail="Invalid payment details")
 
-        remaining_to_pay = booking.total_amount - (db.query(func.sum(models.Payment.amount)).filter(models.Payment.booking_id == booking_id, models.Payment.status == models.PaymentStatus.SUCCESS.value).scalar() or 0)
-        
-        amount_to_charge = remaining_to_pay
+        amount_to_charge = booking.balance_due
+        await apply_payment(db, booking, amount_to_charge)
 
         payment = models.Payment(
             booking_id=booking.id, 
@@ -280,28 +445,26 @@ def pay_booking(
         db.add(payment)
         
         booking.status = models.BookingStatus.CONFIRMED.value
-        db.commit()
-        db.refresh(payment)
-
-        send_confirmation_email(booking, payment, amount_to_charge, "Full Payment Received", db, background_tasks)
+        await queue_confirmation_email(booking, amount_to_charge, "Full Payment Received", db)
+        await db.commit()
+        await db.refresh(payment)
         return payment
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 @router.post("/{booking_id}/pay-deposit", response_model=schemas.PaymentOut)
-def pay_deposit(
+async def pay_deposit(
     booking_id: int, 
     payload: schemas.PaymentRequest, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        booking = db.query(models.Booking).get(booking_id)
+        booking = await db.get(models.Booking, booking_id)
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
 
-        if db.query(models.Payment).filter(models.Payment.booking_id == booking_id, models.Payment.status == models.PaymentStatus.SUCCESS.value).first():
+        if booking.amount_paid > 0:
             raise HTTPException(status_code=400, detail="Deposit/Full payment already received.")
 
         if not luhn_checksum(payload.card_number) or not validate_expiry(payload.expiry_month, payload.expiry_year):
@@ -309,6 +472,7 @@ def pay_deposit(
 
         deposit_amount = round(booking.total_amount * DEPOSIT_PERCENTAGE, 2)
         remaining = round(booking.total_amount - deposit_amount, 2)
+        await apply_payment(db, booking, deposit_amount)
 
         payment = models.Payment(
             booking_id=booking.id, 
@@ -320,13 +484,12 @@ def pay_deposit(
         db.add(payment)
         
         booking.status = models.BookingStatus.CONFIRMED.value
-        db.commit()
-        db.refresh(payment)
-
         note = f"Deposit Paid ({DEPOSIT_PERCENTAGE*100:.0f}%). Remaining balance ${remaining:.2f} due at salon."
-        send_confirmation_email(booking, payment, deposit_amount, note, db, background_tasks)
+        await queue_confirmation_email(booking, deposit_amount, note, db)
+        await db.commit()
+        await db.refresh(payment)
         
         return payment
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
\ No newline at end of file
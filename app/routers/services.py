@@ -1,47 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..database import get_db
+from ..database import get_async_db
 from .. import schemas, models
 from ..deps import RequireOwner
+from ..catalog import catalog_cache
+from ..serialization import columns_for, records
 
 router = APIRouter(prefix="/services", tags=["services"])
 
 
 @router.get("/", response_model=List[schemas.ServiceOut])
-def list_services(db: Session = Depends(get_db)):
-    return db.query(models.Service).filter(models.Service.is_active == True).all()
+async def list_services(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Active services, answered from the catalog cache (ETag / 304 Not Modified)."""
+    async def load():
+        q = select(*columns_for(schemas.ServiceOut, models.Service)).where(models.Service.is_active == True)
+        return records(await db.execute(q))
+    return await catalog_cache.respond(request, "services", load)
 
 
 @router.post("/", response_model=schemas.ServiceOut, dependencies=[Depends(RequireOwner)])
-def create_service(payload: schemas.ServiceCreate, db: Session = Depends(get_db)):
-    existing = db.query(models.Service).filter(models.Service.name == payload.name).first()
+async def create_service(payload: schemas.ServiceCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(models.Service).where(models.Service.name == payload.name))
     if existing:
         raise HTTPException(status_code=400, detail="Service already exists")
     svc = models.Service(**payload.model_dump())
     db.add(svc)
-    db.commit()
-    db.refresh(svc)
+    await db.commit()
+    await db.refresh(svc)
+    catalog_cache.bump()
     return svc
 
 
 @router.put("/{service_id}", response_model=schemas.ServiceOut, dependencies=[Depends(RequireOwner)])
-def update_service(service_id: int, payload: schemas.ServiceUpdate, db: Session = Depends(get_db)):
-    svc = db.get(models.Service, service_id)
+async def update_service(service_id: int, payload: schemas.ServiceUpdate, db: AsyncSession = Depends(get_async_db)):
+    svc = await db.get(models.Service, service_id)
     if not svc:
         raise HTTPException(status_code=404, detail="Not found")
     for k, v in payload.model_dump(exclude_unset=True).items():
         setattr(svc, k, v)
-    db.commit()
-    db.refresh(svc)
+    await db.commit()
+    await db.refresh(svc)
+    catalog_cache.bump()
     return svc
 
 
 @router.delete("/{service_id}", dependencies=[Depends(RequireOwner)])
-def delete_service(service_id: int, db: Session = Depends(get_db)):
-    svc = db.query(models.Service).get(service_id)
+async def delete_service(service_id: int, db: AsyncSession = Depends(get_async_db)):
+    svc = await db.get(models.Service, service_id)
     if not svc:
         raise HTTPException(status_code=404, detail="Not found")
-    db.delete(svc)
-    db.commit()
+    await db.delete(svc)
+    await db.commit()
+    catalog_cache.bump()
     return {"ok": True}
@@ -1,30 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..database import get_db
+from ..database import get_async_db
 from .. import schemas, models
 from ..deps import RequireOwner
-from ..auth import get_password_hash
+from ..principals import invalidate_principal
+from ..hashing import password_pool
+from ..occupancy import occupancy_cache
+from ..catalog import catalog_cache
+from ..serialization import columns_for, records
 
 router = APIRouter(prefix="/stylists", tags=["stylists"])
 
 @router.get("/", response_model=List[schemas.StylistOut])
-def list_stylists(db: Session = Depends(get_db)):
-    return db.query(models.Stylist).all()
+async def list_stylists(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Every stylist, answered from the catalog cache (ETag / 304 Not Modified)."""
+    async def load():
+        return records(await db.execute(select(*columns_for(schemas.StylistOut, models.Stylist))))
+    return await catalog_cache.respond(request, "stylists", load)
 
 @router.post("/", response_model=schemas.StylistOut, dependencies=[Depends(RequireOwner)])
-def create_stylist(payload: schemas.StylistCreateFull, db: Session = Depends(get_db)):
-    if db.query(models.User).filter(models.User.email == payload.email).first():
+async def create_stylist(payload: schemas.StylistCreateFull, db: AsyncSession = Depends(get_async_db)):
+    if await db.scalar(select(models.User.id).where(models.User.email == payload.email)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user = models.User(
         email=payload.email,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=await password_pool.hash(payload.password),
         full_name=payload.full_name,
         role=models.Role.STYLIST.value
     )
     db.add(user)
-    db.flush()
+    await db.flush()
     
     stylist = models.Stylist(
         user_id=user.id,
@@ -34,13 +42,15 @@ def create_stylist(payload: schemas.StylistCreateFull, db: Session = Depends(get
         end_hour=payload.end_hour
     )
     db.add(stylist)
-    db.commit()
-    db.refresh(stylist)
+    await db.commit()
+    await db.refresh(stylist)
+    invalidate_principal(user.id)
+    catalog_cache.bump()
     return stylist
 
 @router.put("/{stylist_id}", response_model=schemas.StylistOut, dependencies=[Depends(RequireOwner)])
-def update_stylist(stylist_id: int, payload: schemas.StylistUpdate, db: Session = Depends(get_db)):
-    stylist = db.get(models.Stylist, stylist_id)
+async def update_stylist(stylist_id: int, payload: schemas.StylistUpdate, db: AsyncSession = Depends(get_async_db)):
+    stylist = await db.get(models.Stylist, stylist_id)
     if not stylist:
         raise HTTPException(status_code=404, detail="Stylist not found")
     
@@ -48,23 +58,28 @@ def update_stylist(stylist_id: int, payload: schemas.StylistUpdate, db: Session
     for key, value in data.items():
         setattr(stylist, key, value)
     
-    db.commit()
-    db.refresh(stylist)
+    await db.commit()
+    await db.refresh(stylist)
+    occupancy_cache.invalidate(stylist.id)
+    catalog_cache.bump()
     return stylist
 
 @router.delete("/{stylist_id}", dependencies=[Depends(RequireOwner)])
-def delete_stylist(stylist_id: int, db: Session = Depends(get_db)):
-    stylist = db.get(models.Stylist, stylist_id)
+async def delete_stylist(stylist_id: int, db: AsyncSession = Depends(get_async_db)):
+    stylist = await db.get(models.Stylist, stylist_id)
     if not stylist:
         raise HTTPException(status_code=404, detail="Stylist not found")
     
-    if stylist.bookings:
+    if await db.scalar(select(exists().where(models.Booking.stylist_id == stylist_id))):
         raise HTTPException(status_code=400, detail="Cannot delete stylist with existing bookings. Delete bookings first.")
 
-    user = stylist.user
+    user = await db.get(models.User, stylist.user_id)
     if user:
         user.role = models.Role.CUSTOMER.value
 
-    db.delete(stylist)
-    db.commit()
-    return {"ok": True}
\ No newline at end of file
+    await db.delete(stylist)
+    await db.commit()
+    occupancy_cache.invalidate(stylist_id)
+    invalidate_principal(stylist.user_id)
+    catalog_cache.bump()
+    return {"ok": True}
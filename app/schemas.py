@@ -1,7 +1,16 @@
 
 from datetime import datetime, date, time
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field
+from typing import Annotated, Optional, List, Dict
+from pydantic import AfterValidator, BaseModel, EmailStr, Field
+from .occupancy import BUCKET_MINUTES, on_grid
+
+def _on_grid(value: datetime) -> datetime:
+    if not on_grid(value):
+        raise ValueError(f"must be on a {BUCKET_MINUTES}-minute boundary (e.g. 09:00, 09:05)")
+    return value
+
+# Bookings start and end on the 5-minute grid their slot claims use (see app/reservations.py).
+SlotTime = Annotated[datetime, AfterValidator(_on_grid)]
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -29,13 +38,14 @@ class ServiceBase(BaseModel):
     duration_minutes: int = 60
 
 class ServiceCreate(ServiceBase):
-    pass
+    # Input only: ServiceOut must still serialize legacy rows.
+    duration_minutes: int = Field(default=60, gt=0, multiple_of=BUCKET_MINUTES)
 
 class ServiceUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     price: Optional[float] = None
-    duration_minutes: Optional[int] = None
+    duration_minutes: Optional[int] = Field(default=None, gt=0, multiple_of=BUCKET_MINUTES)
     is_active: Optional[bool] = None
 
 class ServiceOut(ServiceBase):
@@ -71,16 +81,44 @@ class StylistCreateFull(BaseModel):
 class BookingCreate(BaseModel):
     service_id: int
     stylist_id: Optional[int] = None
-    start_time: datetime
+    start_time: SlotTime
 
 class WalkinBookingCreate(BaseModel):
     service_id: int
     stylist_id: int
-    start_time: datetime
+    start_time: SlotTime
     customer_name: str
     customer_email: Optional[EmailStr] = None
     customer_phone: Optional[str] = None
 
+class RecurrenceRule(BaseModel):
+    interval_weeks: int = Field(default=1, ge=1, le=52)
+    count: Optional[int] = Field(default=None, ge=1)
+    until: Optional[date] = None
+
+class BookingBatchCreate(BaseModel):
+    service_id: int
+    stylist_id: int
+    start_time: Optional[SlotTime] = None
+    recurrence: Optional[RecurrenceRule] = None
+    start_times: Optional[List[SlotTime]] = None
+    customer_name: Optional[str] = None
+    customer_email: Optional[EmailStr] = None
+    customer_phone: Optional[str] = None
+    skip_conflicts: bool = True
+
+class BatchOccurrence(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    status: str
+    booking_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BookingBatchOut(BaseModel):
+    booked: int
+    conflicts: int
+    occurrences: List[BatchOccurrence]
+
 class AvailabilityQuery(BaseModel):
     service_id: int
     stylist_id: Optional[int] = None
@@ -90,6 +128,12 @@ class TimeSlot(BaseModel):
     start_time: datetime
     end_time: datetime
     stylist_id: Optional[int] = None
+    stylist_ids: List[int] = []
+
+class CalendarDay(BaseModel):
+    date: date
+    free_slots: int
+    stylists: Optional[Dict[int, int]] = None
 
 class BookingOut(BaseModel):
     id: int
@@ -100,6 +144,9 @@ class BookingOut(BaseModel):
     status: str
     is_walkin: bool
     customer_phone: Optional[str] = None
+    total_amount: float
+    amount_paid: float
+    balance_due: float
     class Config:
         from_attributes = True
 
@@ -0,0 +1,77 @@
+"""Fast path for the hot list endpoints.
+
+Returning ORM objects makes FastAPI validate every row through the
+response model (`from_attributes`) and then walk the result again with
+`jsonable_encoder`. The list endpoints instead select only the columns the
+schema exposes, turn the rows into plain dicts and hand them to
+`rows_response`, which serializes once in pydantic-core's Rust encoder.
+The declared `response_model` stays for the OpenAPI schema; it is not
+applied to a returned `Response`.
+
+Clients that send `Accept: application/msgpack` get MessagePack when the
+optional `msgpack` package is installed, and JSON otherwise. Compression
+is left to the GZip middleware.
+"""
+from typing import Any, Iterable, List, Mapping, Optional, Set, Type
+from fastapi import Request, Response
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+from sqlalchemy import Row
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(to_jsonable_python(content), use_bin_type=True)
+
+
+def columns_for(schema: Type[BaseModel], model) -> list:
+    """The mapped columns of `model` named by the fields of `schema`, in field order."""
+    table = model.__table__.columns
+    return [getattr(model, name) for name in schema.model_fields if name in table]
+
+
+def records(rows: Iterable[Row]) -> List[dict]:
+    return [row._asdict() for row in rows]
+
+
+def accepted_encodings(request: Request) -> Set[str]:
+    """Content codings the client accepts, honouring `;q=0` refusals."""
+    accepted = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        name, _, weight = params.partition("=")
+        try:
+            refused = name.strip() == "q" and float(weight) == 0
+        except ValueError:
+            refused = False
+        if coding.strip() and not refused:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def wants_msgpack(request: Request) -> bool:
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def rows_response(request: Request, content: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    response = response_class(content, headers=dict(headers) if headers else None)
+    if msgpack is not None:
+        response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,152 @@
+"""Production entry point: one-time setup in the parent, then N uvicorn workers.
+
+    python -m app.serve --host 0.0.0.0 --port 8000 [--workers N]
+
+The parent runs `python -m app.init` (migrations, then the owner account and
+sample catalog) exactly once, binds the socket and only then starts the
+workers, so workers never race each other on startup work. It imports none of
+the app itself: workers are fresh interpreters that import `app.main`.
+
+Signals to the parent (Unix):
+
+    SIGTERM, SIGINT   workers stop accepting, finish in-flight requests for up to
+                      SERVE_GRACEFUL_TIMEOUT_SECONDS, run their shutdown hooks, exit
+    SIGHUP            re-run init with the code now on disk, then replace the workers
+                      one at a time; each old worker drains only after its replacement
+                      has started serving, so capacity never drops
+    SIGTTIN, SIGTTOU  one worker more / fewer
+
+SIGTERM/SIGINT and SIGTTIN/SIGTTOU are handled by uvicorn's own
+`Multiprocess` supervisor; only SIGHUP is ours. `Supervisor` subclasses it and
+uses its `Process` wrapper and `processes` list, which are not public uvicorn
+API, so uvicorn is pinned exactly in requirements.txt and `main` refuses to
+start under any other version. Re-check `restart_all` when bumping the pin.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import time
+from typing import List, Optional
+import uvicorn
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+from .config import settings
+
+APP = "app.main:app"
+UVICORN_VERSION = "0.32.0"  # keep in step with requirements.txt
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY if set, else one per usable CPU capped at SERVE_MAX_WORKERS.
+
+    An in-memory SQLite database lives inside one process, so it always gets one worker.
+    """
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+    if ":memory:" in settings.DATABASE_URL:
+        return 1
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, settings.SERVE_MAX_WORKERS))
+
+
+def run_init() -> bool:
+    # A subprocess, so a reload migrates with the code now on disk, not the code the parent started with.
+    result = subprocess.run([sys.executable, "-m", "app.init"])
+    if result.returncode:
+        logger.error("python -m app.init failed with exit code %s", result.returncode)
+    return result.returncode == 0
+
+
+class _ReportingServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, started: multiprocessing.Queue):
+        super().__init__(config)
+        self.started_queue = started
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets)
+        if self.started:
+            self.started_queue.put(os.getpid())
+
+
+class _Worker:
+    """Picklable worker target: serves the app and reports its pid once startup hooks have run."""
+
+    def __init__(self, config: uvicorn.Config, started: multiprocessing.Queue):
+        self.config = config
+        self.started = started
+
+    def __call__(self, sockets=None) -> None:
+        _ReportingServer(self.config, self.started).run(sockets=sockets)
+
+
+class Supervisor(Multiprocess):
+    """uvicorn's worker supervisor with a rolling, capacity-preserving SIGHUP restart."""
+
+    def __init__(self, config: uvicorn.Config, sockets: list):
+        self.started = multiprocessing.get_context("spawn").Queue()
+        super().__init__(config, target=_Worker(config, self.started), sockets=sockets)
+
+    def wait_started(self, process: Process, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while process.process.is_alive() and time.monotonic() < deadline:
+            try:
+                if self.started.get(timeout=0.5) == process.pid:
+                    return True
+            except queue.Empty:
+                pass
+        return False
+
+    def restart_all(self) -> None:
+        if not run_init():
+            logger.error("Keeping the running workers.")
+            return
+        for idx, old in enumerate(self.processes):
+            new = Process(self.config, self.target, self.sockets)
+            new.start()
+            if not self.wait_started(new, settings.SERVE_WORKER_START_TIMEOUT_SECONDS):
+                logger.error("Replacement worker [%s] did not start; keeping the running workers.", new.pid)
+                new.kill()
+                new.join()
+                return
+            old.terminate()
+            old.join()
+            self.processes[idx] = new
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="default: WEB_CONCURRENCY or one per CPU")
+    parser.add_argument("--no-init", action="store_true", help="skip migrations and seeding (already done by the deploy)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if uvicorn.__version__ != UVICORN_VERSION:
+        logger.error("app.serve supports uvicorn %s only, found %s", UVICORN_VERSION, uvicorn.__version__)
+        return 1
+    if not args.no_init and not run_init():
+        return 1
+    config = uvicorn.Config(
+        APP, host=args.host, port=args.port, workers=args.workers or default_workers(),
+        timeout_graceful_shutdown=settings.SERVE_GRACEFUL_TIMEOUT_SECONDS, log_level=args.log_level,
+    )
+    sock = config.bind_socket()
+    logger.info("Starting %d workers", config.workers)
+    try:
+        Supervisor(config, [sock]).run()
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""A minimal local SMTP server that accepts and keeps every message.
+
+Point SMTP_HOST/SMTP_PORT at it (with SMTP_STARTTLS=false) to watch the
+outbox deliver during development, or use `SMTPSink` from tests and
+benchmarks. It speaks just enough SMTP for smtplib: EHLO/HELO, AUTH
+PLAIN/LOGIN (any credentials), MAIL, RCPT, DATA, RSET, NOOP and QUIT.
+
+    python -m app.smtp_sink 1025
+"""
+import socketserver
+import sys
+import threading
+from email import message_from_bytes
+from email.message import Message
+from typing import List, Set
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "SMTPSink"
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        self.server.record_connection()
+        self.reply("220 salon-sink ready")
+        recipients: List[str] = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-salon-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "HELO":
+                self.reply("250 salon-sink")
+            elif verb == "AUTH":
+                if line.upper().startswith("AUTH LOGIN"):
+                    for _ in range(2 - len(line.split()[2:])):
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = line.split(":", 1)[1].strip().strip("<>")
+                if address in self.server.reject:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                self.server.record_message(message_from_bytes(b"".join(lines)))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.messages: List[Message] = []
+        self.connections = 0
+        self.reject: Set[str] = set()
+        self.verbose = False
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def record_message(self, msg: Message) -> None:
+        with self._lock:
+            self.messages.append(msg)
+        if self.verbose:
+            print(f"[SMTP SINK] To: {msg['To']}  Subject: {msg['Subject']}")
+
+    def start(self) -> "SMTPSink":
+        self._thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    sink = SMTPSink(port=int(sys.argv[1]) if len(sys.argv) > 1 else 1025)
+    sink.verbose = True
+    print(f"SMTP sink listening on 127.0.0.1:{sink.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
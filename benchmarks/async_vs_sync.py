@@ -0,0 +1,140 @@
+"""Side-by-side throughput of the async routes against sync (threadpool) twins.
+
+Each variant runs in its own uvicorn process against the same seeded
+database, and the load generator runs in this process, so the client never
+competes with the servers for the GIL. The sync twin serves the same queries
+through FastAPI's threadpool (40 threads by default) exactly like the
+pre-async routers did.
+
+    python -m benchmarks.async_vs_sync --requests 4000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.orm import Session
+
+
+def sync_app_factory() -> FastAPI:
+    from app import availability as availability_engine, models, schemas
+    from app.database import get_db
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/services/", response_model=List[schemas.ServiceOut])
+    def list_services(db: Session = Depends(get_db)):
+        return db.query(models.Service).filter(models.Service.is_active == True).all()
+
+    @sync_app.get("/bookings/availability", response_model=List[schemas.TimeSlot])
+    def availability(service_id: int, date: date, stylist_id: Optional[int] = None, db: Session = Depends(get_db)):
+        svc = db.get(models.Service, service_id)
+        stylist = db.get(models.Stylist, stylist_id)
+        slots = availability_engine.stylist_availability(db, stylist, svc.duration_minutes, date, date)
+        return [schemas.TimeSlot(start_time=s, end_time=e, stylist_id=stylist_id) for s, e in slots]
+
+    return sync_app
+
+
+def serve(target: str, port: int, env: dict, stdout=None) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--factory", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=stdout,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/services/", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{target} did not start on port {port}")
+
+
+def async_app_factory() -> FastAPI:
+    from app.main import app
+    return app
+
+
+async def drive(base_url: str, paths: List[str], total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for i in queue:
+                began = time.perf_counter()
+                try:
+                    res = await client.get(paths[i % len(paths)])
+                    errors += res.status_code != 200
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - began)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="salon-bench-"), "bench.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    # Keep availability on the database path; the occupancy cache would hide the driver difference.
+    env["OCCUPANCY_CACHE_MAX_ENTRIES"] = "0"
+    os.environ.update(env)
+
+    from app import models
+    from app.database import SessionLocal
+    from app.init import init
+    init()
+    with SessionLocal() as db:
+        service_id = db.query(models.Service.id).first()[0]
+        stylist_id = db.query(models.Stylist.id).first()[0]
+    day = date.today() + timedelta(days=7)
+    paths = ["/services/", f"/bookings/availability?service_id={service_id}&stylist_id={stylist_id}&date={day}"]
+
+    variants = {
+        "sync (threadpool)": ("benchmarks.async_vs_sync:sync_app_factory", 8701),
+        "async (aiosqlite)": ("benchmarks.async_vs_sync:async_app_factory", 8702),
+    }
+    print(f"{args.requests} requests, concurrency {args.concurrency}, database {db_path}")
+    print(f"{'variant':20} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, (target, port) in variants.items():
+        proc = serve(target, port, env)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(drive(base_url, paths, min(200, args.requests), args.concurrency))
+            result = asyncio.run(drive(base_url, paths, args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{name:20} {result['rps']:9.0f} {result['p50_ms']:9.1f} {result['p99_ms']:9.1f} {result['errors']:7d}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Bulk import vs replaying history through POST /bookings/walkin.
+
+Writes --rows historical bookings (each with a payment) as NDJSON, imports
+them with app.imports into a scratch database, then replays --walkin-rows
+of the same shape one request at a time through the walk-in endpoint, the
+way the second branch was migrated, and compares rows per minute.
+
+    python -m benchmarks.bulk_import --rows 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+db_dir = tempfile.mkdtemp(prefix="salon-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from app import models  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.exports import ExportFormat  # noqa: E402
+from app.imports import ImportKind, run_import, text_lines  # noqa: E402
+from app.init import init  # noqa: E402
+from app.main import app  # noqa: E402
+
+STYLISTS = 20
+
+
+def history(rows: int, origin: datetime, stylist_names):
+    """Ten one-hour appointments per stylist-day, day after day."""
+    per_day = STYLISTS * 10
+    for i in range(rows):
+        day, slot = divmod(i, per_day)
+        stylist, hour = divmod(slot, 10)
+        start = origin + timedelta(days=day, hours=hour)
+        yield {
+            "service": "Bench Cut", "stylist": stylist_names[stylist], "start_time": start.isoformat(),
+            "customer_name": f"Customer {i % 5000}", "customer_phone": "0900000000", "amount_paid": 30,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--walkin-rows", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    init()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Service), {"name": "Bench Cut", "price": 30, "duration_minutes": 60})
+        users = conn.execute(insert(models.User).returning(models.User.id), [
+            {"email": f"stylist{i}@bench.local", "hashed_password": "x", "role": "stylist"} for i in range(STYLISTS)
+        ]).scalars().all()
+        stylist_ids = dict(conn.execute(insert(models.Stylist).returning(models.Stylist.display_name, models.Stylist.id), [
+            {"user_id": user_id, "display_name": f"Bench {i}", "start_hour": 0, "end_hour": 24} for i, user_id in enumerate(users)
+        ]).all())
+        service_id = conn.execute(select(models.Service.id).where(models.Service.name == "Bench Cut")).scalar_one()
+    names = sorted(stylist_ids)
+
+    path = os.path.join(db_dir, "history.ndjson")
+    with open(path, "w") as f:
+        f.writelines(json.dumps(row) + "\n" for row in history(args.rows, datetime(2015, 1, 1, 8), names))
+    began = time.perf_counter()
+    with open(path, "rb") as f:
+        report = run_import(text_lines(f), ImportKind.BOOKINGS, ExportFormat.NDJSON)
+    bulk = time.perf_counter() - began
+    print(f"bulk import   {report.imported:7d} rows in {bulk:6.1f}s  {report.imported / bulk * 60:10,.0f} rows/min"
+          f"  ({report.failed} failed)")
+
+    client = TestClient(app)
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = list(history(args.walkin_rows, datetime(2010, 1, 1, 8), names))
+    began = time.perf_counter()
+    for row in rows:
+        client.post("/bookings/walkin", headers=headers, json={
+            "service_id": service_id, "stylist_id": stylist_ids[row["stylist"]], "start_time": row["start_time"],
+            "customer_name": row["customer_name"], "customer_phone": row["customer_phone"],
+        })
+    walkin = time.perf_counter() - began
+    print(f"walk-in POSTs {len(rows):7d} rows in {walkin:6.1f}s  {len(rows) / walkin * 60:10,.0f} rows/min")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
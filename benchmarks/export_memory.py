@@ -0,0 +1,71 @@
+"""Peak memory and time to first byte: streaming export vs loading every booking.
+
+"materialized" is what exporting through the old /admin/bookings listing
+did: load every Booking ORM object and serialize one JSON array. "streamed"
+drains app.exports.stream_rows, which is what /admin/export/bookings sends.
+
+    python -m benchmarks.export_memory --rows 300000
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.pagination_depth import seed  # also points DATABASE_URL at a scratch database
+from sqlalchemy.orm import Session
+from app import models
+from app.database import engine
+from app.exports import ExportFormat, bookings_query, stream_rows
+from app.migrations import run_migrations
+from app.schemas import BookingOut
+
+
+def materialized() -> tuple:
+    began = time.perf_counter()
+    with Session(bind=engine) as db:
+        rows = db.query(models.Booking).order_by(models.Booking.start_time.desc()).all()
+        body = json.dumps([BookingOut.model_validate(b).model_dump(mode="json") for b in rows])
+    return time.perf_counter() - began, len(body)
+
+
+def streamed(fmt: ExportFormat) -> tuple:
+    began = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in stream_rows(bookings_query(), fmt):
+        first = first or time.perf_counter() - began
+        size += len(chunk)
+    return first, size
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    began = time.perf_counter()
+    first, size = fn(*args)
+    total = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, peak / 2**20, size / 2**20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    seed(args.rows)
+    print(f"{args.rows} bookings")
+    print(f"{'mode':18} {'first byte s':>12} {'total s':>8} {'peak MiB':>9} {'output MiB':>11}")
+    for name, fn, fn_args in (
+        ("materialized", materialized, ()),
+        ("streamed ndjson", streamed, (ExportFormat.NDJSON,)),
+        ("streamed csv", streamed, (ExportFormat.CSV,)),
+    ):
+        first, total, peak, size = measure(fn, *fn_args)
+        print(f"{name:18} {first:12.3f} {total:8.2f} {peak:9.1f} {size:11.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Availability latency during a login burst, with hashing in the request threadpool vs the hash pool.
+
+"before" serves /auth/login the way the app used to: a sync route that runs
+pbkdf2 verification on one of the request threadpool's threads. "after" is
+the current app, where verification runs in PASSWORD_HASH_WORKERS processes
+behind an admission limit. Both serve the same async availability route, so
+the difference in its latency is what the login burst costs everyone else.
+
+    python -m benchmarks.login_load --seconds 10 --login-concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+
+from benchmarks.async_vs_sync import serve
+
+PASSWORD = "Bench@12345"
+
+
+def before_app_factory() -> FastAPI:
+    from app import models
+    from app.auth import create_access_token, verify_password
+    from app.database import get_db
+    from app.routers import bookings, services
+
+    legacy = FastAPI()
+
+    @legacy.post("/auth/login")
+    def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+        user = db.query(models.User).filter(models.User.email == form_data.username).first()
+        if not user or not verify_password(form_data.password, user.hashed_password):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"access_token": create_access_token({"sub": str(user.id)}), "token_type": "bearer"}
+
+    legacy.include_router(services.router)
+    legacy.include_router(bookings.router)
+    return legacy
+
+
+def after_app_factory() -> FastAPI:
+    from app.main import app
+    return app
+
+
+async def load(base_url: str, seconds: float, login_concurrency: int, read_concurrency: int, read_path: str) -> dict:
+    read_latencies = []
+    logins = {"ok": 0, "rejected": 0, "errors": 0}
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=login_concurrency + read_concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def login_loop():
+            while time.monotonic() < deadline:
+                try:
+                    res = await client.post("/auth/login", data={"username": "bench@example.com", "password": PASSWORD})
+                    key = "ok" if res.status_code == 200 else "rejected" if res.status_code == 503 else "errors"
+                except httpx.HTTPError:
+                    key = "errors"
+                logins[key] += 1
+
+        async def read_loop():
+            while time.monotonic() < deadline:
+                began = time.perf_counter()
+                try:
+                    await client.get(read_path)
+                except httpx.HTTPError:
+                    pass
+                read_latencies.append(time.perf_counter() - began)
+
+        await asyncio.gather(
+            *(login_loop() for _ in range(login_concurrency)),
+            *(read_loop() for _ in range(read_concurrency)),
+        )
+
+    read_latencies.sort()
+    return {
+        "logins_per_s": logins["ok"] / seconds,
+        "login_503": logins["rejected"],
+        "login_errors": logins["errors"],
+        "read_p50_ms": statistics.median(read_latencies) * 1000,
+        "read_p99_ms": read_latencies[int(len(read_latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-concurrency", type=int, default=64)
+    parser.add_argument("--read-concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="salon-bench-"), "bench.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    os.environ.update(env)
+
+    from app import models
+    from app.auth import get_password_hash
+    from app.database import SessionLocal
+    from app.init import init
+    init()
+    with SessionLocal() as db:
+        db.add(models.User(email="bench@example.com", hashed_password=get_password_hash(PASSWORD), role=models.Role.CUSTOMER.value))
+        db.commit()
+        service_id = db.query(models.Service.id).first()[0]
+        stylist_id = db.query(models.Stylist.id).first()[0]
+    day = date.today() + timedelta(days=7)
+    read_path = f"/bookings/availability?service_id={service_id}&stylist_id={stylist_id}&date={day}"
+
+    variants = {
+        "before": ("benchmarks.login_load:before_app_factory", 8711),
+        "after": ("benchmarks.login_load:after_app_factory", 8712),
+    }
+    print(f"{args.login_concurrency} concurrent logins, {args.read_concurrency} availability readers, {args.seconds:.0f}s each")
+    print(f"{'variant':8} {'logins/s':>9} {'503s':>6} {'errors':>7} {'avail p50':>10} {'avail p99':>10}")
+    for name, (target, port) in variants.items():
+        proc = serve(target, port, env)
+        try:
+            r = asyncio.run(load(f"http://127.0.0.1:{port}", args.seconds, args.login_concurrency, args.read_concurrency, read_path))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{name:8} {r['logins_per_s']:9.0f} {r['login_503']:6d} {r['login_errors']:7d}"
+            f" {r['read_p50_ms']:8.1f}ms {r['read_p99_ms']:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Email delivery rate: one SMTP session per message vs the outbox worker's reused session.
+
+Both deliver to the local SMTP sink (app.smtp_sink) with login enabled, so
+the difference is connection setup and the outbox bookkeeping. Pass
+--latency-ms to add a fake network round trip to every SMTP reply, which is
+where reusing the session matters most against a real provider.
+
+    python -m benchmarks.outbox_throughput --messages 2000 --latency-ms 5
+"""
+import argparse
+import os
+import smtplib
+import sys
+import tempfile
+import time
+
+db_path = os.path.join(tempfile.mkdtemp(prefix="salon-bench-"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+
+from app import smtp_sink  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.email_utils import build_message  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.outbox import OutboxWorker, queue_email  # noqa: E402
+
+
+def add_latency(seconds: float) -> None:
+    reply = smtp_sink._Handler.reply
+
+    def slow_reply(self, line):
+        time.sleep(seconds)
+        reply(self, line)
+
+    smtp_sink._Handler.reply = slow_reply
+
+
+def per_message(count: int) -> float:
+    began = time.perf_counter()
+    for i in range(count):
+        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
+            server.login(settings.SMTP_USER, settings.SMTP_PASS)
+            server.send_message(build_message(f"direct{i}@example.com", "Direct", "Body"))
+    return count / (time.perf_counter() - began)
+
+
+def outbox(count: int, batch_size: int) -> float:
+    with SessionLocal() as db:
+        for i in range(count):
+            queue_email(db, f"outbox{i}@example.com", "Outbox", "Body")
+        db.commit()
+    worker = OutboxWorker(batch_size=batch_size)
+    began = time.perf_counter()
+    while worker.deliver_batch():
+        pass
+    elapsed = time.perf_counter() - began
+    worker.connection.close()
+    return count / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    if args.latency_ms:
+        add_latency(args.latency_ms / 1000)
+    sink = smtp_sink.SMTPSink().start()
+    settings.SMTP_HOST, settings.SMTP_PORT = "127.0.0.1", sink.port
+    settings.SMTP_STARTTLS, settings.SMTP_USER, settings.SMTP_PASS = False, "bench", "bench"
+
+    print(f"{args.messages} messages, batch {args.batch_size}, +{args.latency_ms:.0f} ms per SMTP reply")
+    print(f"{'mode':22} {'msgs/s':>8}")
+    print(f"{'session per message':22} {per_message(args.messages):8.0f}")
+    print(f"{'outbox worker':22} {outbox(args.messages, args.batch_size):8.0f}")
+    print(f"sink saw {len(sink.messages)} messages over {sink.connections} connections")
+    sink.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Page latency vs depth: keyset cursor against LIMIT/OFFSET on a large bookings table.
+
+Seeds --rows bookings into a scratch database, then times fetching a
+50-row page at increasing depths through the same query the admin listing
+uses, once seeking by cursor and once with OFFSET.
+
+    python -m benchmarks.pagination_depth --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+db_path = os.path.join(tempfile.mkdtemp(prefix="salon-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app import models  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.pagination import BookingPage, DEFAULT_PAGE_SIZE  # noqa: E402
+
+
+def seed(rows: int) -> None:
+    origin = datetime(2020, 1, 1, 8)
+    statuses = [s.value for s in models.BookingStatus]
+    with engine.begin() as conn:
+        service_id = conn.execute(insert(models.Service).returning(models.Service.id), {
+            "name": "Bench", "price": 10, "duration_minutes": 60,
+        }).scalar()
+        for chunk in range(0, rows, 50_000):
+            conn.execute(insert(models.Booking), [
+                {
+                    "customer_id": i % 5000 + 1, "service_id": service_id, "stylist_id": i % 20 + 1,
+                    "service_price_snapshot": 10, "total_amount": 10, "status": statuses[i % len(statuses)],
+                    "start_time": origin + timedelta(minutes=15 * i), "end_time": origin + timedelta(minutes=15 * i + 60),
+                }
+                for i in range(chunk, min(chunk + 50_000, rows))
+            ])
+
+
+def page(db: Session, depth: int, cursor=None) -> float:
+    began = time.perf_counter()
+    p = BookingPage(limit=DEFAULT_PAGE_SIZE, cursor=None, date_from=None, date_to=None, status=None, stylist_id=None)
+    if cursor:
+        p.after = cursor
+        db.scalars(p.apply(select(models.Booking))).all()
+    else:
+        db.scalars(
+            select(models.Booking).order_by(models.Booking.start_time.desc(), models.Booking.id.desc())
+            .offset(depth).limit(DEFAULT_PAGE_SIZE)
+        ).all()
+    return (time.perf_counter() - began) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    began = time.perf_counter()
+    seed(args.rows)
+    print(f"seeded {args.rows} bookings in {time.perf_counter() - began:.1f}s")
+    print(f"{'depth (rows)':>12} {'cursor ms':>10} {'offset ms':>10}")
+    with Session(bind=engine) as db:
+        for depth in (0, 1_000, 10_000, 100_000, args.rows // 2, args.rows - DEFAULT_PAGE_SIZE):
+            if depth >= args.rows:
+                continue
+            anchor = db.execute(
+                select(models.Booking.start_time, models.Booking.id)
+                .order_by(models.Booking.start_time.desc(), models.Booking.id.desc()).offset(depth).limit(1)
+            ).first()
+            cursor_ms = min(page(db, depth, tuple(anchor)) for _ in range(5))
+            offset_ms = min(page(db, depth) for _ in range(5))
+            print(f"{depth:12d} {cursor_ms:10.2f} {offset_ms:10.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
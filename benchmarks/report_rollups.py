@@ -0,0 +1,84 @@
+"""Year revenue report: pre-aggregated rollups vs aggregating payments on the fly.
+
+Seeds --rows bookings with one payment each into a scratch database (the
+rollup triggers maintain the report tables while seeding), then times a
+month-by-stylist revenue report for one year both ways, and the insert
+cost the triggers add.
+
+    python -m benchmarks.report_rollups --rows 300000
+"""
+import argparse
+import sys
+import time
+from datetime import date
+
+from benchmarks.pagination_depth import seed  # also points DATABASE_URL at a scratch database
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.database import engine
+from app.migrations import run_migrations
+from app.rollups import Dimension, Period, TRIGGERS, install_triggers, revenue_report
+
+RAW = """
+    SELECT substr(date(p.created_at), 1, 7) AS period, COALESCE(b.stylist_id, 0) AS stylist_id,
+           ROUND(SUM(p.amount), 2) AS amount, COUNT(*) AS payments
+    FROM payments p JOIN bookings b ON b.id = p.booking_id
+    WHERE p.status = 'success' AND date(p.created_at) BETWEEN :start AND :end
+    GROUP BY 1, 2 ORDER BY 1, 2
+"""
+
+
+def add_payments() -> float:
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO payments (booking_id, amount, status, provider, created_at) "
+            "SELECT id, total_amount, 'success', 'bench', start_time FROM bookings"
+        ))
+    return time.perf_counter() - began
+
+
+def best(fn, repeat=5) -> float:
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - began)
+    return min(times) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    began = time.perf_counter()
+    seed(args.rows)
+    seeded = time.perf_counter() - began
+    paid = add_payments()
+    print(f"{args.rows} bookings seeded in {seeded:.1f}s, payments in {paid:.1f}s (triggers on)")
+
+    with engine.begin() as conn:
+        for name in TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text("DELETE FROM payments"))
+    print(f"payments without triggers: {add_payments():.1f}s")
+    with engine.begin() as conn:
+        install_triggers(conn)
+
+    start, end = date(2021, 1, 1), date(2021, 12, 31)
+    with Session(bind=engine) as db:
+        rows = revenue_report(db, start, end, Period.MONTH, Dimension.STYLIST)
+        with engine.connect() as conn:
+            rollup_rows = conn.execute(text(
+                "SELECT COUNT(*) FROM rollup_daily_revenue WHERE day BETWEEN :start AND :end"), {"start": start, "end": end}).scalar()
+            raw_ms = best(lambda: conn.execute(text(RAW), {"start": start.isoformat(), "end": end.isoformat()}).all())
+        rollup_ms = best(lambda: revenue_report(db, start, end, Period.MONTH, Dimension.STYLIST))
+    print(f"year report, {len(rows)} result rows from {rollup_rows} rollup rows")
+    print(f"{'on the fly':12} {raw_ms:8.1f} ms")
+    print(f"{'rollups':12} {rollup_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
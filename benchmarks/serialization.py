@@ -0,0 +1,66 @@
+"""Serialization cost per 10k rows: ORM + response model vs column projection + pydantic-core.
+
+"orm" loads Booking objects and serializes them the way FastAPI does for a
+`response_model` endpoint (validate from attributes, dump, json encode).
+"orm jsonable" is the old /admin/bookings path (no response model,
+`jsonable_encoder` over the mapped instances). "projection" is the path
+the list endpoints use now: select the schema's columns, build dicts and
+render with `FastJSONResponse`. Times include the query.
+
+    python -m benchmarks.serialization --rows 50000
+"""
+import argparse
+import json
+import sys
+import time
+from typing import List
+
+from benchmarks.pagination_depth import seed  # also points DATABASE_URL at a scratch database
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.database import engine
+from app.migrations import run_migrations
+from app.serialization import FastJSONResponse, columns_for, records
+
+BOOKINGS = TypeAdapter(List[schemas.BookingOut])
+
+
+def orm(db: Session) -> bytes:
+    rows = db.scalars(select(models.Booking)).all()
+    return json.dumps(BOOKINGS.dump_python(BOOKINGS.validate_python(rows, from_attributes=True), mode="json")).encode()
+
+
+def orm_jsonable(db: Session) -> bytes:
+    return json.dumps(jsonable_encoder(db.scalars(select(models.Booking)).all())).encode()
+
+
+def projection(db: Session) -> bytes:
+    rows = records(db.execute(select(*columns_for(schemas.BookingOut, models.Booking))))
+    return FastJSONResponse(rows).body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    seed(args.rows)
+    print(f"{args.rows} bookings, best of {args.repeat}")
+    print(f"{'path':14} {'ms / 10k rows':>14} {'body KiB':>9}")
+    for name, fn in (("orm", orm), ("orm jsonable", orm_jsonable), ("projection", projection)):
+        best, size = float("inf"), 0
+        for _ in range(args.repeat):
+            with Session(bind=engine) as db:
+                began = time.perf_counter()
+                size = len(fn(db))
+                best = min(best, time.perf_counter() - began)
+        print(f"{name:14} {best * 1000 * 10_000 / args.rows:14.1f} {size / 1024:9.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Read throughput while bookings are being written, before and after the engine profile.
+
+"before" is the engine this app used to create: default rollback journal,
+driver-default lock timeout and pool. "after" is `app.database`'s profile
+(WAL, synchronous=NORMAL, busy_timeout, mmap, cache size, pool sizing).
+Each runs on its own fresh database file with writer threads committing
+bookings at a fixed rate while reader threads run the availability range
+query as fast as they can, so both engines carry the same write load.
+
+    python -m benchmarks.sqlite_profile --seconds 10 --readers 8 --writers 4 --write-rate 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app import models
+from app.availability import load_busy_by_stylist
+from app.database import apply_sqlite_pragmas, engine_options
+from app.migrations import run_migrations
+
+STYLISTS = 8
+
+
+def make_engine(profiled: bool):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='salon-bench-'), 'bench.db')}"
+    if not profiled:
+        # The original engine: rollback journal, sqlite3's default lock timeout.
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(engine, "connect", lambda conn, record: conn.execute("PRAGMA journal_mode=DELETE"))
+        return engine
+    engine = create_engine(url, **engine_options(url, QueuePool))
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+def seed(engine) -> list:
+    run_migrations(engine)
+    with Session(bind=engine) as db:
+        user = models.User(email="bench@example.com", hashed_password="x", role=models.Role.CUSTOMER.value)
+        svc = models.Service(name="Bench cut", duration_minutes=30, price=10)
+        db.add_all([user, svc])
+        db.flush()
+        stylists = []
+        for i in range(STYLISTS):
+            staff = models.User(email=f"bench-stylist{i}@example.com", hashed_password="x", role=models.Role.STYLIST.value)
+            db.add(staff)
+            db.flush()
+            stylists.append(models.Stylist(user_id=staff.id, display_name=f"Bench {i}", start_hour=0, end_hour=24))
+        db.add_all(stylists)
+        db.commit()
+        return [user.id, svc.id] + [s.id for s in stylists]
+
+
+def run(engine, seconds: float, readers: int, writers: int, write_rate: float) -> dict:
+    customer_id, service_id, *stylist_ids = seed(engine)
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    read_latencies = []
+    lock = threading.Lock()
+    interval = writers / write_rate
+    origin = datetime(2031, 1, 1)
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(n):
+        i = 0
+        next_write = time.monotonic()
+        while not stop.wait(max(0.0, next_write - time.monotonic())):
+            next_write += interval
+            start = origin + timedelta(minutes=30 * (i * writers + n))
+            try:
+                with Session(bind=engine) as db:
+                    db.add(models.Booking(
+                        customer_id=customer_id, stylist_id=stylist_ids[i % STYLISTS], service_id=service_id,
+                        start_time=start, end_time=start + timedelta(minutes=30), service_price_snapshot=10, total_amount=10,
+                        status=models.BookingStatus.CONFIRMED.value,
+                    ))
+                    db.commit()
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+            i += 1
+
+    def reader():
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                with Session(bind=engine) as db:
+                    load_busy_by_stylist(db, stylist_ids, origin, origin + timedelta(days=7))
+                bump("reads")
+                read_latencies.append(time.perf_counter() - began)
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    read_latencies.sort()
+    return {
+        "reads_per_s": counts["reads"] / seconds,
+        "read_p50_ms": statistics.median(read_latencies) * 1000,
+        "read_p99_ms": read_latencies[int(len(read_latencies) * 0.99) - 1] * 1000,
+        "writes_per_s": counts["writes"] / seconds,
+        "locked_errors": counts["locked"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--write-rate", type=float, default=50, help="total booking commits per second")
+    args = parser.parse_args(argv)
+
+    print(f"{args.readers} readers, {args.writers} writers at {args.write_rate:.0f} commits/s, {args.seconds:.0f}s each")
+    print(f"{'engine':10} {'reads/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'writes/s':>9} {'locked':>7}")
+    for name, profiled in (("before", False), ("after", True)):
+        result = run(make_engine(profiled), args.seconds, args.readers, args.writers, args.write_rate)
+        print(
+            f"{name:10} {result['reads_per_s']:9.0f} {result['read_p50_ms']:8.1f} {result['read_p99_ms']:8.1f}"
+            f" {result['writes_per_s']:9.0f} {result['locked_errors']:7d}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
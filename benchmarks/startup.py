@@ -0,0 +1,55 @@
+"""Worker start-up cost: import, startup hooks and first request, each in a fresh interpreter.
+
+Initialises a scratch database once (`app.init`), then --runs times starts
+a new Python process that imports `app.main`, runs the startup hooks and
+serves `GET /readyz` and `GET /services/` through the ASGI app, timing each
+step. The medians are what every worker (re)start and every test session
+pays before it can answer.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = r"""
+import json, time
+began = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    started = time.perf_counter()
+    assert client.get("/readyz").status_code == 200
+    ready = time.perf_counter()
+    assert client.get("/services/").status_code == 200
+    served = time.perf_counter()
+print(json.dumps({"import": imported - began, "startup": started - imported, "readyz": ready - started,
+                  "first /services/": served - ready, "total": served - began}))
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="salon-bench-"), "bench.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    subprocess.run([sys.executable, "-m", "app.init"], env=env, check=True, stdout=subprocess.DEVNULL)
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    print(f"median of {args.runs} fresh processes")
+    for step in samples[0]:
+        print(f"{step:18} {statistics.median(s[step] for s in samples) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
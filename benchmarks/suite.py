@@ -0,0 +1,397 @@
+"""Load-test suite for the booking API: seeded dataset, concurrent clients, comparable JSON results.
+
+`run` seeds a scratch database with --stylists stylists, --services
+services, --customers customers and --months months of booking history
+(completed and paid, cancelled, unpaid) plus two weeks of upcoming
+bookings, all from --seed so two runs see the same data. It then serves
+the real app with uvicorn and drives each scenario with --concurrency
+async clients for --seconds:
+
+    availability     GET  /bookings/availability     (random stylist, service, upcoming day)
+    booking_create   POST /bookings/                 (customer token, a fresh free slot each time)
+    payment          POST /bookings/{id}/pay         (unpaid bookings, seeded and just created)
+    login            POST /auth/login                (pbkdf2 verification in the hash pool)
+    admin_bookings   GET  /admin/bookings            (owner, first and filtered pages)
+    admin_revenue    GET  /admin/reports/revenue     (owner, last year by month and stylist)
+
+Throughput and p50/p95/p99/max latency per scenario are printed and, with
+--out, written as JSON together with the dataset, settings and git commit.
+`compare` flags scenarios whose p95 grew or whose throughput fell by more
+than --threshold between two such files, and exits 1 if any did:
+
+    python -m benchmarks.suite run --out before.json
+    python -m benchmarks.suite run --out after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 0.10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+PASSWORD = "Bench@12345"
+CARD = {"card_number": "4242424242424242", "expiry_month": 12, "expiry_year": 2099, "cvv": "123", "cardholder_name": "Bench"}
+SERVICES = [("Cut", 25.0, 30), ("Cut & Style", 40.0, 60), ("Color", 100.0, 120), ("Treatment", 35.0, 60),
+            ("Beard", 15.0, 30), ("Highlights", 120.0, 90), ("Perm", 90.0, 120), ("Blowdry", 20.0, 30)]
+UPCOMING_DAYS = 14
+# booking_create books days after the seeded horizon, so its slots are free and never collide.
+FRESH_DAYS_FROM = UPCOMING_DAYS + 7
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+def seed(args, rng: random.Random) -> dict:
+    """Bulk-insert the dataset; returns the ids the scenarios draw from."""
+    from sqlalchemy import insert, select
+    from app import models
+    from app.auth import get_password_hash
+    from app.database import SessionLocal, engine
+    from app.init import init
+    from app.reservations import backfill_claims
+
+    init()
+    hashed = get_password_hash(PASSWORD)
+    today = date.today()
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"email": f"customer{i}@bench.local", "hashed_password": hashed, "full_name": f"Customer {i}", "role": models.Role.CUSTOMER.value}
+            for i in range(args.customers)
+        ] + [
+            {"email": f"stylist{i}@bench.local", "hashed_password": hashed, "full_name": f"Stylist {i}", "role": models.Role.STYLIST.value}
+            for i in range(args.stylists)
+        ])
+        customers = conn.execute(select(models.User.id).where(models.User.email.like("customer%@bench.local"))).scalars().all()
+        stylist_users = conn.execute(select(models.User.id).where(models.User.email.like("stylist%@bench.local"))).scalars().all()
+        conn.execute(insert(models.Stylist), [
+            {"user_id": user_id, "display_name": f"Stylist {i}", "start_hour": 9, "end_hour": 19}
+            for i, user_id in enumerate(stylist_users)
+        ])
+        conn.execute(insert(models.Service), [
+            {"name": f"Bench {name}", "price": price, "duration_minutes": minutes}
+            for name, price, minutes in SERVICES[:args.services]
+        ])
+        stylists = conn.execute(select(models.Stylist.id, models.Stylist.start_hour, models.Stylist.end_hour)
+                                .where(models.Stylist.user_id.in_(stylist_users))).all()
+        services = conn.execute(select(models.Service.id, models.Service.price, models.Service.duration_minutes)
+                                .where(models.Service.name.like("Bench %"))).all()
+
+        bookings, payments = [], []
+        first_day = today - timedelta(days=30 * args.months)
+        for stylist in stylists:
+            for offset in range((today - first_day).days + UPCOMING_DAYS):
+                day = first_day + timedelta(days=offset)
+                t, close = datetime.combine(day, datetime.min.time()) + timedelta(hours=stylist.start_hour), \
+                    datetime.combine(day, datetime.min.time()) + timedelta(hours=stylist.end_hour)
+                while True:
+                    service = rng.choice(services)
+                    end = t + timedelta(minutes=service.duration_minutes)
+                    if end > close:
+                        break
+                    if rng.random() < args.fill:
+                        past = day < today
+                        roll = rng.random()
+                        if past and roll < 0.8:
+                            status, paid = models.BookingStatus.COMPLETED.value, service.price
+                        elif roll < 0.9:
+                            status, paid = models.BookingStatus.CONFIRMED.value, 0.0
+                        else:
+                            status, paid = models.BookingStatus.CANCELLED.value, 0.0
+                        bookings.append({
+                            "customer_id": rng.choice(customers), "service_id": service.id, "stylist_id": stylist.id,
+                            "service_price_snapshot": service.price, "total_amount": service.price,
+                            "amount_paid": paid, "balance_due": round(service.price - paid, 2),
+                            "status": status, "start_time": t, "end_time": end, "created_at": t - timedelta(days=7),
+                        })
+                        t = end
+                    else:
+                        t += timedelta(minutes=30)
+        for chunk in range(0, len(bookings), 20_000):
+            ids = conn.execute(insert(models.Booking).returning(models.Booking.id), bookings[chunk:chunk + 20_000]).scalars().all()
+            for booking_id, row in zip(ids, bookings[chunk:chunk + 20_000]):
+                row["id"] = booking_id
+                if row["amount_paid"]:
+                    payments.append({
+                        "booking_id": booking_id, "amount": row["amount_paid"], "status": models.PaymentStatus.SUCCESS.value,
+                        "provider": "mock_full", "masked_details": "**** **** **** 4242", "created_at": row["start_time"],
+                    })
+        if payments:
+            conn.execute(insert(models.Payment), payments)
+    with SessionLocal() as db:
+        backfill_claims(db)
+
+    unpaid = [row["id"] for row in bookings if row["balance_due"] > 0 and row["status"] != models.BookingStatus.CANCELLED.value]
+    rng.shuffle(unpaid)
+    return {
+        "customers": [f"customer{i}@bench.local" for i in range(args.customers)],
+        "stylists": [s._asdict() for s in stylists],
+        "services": [s._asdict() for s in services],
+        "unpaid": unpaid,
+        "counts": {"bookings": len(bookings), "payments": len(payments), "customers": len(customers), "stylists": len(stylists)},
+    }
+
+
+class Scenario:
+    def __init__(self, name: str, request: Callable, concurrency: Optional[int] = None):
+        self.name = name
+        self.request = request  # async (client) -> response, or None when the scenario has run out of work
+        self.concurrency = concurrency
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, seconds: float, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await scenario.request(client)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            try:
+                response = await scenario.request(client)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response is None:
+                return
+            latencies.append(time.perf_counter() - began)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": errors + len(latencies) - ok,
+        "statuses": statuses,
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str = PASSWORD) -> Dict[str, str]:
+    res = await client.post("/auth/login", data={"username": email, "password": password})
+    res.raise_for_status()
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def scenarios(data: dict, rng: random.Random, owner: Dict[str, str], customers: List[Dict[str, str]]) -> List[Scenario]:
+    today = date.today()
+    stylists, services = data["stylists"], data["services"]
+    hour_service = next(s for s in services if s["duration_minutes"] == 60)
+    # Every (day, stylist, hour) after the seeded horizon, handed out once.
+    fresh = (
+        (datetime.combine(today + timedelta(days=day), datetime.min.time()) + timedelta(hours=hour), stylist["id"])
+        for day in itertools.count(FRESH_DAYS_FROM)
+        for stylist in stylists
+        for hour in range(stylist["start_hour"], stylist["end_hour"])
+    )
+    unpaid = list(data["unpaid"])
+    customer_cycle = itertools.cycle(customers)
+    email_cycle = itertools.cycle(data["customers"])
+
+    async def availability(client):
+        stylist, service = rng.choice(stylists), rng.choice(services)
+        day = today + timedelta(days=rng.randrange(UPCOMING_DAYS))
+        return await client.get("/bookings/availability", params={
+            "service_id": service["id"], "stylist_id": stylist["id"], "date": day.isoformat(),
+        })
+
+    async def booking_create(client):
+        start, stylist_id = next(fresh)
+        res = await client.post("/bookings/", headers=next(customer_cycle), json={
+            "service_id": hour_service["id"], "stylist_id": stylist_id, "start_time": start.isoformat(),
+        })
+        if res.status_code == 200:
+            unpaid.append(res.json()["id"])
+        return res
+
+    async def payment(client):
+        if not unpaid:
+            return None
+        return await client.post(f"/bookings/{unpaid.pop()}/pay", json={"amount": 0, **CARD})
+
+    async def login_scenario(client):
+        return await client.post("/auth/login", data={"username": next(email_cycle), "password": PASSWORD})
+
+    async def admin_bookings(client):
+        params = {"limit": 50}
+        if rng.random() < 0.5:
+            params.update(stylist_id=rng.choice(stylists)["id"], status="completed")
+        return await client.get("/admin/bookings", headers=owner, params=params)
+
+    async def admin_revenue(client):
+        return await client.get("/admin/reports/revenue", headers=owner, params={"period": "month", "by": "stylist"})
+
+    return [
+        Scenario("availability", availability),
+        Scenario("booking_create", booking_create),
+        Scenario("payment", payment),
+        Scenario("login", login_scenario),
+        Scenario("admin_bookings", admin_bookings),
+        Scenario("admin_revenue", admin_revenue),
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(base_url: str, data: dict, args) -> Dict[str, dict]:
+    from app.config import settings
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        owner = await login(client, settings.ADMIN_EMAIL, settings.ADMIN_PASSWORD)
+        customers = [await login(client, email) for email in data["customers"][:args.concurrency]]
+        results = {}
+        for scenario in scenarios(data, rng, owner, customers):
+            if args.only and scenario.name not in args.only:
+                continue
+            results[scenario.name] = await drive(client, scenario, args.seconds, args.concurrency, args.warmup)
+            r = results[scenario.name]
+            print(f"{scenario.name:15} {r['throughput_rps']:9.1f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} "
+                  f"{r['p99_ms']:9.1f} {r['requests']:8d} {r['errors']:7d}", flush=True)
+        return results
+
+
+def run(args) -> int:
+    from benchmarks.async_vs_sync import serve
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="salon-bench-"), "bench.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    os.environ.update(env)
+    began = time.perf_counter()
+    data = seed(args, random.Random(args.seed))
+    counts = data["counts"]
+    print(f"seeded {counts['bookings']} bookings, {counts['payments']} payments, {counts['customers']} customers, "
+          f"{counts['stylists']} stylists in {time.perf_counter() - began:.1f}s ({db_path})")
+
+    port = free_port()
+    # The server's stdout carries mock-mode emails when SMTP is not configured.
+    proc = serve("benchmarks.async_vs_sync:async_app_factory", port, env, stdout=subprocess.DEVNULL)
+    print(f"{args.concurrency} clients, {args.seconds:.0f}s per scenario")
+    print(f"{'scenario':15} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'requests':>8} {'errors':>7}")
+    try:
+        results = asyncio.run(run_scenarios(f"http://127.0.0.1:{port}", data, args))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seconds": args.seconds,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "dataset": {"months": args.months, "fill": args.fill, "services": args.services, **counts},
+        },
+        "scenarios": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.out}")
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["meta"].get("dataset") != candidate["meta"].get("dataset"):
+        print("warning: the two runs used different datasets")
+    regressions = []
+    print(f"{'scenario':15} {'req/s':>19} {'change':>8} {'p95 ms':>19} {'change':>8}")
+    for name, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(name)
+        if after is None:
+            print(f"{name:15} missing from {args.candidate}")
+            continue
+        rps = relative(before["throughput_rps"], after["throughput_rps"])
+        p95 = relative(before["p95_ms"], after["p95_ms"])
+        slower = p95 > args.threshold and after["p95_ms"] - before["p95_ms"] >= args.min_ms
+        flag = "  REGRESSION" if slower or rps < -args.threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:15} {before['throughput_rps']:9.1f}->{after['throughput_rps']:<9.1f} {rps:+8.1%} "
+              f"{before['p95_ms']:9.1f}->{after['p95_ms']:<9.1f} {p95:+8.1%}{flag}")
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}" + (f": {', '.join(regressions)}" if regressions else ""))
+    return 1 if regressions else 0
+
+
+def relative(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed a scratch database and load-test the app")
+    run_parser.add_argument("--stylists", type=int, default=20)
+    run_parser.add_argument("--services", type=int, default=len(SERVICES), choices=range(2, len(SERVICES) + 1), metavar=f"2-{len(SERVICES)}")
+    run_parser.add_argument("--customers", type=int, default=500)
+    run_parser.add_argument("--months", type=int, default=6, help="months of booking history")
+    run_parser.add_argument("--fill", type=float, default=0.6, help="share of bookable slots taken")
+    run_parser.add_argument("--seconds", type=float, default=10, help="per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--warmup", type=int, default=20, help="untimed requests before each scenario")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--only", nargs="+", metavar="SCENARIO", help="run just these scenarios")
+    run_parser.add_argument("--out", help="write results as JSON")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="relative p95 / throughput change tolerated")
+    compare_parser.add_argument("--min-ms", type=float, default=1.0, help="ignore p95 increases smaller than this")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
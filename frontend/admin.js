@@ -67,12 +67,22 @@ async function createService(evt){
   } catch(e) { console.error(e); }
 }
 
-async function listUsers(){
+const PAGE_SIZE = 50;
+let usersCursor = null;
+let loadedUsers = [];
+
+async function listUsers(more){
   try {
-      const res = await fetch(API+"/admin/users", { headers:{ 'Authorization':'Bearer '+token() }});
-      const txt = await res.text();
-      document.getElementById('usersOut').textContent = txt;
-  } catch(e) { showToast("Error loading users", "error"); }
+      if(!more){ usersCursor = null; loadedUsers = []; }
+      const params = new URLSearchParams({ limit: PAGE_SIZE });
+      if(usersCursor) params.set('cursor', usersCursor);
+      const res = await fetch(API+"/admin/users?"+params, { headers:{ 'Authorization':'Bearer '+token() }});
+      if(!res.ok) throw new Error((await res.json()).detail || res.statusText);
+      loadedUsers = loadedUsers.concat(await res.json());
+      usersCursor = res.headers.get('X-Next-Cursor');
+      document.getElementById('usersOut').textContent = JSON.stringify(loadedUsers);
+      document.getElementById('usersMore').style.display = usersCursor ? '' : 'none';
+  } catch(e) { showToast("Error loading users: "+e.message, "error"); }
 }
 
 
@@ -247,13 +257,38 @@ async function submitEditStylist(evt) {
     }
 }
 
-async function loadAllBookings(){
+let bookingsCursor = null;
+let loadedBookings = [];
+
+function bookingFilters(){
+  const params = new URLSearchParams({ limit: PAGE_SIZE });
+  const status = document.getElementById('bkFilterStatus').value;
+  const from = document.getElementById('bkFilterFrom').value;
+  const to = document.getElementById('bkFilterTo').value;
+  if(status) params.set('status', status);
+  if(from) params.set('date_from', from);
+  if(to) params.set('date_to', to);
+  return params;
+}
+
+async function loadAllBookings(more){
   const out = document.getElementById('allBookingsTable');
-  out.innerHTML = '<p class="text-muted">Loading...</p>';
+  const moreBtn = document.getElementById('bookingsMore');
+  if(!more){
+    bookingsCursor = null;
+    loadedBookings = [];
+    out.innerHTML = '<p class="text-muted">Loading...</p>';
+  }
   
   try{
-    const res = await fetch(API+"/admin/bookings", { headers:{ 'Authorization':'Bearer '+token() }});
-    const data = await res.json();
+    const params = bookingFilters();
+    if(bookingsCursor) params.set('cursor', bookingsCursor);
+    const res = await fetch(API+"/admin/bookings?"+params, { headers:{ 'Authorization':'Bearer '+token() }});
+    if(!res.ok) throw new Error((await res.json()).detail || res.statusText);
+    loadedBookings = loadedBookings.concat(await res.json());
+    bookingsCursor = res.headers.get('X-Next-Cursor');
+    moreBtn.style.display = bookingsCursor ? '' : 'none';
+    const data = loadedBookings;
     
     if(!data || data.length === 0) {
         out.innerHTML = '<p class="text-muted">No bookings found.</p>';
@@ -317,7 +352,10 @@ async function deleteBooking(id){
 
 let walkinService = null;
 let walkinStylist = null;
+// False until the owner picks a stylist; until then walkinStylist follows whichever slot was clicked.
+let walkinStylistChosen = false;
 let walkinSelectedStart = null;
+let walkinStylists = [];
 
 function updateWalkinConfirmation(){
   document.getElementById('walkinServiceId').value = walkinService?.id || '';
@@ -357,6 +395,7 @@ async function loadStylists(evt){
   try {
       const res = await fetch(API+"/stylists/");
       const data = await res.json();
+      walkinStylists = data;
       const wrap = document.getElementById('walkinStylistList');
       wrap.innerHTML = '';
       
@@ -368,6 +407,7 @@ async function loadStylists(evt){
         btn.textContent = st.display_name;
         btn.onclick = () => {
           walkinStylist = st;
+          walkinStylistChosen = true;
           Array.from(wrap.children).forEach(c => c.classList.remove('selected'));
           btn.classList.add('selected');
           updateWalkinConfirmation();
@@ -377,6 +417,25 @@ async function loadStylists(evt){
   } catch(e) { console.error(e); }
 }
 
+// Walk-in slots are fetched per week and cached, so flipping between nearby days costs no request.
+const walkinSlotWeeks = {};
+function isoDate(dt){ return `${dt.getFullYear()}-${String(dt.getMonth()+1).padStart(2,'0')}-${String(dt.getDate()).padStart(2,'0')}`; }
+
+async function fetchWalkinWeek(params, date){
+  const key = params.toString();
+  const cached = walkinSlotWeeks[key];
+  if (cached && date >= cached.start && date <= cached.end) return cached.slots;
+  const endDt = new Date(date+'T00:00:00'); endDt.setDate(endDt.getDate()+6);
+  const end = isoDate(endDt);
+  const query = new URLSearchParams(params);
+  query.set('start_date', date);
+  query.set('end_date', end);
+  const res = await fetch(`${API}/bookings/availability?${query.toString()}`, { headers:{ 'Authorization':'Bearer '+token() }});
+  const slots = await res.json();
+  walkinSlotWeeks[key] = { start: date, end, slots };
+  return slots;
+}
+
 async function loadWalkinSlots(){
   const svcId = walkinService?.id;
   const date = document.getElementById('walkin-date').value;
@@ -386,18 +445,18 @@ async function loadWalkinSlots(){
   slotsEl.innerHTML = '<p class="text-muted">Loading...</p>';
   selectedEl.style.display = 'none';
   walkinSelectedStart = null;
+  if (!walkinStylistChosen) walkinStylist = null;
 
   if(!svcId || !date){ 
       slotsEl.innerHTML = '<p class="text-muted">Please select service and date.</p>';
       return; 
   }
 
-  const params = new URLSearchParams({ service_id: String(svcId), date });
-  if (walkinStylist?.id) params.set('stylist_id', String(walkinStylist.id));
+  const params = new URLSearchParams({ service_id: String(svcId) });
+  if (walkinStylistChosen) params.set('stylist_id', String(walkinStylist.id));
 
   try{
-    const res = await fetch(`${API}/bookings/availability?${params.toString()}`, { headers:{ 'Authorization':'Bearer '+token() }});
-    const slots = await res.json();
+    const slots = (await fetchWalkinWeek(params, date)).filter(s => s.start_time.startsWith(date));
     slotsEl.innerHTML = '';
     
     if (slots.length === 0){ slotsEl.innerHTML = '<p class="text-muted">No slots available.</p>'; return; }
@@ -412,6 +471,9 @@ async function loadWalkinSlots(){
         btn.classList.add('selected');
         
         walkinSelectedStart = slot.start_time;
+        if (!walkinStylistChosen && slot.stylist_ids.length) {
+          walkinStylist = walkinStylists.find(st => st.id === slot.stylist_ids[0]) || { id: slot.stylist_ids[0], display_name: `Stylist #${slot.stylist_ids[0]}` };
+        }
         
         selectedEl.style.display = 'inline-block';
         selectedEl.textContent = `Selected: ${new Date(slot.start_time).toLocaleTimeString([], {hour:'2-digit', minute:'2-digit'})}`;
@@ -452,6 +514,7 @@ async function createWalkin(evt){
         : `<p style="color:red">Error: ${txt}</p>`;
       
       if(res.ok) {
+          Object.keys(walkinSlotWeeks).forEach(k => delete walkinSlotWeeks[k]);
           showToast("Walk-in booking created", "success");
           loadAllBookings();
       }
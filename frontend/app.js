@@ -79,11 +79,26 @@ async function populateBookingDropdowns() {
         document.getElementById('bkSelectService').innerHTML = '<option value="">-- Choose Service --</option>' + 
             services.map(s => `<option value="${s.id}" data-name="${s.name}" data-price="${s.price}">${s.name} ($${s.price})</option>`).join('');
         const resSt = await fetch(api()+"/stylists/"); const stylists = await resSt.json();
-        document.getElementById('bkSelectStylist').innerHTML = '<option value="">-- Choose Stylist --</option>' + 
+        document.getElementById('bkSelectStylist').innerHTML = '<option value="">-- Choose Stylist --</option><option value="any" data-name="Any stylist">Any stylist</option>' + 
             stylists.map(s => `<option value="${s.id}" data-name="${s.display_name}">${s.display_name}</option>`).join('');
     } catch(e) {}
 }
 
+// One availability call covers a week; picking another day in that week is served from memory.
+const slotWeeks = {};
+function clearSlotWeeks() { Object.keys(slotWeeks).forEach(k => delete slotWeeks[k]); }
+function isoDate(dt) { return `${dt.getFullYear()}-${String(dt.getMonth()+1).padStart(2,'0')}-${String(dt.getDate()).padStart(2,'0')}`; }
+async function fetchWeekSlots(sid, stid, date) {
+    const key = `${sid}|${stid}`; const cached = slotWeeks[key];
+    if (cached && date >= cached.start && date <= cached.end) return cached.slots;
+    const endDt = new Date(date+'T00:00:00'); endDt.setDate(endDt.getDate()+6); const end = isoDate(endDt);
+    const stylistParam = stid === 'any' ? '' : `&stylist_id=${stid}`;
+    const res = await fetch(`${api()}/bookings/availability?service_id=${sid}${stylistParam}&start_date=${date}&end_date=${end}`);
+    const slots = await res.json();
+    slotWeeks[key] = { start: date, end, slots };
+    return slots;
+}
+
 async function autoLoadSlots() {
     const sid = document.getElementById('bkSelectService').value;
     const stid = document.getElementById('bkSelectStylist').value;
@@ -96,8 +111,7 @@ async function autoLoadSlots() {
     slotsArea.style.display = 'block'; grid.innerHTML = ''; msg.style.display = 'block'; msg.textContent = 'Checking availability...';
 
     try {
-        const res = await fetch(`${api()}/bookings/availability?service_id=${sid}&date=${date}&stylist_id=${stid}`);
-        const slots = await res.json();
+        const slots = (await fetchWeekSlots(sid, stid, date)).filter(s => s.start_time.startsWith(date));
         if (!slots.length) { msg.textContent = 'No slots available.'; return; }
         msg.style.display = 'none';
         slots.forEach(slot => {
@@ -105,21 +119,22 @@ async function autoLoadSlots() {
             const btn = document.createElement('button');
             btn.type = 'button'; btn.className = 'time-chip'; btn.textContent = timeLabel;
             btn.style.margin="5px"; btn.style.padding="10px"; btn.style.border="1px solid #ccc"; btn.style.background="white"; btn.style.cursor="pointer";
-            btn.onclick = () => selectTimeChip(btn, slot.start_time, timeLabel);
+            const stylistId = stid === 'any' ? slot.stylist_ids[0] : stid;
+            btn.onclick = () => selectTimeChip(btn, slot.start_time, timeLabel, stylistId);
             grid.appendChild(btn);
         });
     } catch(e) { msg.textContent = 'Error loading slots.'; }
 }
 
-function selectTimeChip(element, isoTime, timeLabel) {
+function selectTimeChip(element, isoTime, timeLabel, stylistId) {
     document.querySelectorAll('.time-chip').forEach(el => { el.style.background="white"; el.style.color="black"; });
     element.style.background="#6366f1"; element.style.color="white";
     document.getElementById('bkStart').value = isoTime;
     document.getElementById('bkServiceId').value = document.getElementById('bkSelectService').value;
-    document.getElementById('bkStylistId').value = document.getElementById('bkSelectStylist').value;
+    document.getElementById('bkStylistId').value = stylistId;
     
     const svcOpt = document.getElementById('bkSelectService').selectedOptions[0];
-    const stOpt = document.getElementById('bkSelectStylist').selectedOptions[0];
+    const stOpt = document.querySelector(`#bkSelectStylist option[value="${stylistId}"]`);
     document.getElementById('sumService').textContent = svcOpt ? svcOpt.dataset.name : '';
     document.getElementById('sumStylist').textContent = stOpt ? stOpt.dataset.name : '';
     document.getElementById('sumTime').textContent = timeLabel;
@@ -151,6 +166,7 @@ async function createGuestBookingLogic() {
     try {
         const res = await fetch(api()+"/bookings/guest", { method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify(payload)});
         const data = await res.json();
+        if(res.ok) clearSlotWeeks();
         if(res.ok) { showToast("Reserved! Proceed to payment.", "success"); preparePayment(data.id); }
         else showToast("Failed: "+data.detail, "error");
     } catch(e) { showToast("Error", "error"); }
@@ -166,6 +182,7 @@ async function createUserBookingLogic() {
     try {
         const res = await fetch(api()+"/bookings/", { method:'POST', headers:{'Content-Type':'application/json', 'Authorization':'Bearer '+token}, body:JSON.stringify(payload)});
         const data = await res.json();
+        if(res.ok) clearSlotWeeks();
         if(res.ok) { showToast("Reserved! Proceed to payment.", "success"); loadMyBookings(); preparePayment(data.id); }
         else showToast("Failed", "error");
     } catch(e) { showToast("Error", "error"); }
@@ -226,11 +243,20 @@ function showToast(msg, type='success'){
     t.className='toast show '+type; t.textContent=msg; setTimeout(()=>t.className='toast',3000); 
 }
 function setLoading(btn, l){ if(btn){ if(l){btn.dataset.tx=btn.innerText;btn.innerText="..."}else{btn.innerText=btn.dataset.tx||"Submit"} btn.disabled=l; } }
-async function loadMyBookings(){
+// /bookings/me is paginated newest first; "Load more" follows X-Next-Cursor.
+let myBookings = [];
+let myBookingsCursor = null;
+async function loadMyBookings(more){
     if(!token) return;
+    if(!more){ myBookings = []; myBookingsCursor = null; }
     try {
-        const res = await fetch(api()+"/bookings/me", { headers:{'Authorization':'Bearer '+token} });
-        const data = await res.json();
+        const params = new URLSearchParams();
+        if(myBookingsCursor) params.set('cursor', myBookingsCursor);
+        const res = await fetch(api()+"/bookings/me?"+params, { headers:{'Authorization':'Bearer '+token} });
+        myBookings = myBookings.concat(await res.json());
+        myBookingsCursor = res.headers.get('X-Next-Cursor');
+        document.getElementById('myBookingsMore').style.display = myBookingsCursor ? '' : 'none';
+        const data = myBookings;
         document.getElementById('myBookingsList').innerHTML = data.length ? 
             `<table>${data.map(b=>`<tr><td>#${b.id}</td><td>${b.status}</td><td>${b.status==='pending'?`<button onclick="preparePayment(${b.id})">Pay</button>`:''}</td></tr>`).join('')}</table>` 
             : 'No bookings';
@@ -63,17 +63,35 @@ async function loadStylists(){
   });
 }
 
+// Availability is fetched a week at a time; days inside the cached week need no request.
+const slotWeeks = {};
+
+function isoDate(dt){
+  return `${dt.getFullYear()}-${String(dt.getMonth()+1).padStart(2,'0')}-${String(dt.getDate()).padStart(2,'0')}`;
+}
+
+async function fetchWeekSlots(serviceId, stylistId, d){
+  const key = `${serviceId}|${stylistId}`;
+  const cached = slotWeeks[key];
+  if(cached && d >= cached.start && d <= cached.end) return cached.slots;
+  const endDt = new Date(d+'T00:00:00'); endDt.setDate(endDt.getDate()+6);
+  const url = new URL(API+"/bookings/availability");
+  url.searchParams.set('service_id', serviceId);
+  url.searchParams.set('stylist_id', stylistId);
+  url.searchParams.set('start_date', d);
+  url.searchParams.set('end_date', isoDate(endDt));
+  const res = await fetch(url);
+  const slots = await res.json();
+  slotWeeks[key] = { start: d, end: isoDate(endDt), slots };
+  return slots;
+}
+
 async function loadSlots(){
   if(!selectedService){ alert('Select a service first'); return; }
   if(!selectedStylist){ alert('Please choose a stylist first'); return; }
   const d = document.getElementById('availDate').value;
   if(!d){ alert('Please pick a date'); return; }
-  const url = new URL(API+"/bookings/availability");
-  url.searchParams.set('service_id', selectedService.id);
-  url.searchParams.set('date', d);
-  url.searchParams.set('stylist_id', selectedStylist.id);
-  const res = await fetch(url);
-  const slots = await res.json();
+  const slots = (await fetchWeekSlots(selectedService.id, selectedStylist.id, d)).filter(s => s.start_time.startsWith(d));
   const grid = document.getElementById('slotGrid');
   grid.innerHTML = '';
   if(slots.length === 0){ grid.textContent = 'No available slots'; return; }
@@ -87,6 +105,27 @@ async function loadSlots(){
   });
 }
 
+async function loadMonth(){
+  if(!selectedService){ alert('Select a service first'); return; }
+  const d = document.getElementById('availDate').value || isoDate(new Date());
+  const url = new URL(API+"/bookings/calendar");
+  url.searchParams.set('service_id', selectedService.id);
+  url.searchParams.set('month', d.slice(0, 7));
+  if(selectedStylist) url.searchParams.set('stylist_id', selectedStylist.id);
+  const res = await fetch(url);
+  const days = await res.json();
+  const grid = document.getElementById('monthGrid');
+  grid.innerHTML = '';
+  days.filter(day => day.free_slots > 0).forEach(day => {
+    const btn = document.createElement('button');
+    btn.className = 'slot-btn';
+    btn.textContent = `${day.date.slice(8)} (${day.free_slots})`;
+    btn.onclick = () => { document.getElementById('availDate').value = day.date; if(selectedStylist) loadSlots(); };
+    grid.appendChild(btn);
+  });
+  if(!grid.children.length) grid.textContent = 'No openings this month';
+}
+
 async function createBooking(evt){
   evt && evt.preventDefault();
   if(!selectedService || !selectedStylist || !selectedStart){ alert('Select service, stylist and timeslot'); return; }
@@ -99,6 +138,7 @@ async function createBooking(evt){
     method:'POST', headers:{ 'Content-Type':'application/json', 'Authorization':'Bearer '+token() },
     body: JSON.stringify(payload),
   });
+  if(res.ok) delete slotWeeks[`${payload.service_id}|${payload.stylist_id}`];
   document.getElementById('bkOut').textContent = await res.text();
 }
 
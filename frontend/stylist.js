@@ -10,18 +10,31 @@ try {
         window.location.href = '/';
     }
 } catch(e) { window.location.href = '/auth'; }
-async function loadSchedule() {
+// The schedule is paginated newest first; "Load more" follows X-Next-Cursor.
+let scheduleBookings = [];
+let scheduleCursor = null;
+
+async function loadSchedule(more) {
     const container = document.getElementById('scheduleTable');
-    container.innerHTML = '<p class="text-muted">Updating...</p>';
+    if(!more) {
+        scheduleBookings = [];
+        scheduleCursor = null;
+        container.innerHTML = '<p class="text-muted">Updating...</p>';
+    }
 
     try {
-        const res = await fetch(`${API}/bookings/stylist-schedule`, {
+        const params = new URLSearchParams();
+        if(scheduleCursor) params.set('cursor', scheduleCursor);
+        const res = await fetch(`${API}/bookings/stylist-schedule?${params}`, {
             headers: { 'Authorization': 'Bearer ' + token }
         });
         
         if(!res.ok) throw new Error('Failed to load');
         
-        const bookings = await res.json();
+        scheduleBookings = scheduleBookings.concat(await res.json());
+        scheduleCursor = res.headers.get('X-Next-Cursor');
+        document.getElementById('scheduleMore').style.display = scheduleCursor ? '' : 'none';
+        const bookings = scheduleBookings;
         
         if(bookings.length === 0) {
             container.innerHTML = '<p class="text-muted">No bookings assigned yet.</p>';
@@ -78,4 +91,4 @@ function logout() {
     window.location.href = '/auth';
 }
 
-document.addEventListener('DOMContentLoaded', loadSchedule);
\ No newline at end of file
+document.addEventListener('DOMContentLoaded', () => loadSchedule());
\ No newline at end of file
@@ -1,4 +1,27 @@
-import os, sys
+import os, sys, tempfile
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+# Keep the suite off the shared salon.db: every run gets its own database file.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="salon-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DB_DIR, 'salon.db')}")
+
+import asyncio
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seeded_db():
+    from app.init import init
+    init()
+    yield
+    from app.database import async_engine
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog():
+    """Tests insert services and stylists straight into the database, behind the catalog cache's back."""
+    from app.catalog import catalog_cache
+    catalog_cache.bump()
@@ -0,0 +1,53 @@
+import gzip
+import re
+from fastapi.testclient import TestClient
+from app import assets
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_pages_reference_fingerprinted_immutable_assets():
+    page = client.get("/admin", headers={"Accept-Encoding": "identity"})
+    assert page.status_code == 200 and page.headers["Cache-Control"] == "no-cache"
+    assert "/static/" not in page.text
+    script = re.search(r'src="(/assets/admin\.[0-9a-f]{12}\.js)"', page.text)[1]
+
+    res = client.get(script, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Cache-Control"] == assets.IMMUTABLE
+    assert res.headers["Content-Encoding"] == "gzip" and res.headers["Vary"] == "Accept-Encoding"
+    assert res.content == (assets.FRONTEND_DIR / "admin.js").read_bytes()
+    assert len(res.headers.get("content-length", "")) and int(res.headers["content-length"]) < len(res.content)
+
+    index = client.get("/").text
+    assert "?v=" not in index and re.search(r'href="/assets/styles\.[0-9a-f]{12}\.css"', index)
+    assert client.get("/assets/admin.000000000000.js").status_code == 404
+
+
+def test_entry_pages_revalidate_with_etags():
+    first = client.get("/book", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+    again = client.get("/book", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    plain = client.get("/book", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert plain.status_code == 200 and plain.headers["ETag"] != etag
+
+    legacy = client.get("/frontend/admin.html")
+    assert legacy.status_code == 200 and "/assets/admin." in legacy.text
+    assert client.get("/static/styles.css").headers["Cache-Control"] == "no-cache"
+    assert client.get("/static/missing.js").status_code == 404
+
+
+def test_edits_get_a_new_name_and_old_names_keep_working(tmp_path):
+    (tmp_path / "page.html").write_text('<script src="/static/app.js?v=1"></script>')
+    (tmp_path / "app.js").write_text("console.log(1);" * 40)
+    bundle = assets.AssetBundle(tmp_path)
+    bundle.refresh()
+    old = bundle.manifest["app.js"]
+    assert f"/assets/{old}" in bundle.file("page.html").variants["identity"].decode()
+
+    (tmp_path / "app.js").write_text("console.log(2);" * 40)
+    new_page = bundle.file("page.html").variants["identity"].decode()
+    new = bundle.manifest["app.js"]
+    assert new != old and f"/assets/{new}" in new_page and bundle.builds == 2
+    assert gzip.decompress(bundle.fingerprinted(old).variants["gzip"]) == b"console.log(1);" * 40
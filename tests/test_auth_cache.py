@@ -0,0 +1,68 @@
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.database import async_engine
+from app.principals import TTLCache, token_cache
+
+engine = async_engine.sync_engine
+client = TestClient(app)
+
+
+def login(email, password):
+    token = client.post("/auth/login", data={"username": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def user_queries(fn):
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        res = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return res, [s for s in statements if "FROM users" in s]
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2, expires_in=0.01)
+    time.sleep(0.02)
+    assert cache.get("b") is None
+    cache.put("c", 3)
+    cache.put("d", 4)
+    assert cache.get("a") is None and cache.stats()["evictions"] == 1
+
+
+def test_role_checks_skip_the_database_once_cached():
+    headers = login("owner@salon.local", "Owner@12345")
+    client.get("/admin/cache/auth", headers=headers)
+
+    res, queries = user_queries(lambda: client.get("/admin/cache/auth", headers=headers))
+    assert res.status_code == 200
+    assert queries == []
+    assert res.json()["tokens"]["hits"] >= 1
+
+
+def test_demoted_stylist_loses_access_immediately():
+    owner = login("owner@salon.local", "Owner@12345")
+    created = client.post("/stylists/", json={
+        "email": "demote@example.com", "password": "Stylist@123", "full_name": "Demote Me",
+        "display_name": "Demote", "start_hour": 9, "end_hour": 17,
+    }, headers=owner)
+    assert created.status_code == 200, created.text
+    stylist = login("demote@example.com", "Stylist@123")
+    assert client.get("/bookings/stylist-schedule", headers=stylist).status_code == 200
+
+    assert client.delete(f"/stylists/{created.json()['id']}", headers=owner).status_code == 200
+    assert client.get("/bookings/stylist-schedule", headers=stylist).status_code == 403
+    assert client.get("/bookings/me", headers=stylist).status_code == 200
+
+
+def test_invalid_tokens_are_not_cached():
+    before = token_cache.stats()["entries"]
+    res = client.get("/bookings/me", headers={"Authorization": "Bearer not-a-token"})
+    assert res.status_code == 401
+    assert token_cache.stats()["entries"] == before
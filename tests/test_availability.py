@@ -0,0 +1,156 @@
+from datetime import datetime, date, timedelta
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.database import async_engine
+
+engine = async_engine.sync_engine
+from app import availability, occupancy
+
+client = TestClient(app)
+
+
+def test_merge_intervals_coalesces_overlaps():
+    t = lambda h, m=0: datetime(2030, 1, 7, h, m)
+    merged = availability.merge_intervals([(t(12), t(13)), (t(9), t(10)), (t(9, 30), t(11)), (t(11), t(11, 30))])
+    assert merged == [(t(9), t(11, 30)), (t(12), t(13))]
+
+
+def test_free_slots_skips_occupied_buckets():
+    stylist = SimpleNamespace(id=1, start_hour=9, end_hour=13)
+    days = [date(2030, 1, 7), date(2030, 1, 8)]
+    bitmaps = {
+        (1, days[0]): occupancy.build_bitmap(days[0], [(datetime(2030, 1, 7, 10, 30), datetime(2030, 1, 7, 11, 15))]),
+        (1, days[1]): occupancy.build_bitmap(days[1], [(datetime(2030, 1, 8, 9), datetime(2030, 1, 8, 12))]),
+    }
+    starts = [s.strftime("%d %H") for s, _ in availability.free_slots(stylist, 60, days, bitmaps)]
+    assert starts == ["07 09", "07 12", "08 12"]
+
+
+def test_occupancy_cache_evicts_least_recently_used():
+    cache = occupancy.OccupancyCache(max_entries=2, ttl_seconds=60)
+    days = [date(2030, 1, d) for d in (1, 2, 3)]
+    cache.put((1, days[0]), 1, cache.write_token())
+    cache.put((1, days[1]), 2, cache.write_token())
+    assert cache.get((1, days[0])) == 1
+    cache.put((1, days[2]), 4, cache.write_token())
+    assert cache.get((1, days[1])) is None
+    assert cache.stats()["evictions"] == 1
+
+    stale = cache.write_token()
+    cache.invalidate(1, days[0])
+    cache.put((1, days[0]), 0, stale)
+    assert cache.get((1, days[0])) is None
+
+
+def test_week_range_uses_single_booking_query():
+    stylist_id = client.get("/stylists/").json()[0]["id"]
+    service_id = client.get("/services/").json()[0]["id"]
+    start = date.today() + timedelta(days=400)
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        res = client.get("/bookings/availability", params={
+            "service_id": service_id, "stylist_id": stylist_id,
+            "start_date": start.isoformat(), "end_date": (start + timedelta(days=6)).isoformat(),
+        })
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert res.status_code == 200, res.text
+    assert {s["start_time"][:10] for s in res.json()} == {(start + timedelta(days=i)).isoformat() for i in range(7)}
+    assert sum("FROM bookings" in s for s in statements) == 1
+
+
+def test_availability_rejects_inverted_range():
+    res = client.get("/bookings/availability", params={
+        "service_id": 1, "stylist_id": 1, "start_date": "2030-01-08", "end_date": "2030-01-07",
+    })
+    assert res.status_code == 400
+
+
+def test_roster_mode_lists_free_stylists_per_slot():
+    owner = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {owner}"}
+    res = client.post("/stylists/", json={
+        "email": "roster@example.com", "password": "Roster@12345", "full_name": "Roster",
+        "display_name": "Roster", "start_hour": 10, "end_hour": 12,
+    }, headers=headers)
+    assert res.status_code in (200, 400), res.text
+    stylists = {s["display_name"]: s["id"] for s in client.get("/stylists/").json()}
+    service_id = client.get("/services/").json()[0]["id"]
+    day = date.today() + timedelta(days=401)
+
+    res = client.post("/bookings/walkin", json={
+        "service_id": service_id, "stylist_id": stylists["Roster"],
+        "start_time": datetime(day.year, day.month, day.day, 10).isoformat(), "customer_name": "Walk In",
+    }, headers=headers)
+    assert res.status_code == 200, res.text
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        res = client.get("/bookings/availability", params={"service_id": service_id, "date": day.isoformat()})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert res.status_code == 200, res.text
+    by_hour = {s["start_time"][11:13]: s["stylist_ids"] for s in res.json()}
+    assert stylists["Roster"] not in by_hour["10"]
+    assert stylists["Roster"] in by_hour["11"] and stylists["Sam"] in by_hour["11"]
+    assert all(s["stylist_id"] is None for s in res.json())
+    assert sum("FROM bookings" in s for s in statements) == 1
+
+
+def test_cache_serves_repeat_reads_and_tracks_writes():
+    owner = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {owner}"}
+    stylist_id = client.get("/stylists/").json()[0]["id"]
+    service_id = client.get("/services/").json()[0]["id"]
+    day = date.today() + timedelta(days=402)
+    params = {"service_id": service_id, "stylist_id": stylist_id, "date": day.isoformat()}
+    assert client.get("/bookings/availability", params=params).status_code == 200
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        slots = client.get("/bookings/availability", params=params).json()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert not any("FROM bookings" in s for s in statements)
+
+    res = client.post("/bookings/walkin", json={
+        "service_id": service_id, "stylist_id": stylist_id,
+        "start_time": slots[0]["start_time"], "customer_name": "Cached",
+    }, headers=headers)
+    assert res.status_code == 200, res.text
+    starts = [s["start_time"] for s in client.get("/bookings/availability", params=params).json()]
+    assert slots[0]["start_time"] not in starts
+
+    res = client.put(f"/bookings/{res.json()['id']}/cancel", headers=headers)
+    assert res.status_code == 200, res.text
+    starts = [s["start_time"] for s in client.get("/bookings/availability", params=params).json()]
+    assert slots[0]["start_time"] in starts
+
+    stats = client.get("/admin/cache/occupancy", headers=headers).json()
+    assert stats["hits"] >= 1 and stats["misses"] >= 1
+
+
+def test_month_calendar_counts_free_slots_per_day():
+    stylist = client.get("/stylists/").json()[0]
+    service = [s for s in client.get("/services/").json() if s["duration_minutes"] == 60][0]
+    res = client.get("/bookings/calendar", params={
+        "service_id": service["id"], "month": "2034-02", "stylist_id": stylist["id"], "per_stylist": True,
+    })
+    assert res.status_code == 200, res.text
+    days = res.json()
+    assert len(days) == 28
+    hours = stylist["end_hour"] - stylist["start_hour"]
+    assert all(d["free_slots"] == hours and d["stylists"] == {str(stylist["id"]): hours} for d in days)
+
+    assert client.get("/bookings/calendar", params={"service_id": service["id"], "month": "2034-13"}).status_code == 422
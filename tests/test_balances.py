@@ -0,0 +1,110 @@
+import os
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+from app import balances, models
+from app.database import SessionLocal, engine
+from app.main import app
+from app.migrations import run_migrations
+from conftest import TEST_DB_DIR
+
+client = TestClient(app)
+CARD = {"amount": 0, "card_number": "4242424242424242", "expiry_month": 12, "expiry_year": 2099, "cvv": "123", "cardholder_name": "Bal"}
+
+
+def owner_headers():
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def new_booking(price, day):
+    with SessionLocal() as db:
+        service_id = db.query(models.Service.id).filter(models.Service.is_active == True).first()[0]
+        booking = models.Booking(
+            customer_name="Balance", service_id=service_id, service_price_snapshot=price, total_amount=price,
+            start_time=datetime(2035, 2, day, 10), end_time=datetime(2035, 2, day, 11),
+        )
+        db.add(booking)
+        db.commit()
+        return booking.id, booking.balance_due
+
+
+def test_payments_move_the_materialized_balance():
+    booking_id, balance = new_booking(19.99, 1)
+    assert balance == 19.99
+
+    assert client.post(f"/bookings/{booking_id}/pay-deposit", json=CARD).status_code == 200
+    assert client.post(f"/bookings/{booking_id}/pay-deposit", json=CARD).status_code == 400
+    with SessionLocal() as db:
+        booking = db.get(models.Booking, booking_id)
+        assert (booking.amount_paid, booking.balance_due) == (6.0, 13.99)
+
+    paid = client.post(f"/bookings/{booking_id}/pay", json=CARD)
+    assert paid.status_code == 200 and paid.json()["amount"] == 13.99
+    assert client.post(f"/bookings/{booking_id}/pay", json=CARD).status_code == 400
+    with SessionLocal() as db:
+        booking = db.get(models.Booking, booking_id)
+        assert (booking.amount_paid, booking.balance_due) == (19.99, 0)
+        assert balances.drift(db) == []
+
+
+def test_a_stale_paid_total_is_not_applied_twice():
+    booking_id, _ = new_booking(40, 2)
+    with SessionLocal() as db:
+        assert db.execute(balances.settle(booking_id, 12, 0)).rowcount == 1
+        assert db.execute(balances.settle(booking_id, 40, 0)).rowcount == 0
+        assert db.get(models.Booking, booking_id).balance_due == 28
+        db.rollback()  # no Payment row behind it
+
+
+def test_unpaid_listing_and_drift_check():
+    headers = owner_headers()
+    booking_id, _ = new_booking(25, 3)
+    statements = []
+    listener = lambda conn, cursor, stmt, params, *args: statements.append((stmt, params))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        unpaid = client.get("/admin/bookings/unpaid", headers=headers, params={"limit": 500})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert booking_id in [b["id"] for b in unpaid.json()]
+    assert all(b["balance_due"] > 0 and b["status"] != "cancelled" for b in unpaid.json())
+    with engine.connect() as conn:
+        stmt, params = statements[-1]
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + stmt, params))
+        assert "ix_bookings_unpaid_time" in plan and "TEMP B-TREE" not in plan
+
+    with SessionLocal() as db:
+        db.execute(text("UPDATE bookings SET amount_paid = 5 WHERE id = :id"), {"id": booking_id})
+        db.commit()
+    report = client.get("/admin/balances/check", headers=headers).json()
+    assert [row["id"] for row in report["mismatches"]] == [booking_id]
+    with engine.begin() as conn:
+        balances.backfill(conn, [booking_id])
+    assert client.get("/admin/balances/check", headers=headers).json() == {"mismatches": []}
+
+
+def test_migration_backfills_existing_bookings():
+    legacy = create_engine(f"sqlite:///{os.path.join(TEST_DB_DIR, 'balances-legacy.db')}")
+    models.Base.metadata.create_all(bind=legacy)
+    with legacy.begin() as conn:
+        conn.execute(text("DROP INDEX ix_bookings_unpaid_time"))
+        conn.execute(text("ALTER TABLE bookings DROP COLUMN amount_paid"))
+        conn.execute(text("ALTER TABLE bookings DROP COLUMN balance_due"))
+        conn.execute(text(
+            "INSERT INTO bookings (id, service_id, service_price_snapshot, total_amount, start_time, end_time, status, is_walkin, created_at, updated_at) "
+            "VALUES (1, 1, 30, 30, '2035-01-01 10:00', '2035-01-01 11:00', 'confirmed', 0, '2035-01-01', '2035-01-01'), "
+            "(2, 1, 50, 50, '2035-01-02 10:00', '2035-01-02 11:00', 'pending', 0, '2035-01-01', '2035-01-01')"
+        ))
+        conn.execute(text(
+            "INSERT INTO payments (booking_id, amount, status, created_at) "
+            "VALUES (1, 9, 'success', '2035-01-01'), (1, 21, 'success', '2035-01-01'), (2, 15, 'failed', '2035-01-01')"
+        ))
+
+    run_migrations(legacy)
+    assert {"amount_paid", "balance_due"} <= {c["name"] for c in inspect(legacy).get_columns("bookings")}
+    with Session(bind=legacy) as db:
+        rows = db.execute(text("SELECT id, amount_paid, balance_due FROM bookings ORDER BY id")).all()
+        assert [tuple(r) for r in rows] == [(1, 30, 0), (2, 0, 50)]
+        assert balances.drift(db) == []
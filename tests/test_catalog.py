@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.catalog import catalog_cache
+from app.database import async_engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def owner_headers():
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def count_statements(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_unchanged_catalog_revalidates_without_queries():
+    for path in ("/services/", "/stylists/"):
+        first = client.get(path)
+        etag = first.headers["ETag"]
+        assert first.status_code == 200 and first.headers["Cache-Control"] == "public, no-cache"
+
+        cached, statements = count_statements(lambda: client.get(path))
+        assert cached.json() == first.json() and cached.headers["ETag"] == etag and statements == []
+
+        revalidated, statements = count_statements(lambda: client.get(path, headers={"If-None-Match": etag}))
+        assert revalidated.status_code == 304 and revalidated.content == b"" and statements == []
+        assert revalidated.headers["ETag"] == etag
+
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+        assert client.get(path, headers={"If-None-Match": f'"stale", W/{etag}'}).status_code == 304
+
+
+def test_mutations_change_the_etag():
+    headers = owner_headers()
+    before = client.get("/services/")
+    version = catalog_cache.version
+    created = client.post("/services/", json={"name": "Catalog Tint", "price": 42, "duration_minutes": 30}, headers=headers)
+    assert created.status_code == 200 and catalog_cache.version == version + 1
+
+    after = client.get("/services/", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200 and "Catalog Tint" in [s["name"] for s in after.json()]
+
+    service_id = created.json()["id"]
+    client.put(f"/services/{service_id}", json={"is_active": False}, headers=headers)
+    hidden = client.get("/services/", headers={"If-None-Match": after.headers["ETag"]})
+    assert hidden.status_code == 200 and service_id not in [s["id"] for s in hidden.json()]
+    assert hidden.headers["ETag"] == before.headers["ETag"]
+
+    stylists = client.get("/stylists/")
+    stylist_id = stylists.json()[0]["id"]
+    client.put(f"/stylists/{stylist_id}", json={"bio": "Catalog bio"}, headers=headers)
+    changed = client.get("/stylists/", headers={"If-None-Match": stylists.headers["ETag"]})
+    assert changed.status_code == 200 and changed.json()[0]["bio"] == "Catalog bio"
+
+
+def test_encodings_get_their_own_etags(monkeypatch):
+    monkeypatch.setattr("app.catalog.settings.GZIP_MINIMUM_SIZE", 1)
+    plain = client.get("/services/", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/services/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip" and zipped.json() == plain.json()
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+    assert client.get("/services/", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]}).status_code == 200
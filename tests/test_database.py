@@ -0,0 +1,42 @@
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import settings
+from app.database import engine, async_engine, engine_options
+
+
+def pragma_values(conn):
+    return {
+        name: conn.execute(text(f"PRAGMA {name}")).scalar()
+        for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size")
+    }
+
+
+def expected():
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE.lower(),
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KIB,
+    }
+
+
+def test_sync_connections_get_engine_profile():
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    with engine.connect() as conn:
+        assert pragma_values(conn) == expected()
+
+
+def test_async_connections_share_profile_and_pool():
+    async def read():
+        async with async_engine.connect() as conn:
+            return await conn.run_sync(pragma_values)
+
+    assert isinstance(async_engine.pool, AsyncAdaptedQueuePool)
+    assert asyncio.run(read()) == expected()
+
+
+def test_memory_database_keeps_single_connection_pool():
+    options = engine_options("sqlite://", QueuePool)
+    assert "pool_size" not in options and "poolclass" not in options
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app import exports, models
+from app.database import SessionLocal, engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def seed_bookings():
+    with SessionLocal() as db:
+        service_id = db.query(models.Service.id).first()[0]
+        bookings = [
+            models.Booking(
+                customer_name=f"Export {i}", service_id=service_id, service_price_snapshot=20, total_amount=20,
+                start_time=datetime(2034, 1, 1 + i, 10), end_time=datetime(2034, 1, 1 + i, 11),
+                status=models.BookingStatus.CANCELLED.value if i % 2 else models.BookingStatus.CONFIRMED.value,
+            )
+            for i in range(5)
+        ]
+        db.add_all(bookings)
+        db.flush()
+        db.add(models.Payment(booking_id=bookings[0].id, amount=20, status=models.PaymentStatus.SUCCESS.value))
+        db.commit()
+
+
+def owner_headers():
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_ndjson_and_csv_exports_match_the_table(monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 2)
+    seed_bookings()
+    headers = owner_headers()
+    with SessionLocal() as db:
+        expected = [row[0] for row in db.query(models.Booking.id).order_by(models.Booking.id)]
+    assert len(expected) > 2
+
+    res = client.get("/admin/export/bookings", headers=headers)
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert "attachment" in res.headers["content-disposition"]
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["id"] for row in lines] == expected
+    assert {"start_time", "status", "total_amount"} <= set(lines[0])
+
+    res = client.get("/admin/export/bookings", headers=headers, params={"format": "csv", "status": "cancelled"})
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert rows and all(row["status"] == "cancelled" for row in rows)
+
+    res = client.get("/admin/export/payments", headers=headers, params={"format": "csv"})
+    assert res.text.splitlines()[0] == "id,booking_id,amount,status,provider,masked_details,created_at"
+
+
+def test_export_streams_from_one_query_in_chunks(monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_ROWS", 3)
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        chunks = list(exports.stream_rows(exports.bookings_query(), exports.ExportFormat.NDJSON))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    rows = sum(chunk.count("\n") for chunk in chunks)
+    assert len(statements) == 1
+    assert len(chunks) == -(-rows // 3)
+    assert all(chunk.count("\n") <= 3 for chunk in chunks)
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.hashing import PasswordHashPool
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_saturated_pool_rejects_immediately():
+    pool = PasswordHashPool(workers=0, queue_limit=1)
+    gate = threading.Event()
+
+    async def scenario():
+        held = [asyncio.ensure_future(pool._run(gate.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.hash("Secret@123")
+        gate.set()
+        await asyncio.gather(*held)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    pool.shutdown()
+    assert rejected.status_code == 503 and rejected.headers["Retry-After"] == "1"
+    assert pool.stats()["rejected"] == 1 and pool.stats()["in_flight"] == 0
+
+
+def test_login_upgrades_weak_hash():
+    weak = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=1000).hash("Legacy@123")
+    with SessionLocal() as db:
+        db.add(models.User(email="legacy@example.com", hashed_password=weak, role=models.Role.CUSTOMER.value))
+        db.commit()
+
+    res = client.post("/auth/login", data={"username": "legacy@example.com", "password": "Legacy@123"})
+    assert res.status_code == 200
+
+    with SessionLocal() as db:
+        stored = db.query(models.User.hashed_password).filter(models.User.email == "legacy@example.com").scalar()
+    assert stored.startswith(f"$pbkdf2-sha256${settings.PASSWORD_HASH_ROUNDS}$")
+    assert client.post("/auth/login", data={"username": "legacy@example.com", "password": "Legacy@123"}).status_code == 200
+    assert client.post("/auth/login", data={"username": "legacy@example.com", "password": "wrong"}).status_code == 401
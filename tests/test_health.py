@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app.health import schema_problem
+from app.init import init
+from app.main import app
+from conftest import ROOT, TEST_DB_DIR
+
+client = TestClient(app)
+
+
+def test_probes_answer_on_an_initialised_database():
+    assert client.get("/healthz").json() == {"status": "ok"}
+    res = client.get("/readyz")
+    assert res.status_code == 200 and res.json() == {"status": "ready"}
+
+
+def test_uninitialised_database_is_not_ready_until_init():
+    engine = create_engine(f"sqlite:///{os.path.join(TEST_DB_DIR, 'health-fresh.db')}")
+    with engine.connect() as conn:
+        assert "pending migrations" in schema_problem(conn)
+    init(engine)
+    with engine.connect() as conn:
+        assert schema_problem(conn) is None
+
+
+def test_importing_the_app_touches_no_database():
+    path = os.path.join(TEST_DB_DIR, "never-created.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=ROOT, env=env, check=True)
+    assert not os.path.exists(path)
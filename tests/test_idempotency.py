@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+import httpx
+from fastapi.testclient import TestClient
+from app import models
+from app.database import SessionLocal
+from app.idempotency import idempotency_store
+from app.main import app
+
+client = TestClient(app)
+CARD = {"amount": 0, "card_number": "4242424242424242", "expiry_month": 12, "expiry_year": 2099, "cvv": "123", "cardholder_name": "Idem"}
+
+
+def guest_payload(hour, name="Idem Guest"):
+    with SessionLocal() as db:
+        service_id = db.query(models.Service.id).filter(models.Service.is_active == True, models.Service.duration_minutes == 60).first()[0]
+        stylist = db.query(models.Stylist).filter(models.Stylist.is_active == True).first()
+    return {
+        "service_id": service_id, "stylist_id": stylist.id, "customer_name": name,
+        "start_time": datetime(2036, 4, 1, max(stylist.start_hour, min(hour, stylist.end_hour - 1))).isoformat(),
+    }
+
+
+def bookings_named(name):
+    with SessionLocal() as db:
+        return db.query(models.Booking).filter(models.Booking.customer_name == name).count()
+
+
+def test_retry_replays_the_stored_response():
+    payload = guest_payload(10, "Idem Retry")
+    first = client.post("/bookings/guest", json=payload, headers={"Idempotency-Key": "retry-1"})
+    retry = client.post("/bookings/guest", json=payload, headers={"Idempotency-Key": "retry-1"})
+    assert first.status_code == 200 and "Idempotent-Replayed" not in first.headers
+    assert retry.status_code == 200 and retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json() and bookings_named("Idem Retry") == 1
+
+    idempotency_store.cache.clear()  # a retry reaching another worker is answered from the table
+    again = client.post("/bookings/guest", json=payload, headers={"Idempotency-Key": "retry-1"})
+    assert again.json() == first.json() and again.headers["Idempotent-Replayed"] == "true"
+
+    booking_id = first.json()["id"]
+    paid = client.post(f"/bookings/{booking_id}/pay", json=CARD, headers={"Idempotency-Key": "pay-1"})
+    repaid = client.post(f"/bookings/{booking_id}/pay", json=CARD, headers={"Idempotency-Key": "pay-1"})
+    assert paid.status_code == repaid.status_code == 200 and repaid.json() == paid.json()
+    with SessionLocal() as db:
+        assert db.query(models.Payment).filter(models.Payment.booking_id == booking_id).count() == 1
+
+    other = client.post("/bookings/guest", json={**payload, "customer_name": "Someone else"}, headers={"Idempotency-Key": "retry-1"})
+    assert other.status_code == 422
+    assert client.post("/bookings/guest", json=payload, headers={"Idempotency-Key": ""}).status_code == 400
+
+
+def test_errors_are_replayed_but_server_errors_are_not(monkeypatch):
+    payload = {**guest_payload(11), "stylist_id": 999999}
+    missing = client.post("/bookings/guest", json=payload, headers={"Idempotency-Key": "err-1"})
+    assert missing.status_code == 404
+    assert client.post("/bookings/guest", json=payload, headers={"Idempotency-Key": "err-1"}).headers["Idempotent-Replayed"] == "true"
+
+    from app.routers import bookings
+    async def broken(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(bookings, "get_service", broken)
+    crashing = TestClient(app, raise_server_exceptions=False)
+    assert crashing.post("/bookings/guest", json=guest_payload(12, "Idem Crash"), headers={"Idempotency-Key": "crash-1"}).status_code == 500
+    monkeypatch.undo()
+    res = client.post("/bookings/guest", json=guest_payload(12, "Idem Crash"), headers={"Idempotency-Key": "crash-1"})
+    assert res.status_code == 200 and "Idempotent-Replayed" not in res.headers
+
+
+def test_concurrent_duplicates_collapse_to_one_execution():
+    payload = guest_payload(13, "Idem Burst")
+    executions, waits = idempotency_store.executions, idempotency_store.waits
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*[
+                ac.post("/bookings/guest", json=payload, headers={"Idempotency-Key": "burst-1"}) for _ in range(8)
+            ])
+
+    responses = asyncio.run(burst())
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert sum("Idempotent-Replayed" in r.headers for r in responses) == 7
+    assert idempotency_store.executions == executions + 1
+    assert idempotency_store.waits > waits  # duplicates arrived while the first was still running
+    assert bookings_named("Idem Burst") == 1
@@ -0,0 +1,162 @@
+import json
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from app import balances, models
+from app.database import SessionLocal, engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def owner_headers():
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_stylist(name):
+    with SessionLocal() as db:
+        user = models.User(email=f"{name.lower()}@import.local", hashed_password="x", role=models.Role.STYLIST.value)
+        db.add(user)
+        db.flush()
+        stylist = models.Stylist(user_id=user.id, display_name=name, start_hour=8, end_hour=20)
+        service = models.Service(name=f"{name} Cut", price=50.0, duration_minutes=60)
+        db.add_all([stylist, service])
+        db.commit()
+        return stylist.id, service.name
+
+
+def ndjson(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def post_import(kind, body, fmt="ndjson", headers=None):
+    res = client.post(f"/admin/import/{kind}", params={"format": fmt}, content=body.encode(), headers=headers or owner_headers())
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def test_import_users_bookings_and_payments():
+    headers = owner_headers()
+    stylist_id, service = make_stylist("Importa")
+    users = (
+        "email,full_name,role\n"
+        "ann@import.local,Ann,customer\n"
+        "ann@import.local,Ann again,customer\n"
+        "bob@import.local,Bob,owner\n"
+        "cat@import.local,Cat,\n"
+    )
+    report = post_import("users", users, "csv", headers)
+    assert (report["rows"], report["imported"], report["failed"]) == (4, 2, 2)
+    assert [e["line"] for e in report["errors"]] == [3, 4]
+    assert "already exists" in report["errors"][0]["error"]
+    # Passwordless users exist but cannot sign in until they reset their password.
+    assert client.post("/auth/login", data={"username": "cat@import.local", "password": ""}).status_code in (401, 422)
+
+    staff = [
+        {"email": "dee@import.local", "full_name": "Dee Long", "role": "stylist", "display_name": "Dee"},
+        {"email": "eve@import.local", "password": "secret-password"},
+    ]
+    client.get("/stylists/")  # warm the catalog cache; the import must invalidate it
+    report = post_import("users", ndjson(staff), headers=headers)
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert "plain-text password" in report["errors"][0]["error"]
+    # An imported stylist can be booked straight away.
+    assert "Dee" in {st["display_name"] for st in client.get("/stylists/").json()}
+
+    past, future = datetime(2024, 5, 6, 10), datetime.now().replace(microsecond=0, second=0, minute=0) + timedelta(days=40)
+    bookings = [
+        {"service": service, "stylist": "Importa", "start_time": past.isoformat(), "customer_email": "ann@import.local", "amount_paid": 50},
+        {"service": service, "stylist": "importa", "start_time": (past + timedelta(minutes=30)).isoformat(), "customer_name": "Overlap"},
+        {"service": service, "stylist": "Importa", "start_time": (past + timedelta(hours=1)).isoformat(), "customer_name": "Walk", "amount_paid": 20},
+        {"service": service, "stylist": "Importa", "start_time": future.isoformat(), "customer_email": "cat@import.local"},
+        {"service": "No such", "stylist": "Importa", "start_time": past.isoformat()},
+        {"service": service, "stylist_id": stylist_id, "start_time": "yesterday"},
+    ]
+    report = post_import("bookings", ndjson(bookings) + "{not json\n", headers=headers)
+    assert (report["rows"], report["imported"], report["failed"]) == (7, 3, 4)
+    assert {e["line"] for e in report["errors"]} == {2, 5, 6, 7}
+    assert "overlaps" in next(e["error"] for e in report["errors"] if e["line"] == 2)
+
+    # The future booking now blocks its slot for live customers too.
+    again = post_import("bookings", ndjson([{"service": service, "stylist": "Importa", "start_time": future.isoformat()}]), headers=headers)
+    assert again["imported"] == 0 and "overlaps" in again["errors"][0]["error"]
+
+    payments = [
+        {"stylist": "Importa", "start_time": (past + timedelta(hours=1)).isoformat(), "amount": 30, "provider": "legacy"},
+        {"stylist": "Importa", "start_time": datetime(2020, 1, 1, 9).isoformat(), "amount": 5},
+        {"booking_id": 10 ** 9, "amount": 5},
+    ]
+    report = post_import("payments", ndjson(payments), headers=headers)
+    assert (report["imported"], report["failed"]) == (1, 2)
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(models.Booking.customer_id, models.Booking.customer_name, models.Booking.status,
+                   models.Booking.amount_paid, models.Booking.balance_due, models.Booking.start_time)
+            .where(models.Booking.stylist_id == stylist_id).order_by(models.Booking.start_time)
+        ).all()
+        ann = db.scalar(select(models.User.id).where(models.User.email == "ann@import.local"))
+        claims = db.scalar(select(func.count()).select_from(models.SlotClaim).where(models.SlotClaim.stylist_id == stylist_id))
+    assert [(r.status, r.amount_paid, r.balance_due) for r in rows] == [
+        ("completed", 50, 0), ("completed", 50, 0), ("confirmed", 0, 50),
+    ]
+    assert rows[0].customer_id == ann and rows[1].customer_name == "Walk"
+    assert claims == 12  # only the upcoming booking holds 5-minute slot claims
+    with SessionLocal() as db:
+        ours = set(db.scalars(select(models.Booking.id).where(models.Booking.stylist_id == stylist_id)))
+        assert not ours & {row.id for row in balances.drift(db)}
+
+
+def test_import_statements_do_not_grow_with_rows():
+    stylist_id, service = make_stylist("Importb")
+    origin = datetime(2023, 1, 2, 8)
+
+    def statements_for(count, offset):
+        rows = [
+            {"service": service, "stylist_id": stylist_id, "customer_name": f"Hist {i}", "amount_paid": 50,
+             "start_time": (origin + timedelta(days=offset + i // 10, hours=i % 10)).isoformat()}
+            for i in range(count)
+        ]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            report = post_import("bookings", ndjson(rows))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert report["imported"] == count
+        return len(statements)
+
+    assert statements_for(20, 0) == statements_for(400, 100)
+
+
+def test_conflicts_inside_a_chunk_fail_row_by_row():
+    headers = owner_headers()
+    stylist_id, service = make_stylist("Importc")
+    night = datetime.now().replace(hour=23, minute=30, second=0, microsecond=0) + timedelta(days=60)
+    past = datetime(2022, 3, 4, 10)
+    rows = [
+        {"service": service, "stylist_id": stylist_id, "start_time": past.isoformat(), "customer_name": "Twice"},
+        {"service": service, "stylist_id": stylist_id, "start_time": past.isoformat(), "customer_name": "Twice"},
+        # Crosses midnight into the next row's day.
+        {"service": service, "stylist_id": stylist_id, "start_time": night.isoformat(), "customer_name": "Late"},
+        {"service": service, "stylist_id": stylist_id, "start_time": (night + timedelta(minutes=45)).isoformat(), "customer_name": "Early"},
+        # Off the 5-minute grid: history is fine, an upcoming booking is not.
+        {"service": service, "stylist_id": stylist_id, "start_time": (past + timedelta(hours=1)).isoformat(),
+         "end_time": (past + timedelta(hours=1, minutes=32)).isoformat(), "customer_name": "Odd past"},
+        {"service": service, "stylist_id": stylist_id, "start_time": (night - timedelta(hours=3)).isoformat(),
+         "end_time": (night - timedelta(hours=2, minutes=28)).isoformat(), "customer_name": "Odd upcoming"},
+        {"service": service, "stylist_id": stylist_id, "start_time": (night - timedelta(hours=2)).isoformat(), "customer_name": "After"},
+    ]
+    report = post_import("bookings", ndjson(rows), headers=headers)
+    assert (report["rows"], report["imported"], report["failed"]) == (7, 4, 3)
+    errors = {e["line"]: e["error"] for e in report["errors"]}
+    assert set(errors) == {2, 4, 6}
+    assert "overlaps" in errors[2] and "overlaps" in errors[4] and "5-minute boundary" in errors[6]
+
+    with SessionLocal() as db:
+        names = set(db.scalars(select(models.Booking.customer_name).where(models.Booking.stylist_id == stylist_id)))
+        claims = db.scalar(select(func.count()).select_from(models.SlotClaim).where(models.SlotClaim.stylist_id == stylist_id))
+    assert names == {"Twice", "Late", "Odd past", "After"}
+    assert claims == 24  # the two upcoming hour-long bookings only
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+import anyio.to_thread
+from app.metrics import Histogram, instrument_threadpool, metrics, uninstrument_threadpool
+
+client = TestClient(app)
+
+
+def owner_headers():
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def scrape(headers):
+    res = client.get("/metrics", headers=headers)
+    assert res.status_code == 200 and res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in res.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_are_owner_only():
+    assert client.get("/metrics").status_code == 401
+    client.post("/auth/register", json={"email": "metrics-customer@example.com", "password": "secret123", "full_name": "M"})
+    token = client.post("/auth/login", data={"username": "metrics-customer@example.com", "password": "secret123"}).json()["access_token"]
+    assert client.get("/metrics", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+
+
+def test_requests_are_filed_under_their_route_template():
+    headers = owner_headers()
+    metrics.reset()
+    service = client.get("/services/").json()[0]
+    stylist = client.get("/stylists/").json()[0]
+    day = (date.today() + timedelta(days=30)).isoformat()
+    for _ in range(3):
+        params = {"service_id": service["id"], "stylist_id": stylist["id"], "date": day}
+        assert client.get("/bookings/availability", params=params).status_code == 200
+    original = anyio.to_thread.run_sync
+    instrument_threadpool()
+    try:
+        client.get("/admin/bookings", headers=headers)
+    finally:
+        uninstrument_threadpool()
+    assert anyio.to_thread.run_sync is original
+    client.get("/no-such-page")
+
+    samples = scrape(headers)
+    availability = 'method="GET",route="/bookings/availability"'
+    assert samples[f'salon_http_requests_total{{{availability},status="200"}}'] == 3
+    assert samples[f"salon_http_request_duration_seconds_count{{{availability}}}"] == 3
+    assert samples[f'salon_http_request_duration_seconds_bucket{{{availability},le="+Inf"}}'] == 3
+    assert samples[f"salon_sql_statements_per_request_sum{{{availability}}}"] >= 3
+    assert samples[f"salon_sql_seconds_total{{{availability}}}"] > 0
+    assert samples['salon_http_requests_total{method="GET",route="<unmatched>",status="404"}'] == 1
+    # /admin/bookings is a sync handler: it queued for the threadpool.
+    assert samples['salon_threadpool_wait_seconds_total{method="GET",route="/admin/bookings"}'] > 0
+    assert samples["salon_threadpool_wait_seconds_count"] >= 1
+    assert samples["salon_http_requests_in_flight"] == 1  # the scrape itself
+    assert samples["salon_threadpool_threads"] >= 1
+    assert not any("/bookings/availability?" in name for name in samples)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5, 10))
+    for value in (0, 1, 3, 7, 50):
+        histogram.observe(value)
+    lines = histogram.lines("h", 'route="/x"')
+    assert lines[:4] == ['h_bucket{route="/x",le="1"} 2', 'h_bucket{route="/x",le="5"} 3',
+                         'h_bucket{route="/x",le="10"} 4', 'h_bucket{route="/x",le="+Inf"} 5']
+    assert lines[4:] == ['h_sum{route="/x"} 61.0', 'h_count{route="/x"} 5']
@@ -0,0 +1,56 @@
+import os
+from datetime import datetime
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+from app import models
+from app.availability import load_busy_by_stylist
+from app.migrations import MIGRATIONS, run_migrations
+from app.routers.bookings import is_overlapping
+from conftest import TEST_DB_DIR
+
+
+def make_engine(name: str):
+    return create_engine(f"sqlite:///{os.path.join(TEST_DB_DIR, name)}", connect_args={"check_same_thread": False})
+
+
+def test_fresh_database_applies_every_migration_once():
+    engine = make_engine("migrate-fresh.db")
+    assert run_migrations(engine) == [v for v, _, _ in MIGRATIONS]
+    assert run_migrations(engine) == []
+
+
+def test_legacy_database_gains_composite_indexes():
+    engine = make_engine("migrate-legacy.db")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_bookings_stylist_status_time"))
+        conn.execute(text("DROP INDEX ix_payments_booking_status"))
+
+    run_migrations(engine)
+    names = {ix["name"] for table in ("bookings", "payments") for ix in inspect(engine).get_indexes(table)}
+    assert {"ix_bookings_stylist_status_time", "ix_payments_booking_status"} <= names
+
+
+def test_hot_queries_use_composite_indexes():
+    from sqlalchemy import func
+    engine = make_engine("migrate-plan.db")
+    run_migrations(engine)
+
+    statements = []
+    listener = lambda conn, cursor, stmt, params, *args: statements.append((stmt, params))
+    event.listen(engine, "before_cursor_execute", listener)
+    start, end = datetime(2032, 5, 5, 10), datetime(2032, 5, 5, 11)
+    with Session(bind=engine) as db:
+        is_overlapping(db, 99, start, end)
+        load_busy_by_stylist(db, [98, 99], start, end)
+        db.query(func.sum(models.Payment.amount)).filter(
+            models.Payment.booking_id == 1, models.Payment.status == models.PaymentStatus.SUCCESS.value
+        ).scalar()
+    event.remove(engine, "before_cursor_execute", listener)
+
+    overlap, busy, payment_sum = statements
+    with engine.connect() as conn:
+        plan = lambda stmt, params: " ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + stmt, params))
+        assert "ix_bookings_stylist_status_time" in plan(*overlap)
+        assert "COVERING INDEX ix_bookings_stylist_status_time" in plan(*busy)
+        assert "COVERING INDEX ix_payments_booking_status" in plan(*payment_sum)
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+import pytest
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.outbox import OutboxWorker, queue_email
+from app.smtp_sink import SMTPSink
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    server = SMTPSink().start()
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.port)
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(settings, "SMTP_USER", "salon")
+    monkeypatch.setattr(settings, "SMTP_PASS", "secret")
+    yield server
+    server.stop()
+
+
+def enqueue(*addresses):
+    with SessionLocal() as db:
+        rows = [queue_email(db, to, f"Hello {to}", "Body") for to in addresses]
+        db.commit()
+        return [row.id for row in rows]
+
+
+def load(ids):
+    with SessionLocal() as db:
+        return {row.to_email: row for row in db.query(models.OutboxEmail).filter(models.OutboxEmail.id.in_(ids))}
+
+
+def test_batch_is_delivered_over_one_connection(sink):
+    ids = enqueue(*(f"guest{i}@example.com" for i in range(12)))
+    worker = OutboxWorker(batch_size=100)
+    while worker.deliver_batch():
+        pass
+    worker.connection.close()
+
+    rows = load(ids)
+    assert {row.status for row in rows.values()} == {"sent"}
+    assert all(row.attempts == 1 and row.sent_at for row in rows.values())
+    assert {msg["To"] for msg in sink.messages} >= set(rows)
+    assert sink.connections == 1
+
+
+def test_rejected_recipient_fails_without_retry(sink):
+    sink.reject.add("bounce@example.com")
+    ids = enqueue("bounce@example.com", "fine@example.com")
+    worker = OutboxWorker(batch_size=100)
+    worker.deliver_batch()
+    worker.connection.close()
+
+    rows = load(ids)
+    assert rows["bounce@example.com"].status == "failed"
+    assert "550" in rows["bounce@example.com"].last_error
+    assert rows["fine@example.com"].status == "sent"
+
+
+def test_unreachable_server_backs_off_and_releases_batch(sink):
+    sink.stop()
+    ids = enqueue("retry1@example.com", "retry2@example.com")
+    worker = OutboxWorker(batch_size=100)
+    before = datetime.utcnow()
+    worker.deliver_batch()
+
+    rows = load(ids)
+    first, second = rows["retry1@example.com"], rows["retry2@example.com"]
+    assert first.status == second.status == "pending"
+    assert first.attempts == 1 and second.attempts == 0
+    assert first.next_attempt_at >= before + timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS)
+    # Not due yet, so the next pass leaves them alone.
+    assert worker.deliver_batch() == 0
+
+
+def test_smtp_needs_credentials_unless_auth_is_off(monkeypatch):
+    from app.email_utils import smtp_configured
+    monkeypatch.setattr(settings, "SMTP_HOST", "smtp.example.com")
+    monkeypatch.setattr(settings, "SMTP_USER", None)
+    monkeypatch.setattr(settings, "SMTP_PASS", None)
+    assert not smtp_configured()
+    monkeypatch.setattr(settings, "SMTP_AUTH", False)
+    assert smtp_configured()
+
+
+def test_worker_is_woken_once_per_commit(monkeypatch):
+    from app import outbox
+    wakes = []
+    monkeypatch.setattr(outbox.outbox_worker, "notify", lambda: wakes.append(1))
+    with SessionLocal() as db:
+        for to in ("a@example.com", "b@example.com", "c@example.com"):
+            queue_email(db, to, "Hi", "Body")
+        db.commit()
+        assert wakes == [1]
+        db.commit()  # nothing queued since
+        queue_email(db, "d@example.com", "Hi", "Body")
+        db.commit()
+    assert wakes == [1, 1]
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app import models
+from app.database import SessionLocal, engine
+from app.main import app
+from app.auth import get_password_hash
+
+client = TestClient(app)
+
+
+def seed_history(email, count):
+    """`count` bookings for a fresh customer, several sharing a start time so ties on start_time are exercised."""
+    with SessionLocal() as db:
+        user = models.User(email=email, hashed_password=get_password_hash("Paging@123"), role=models.Role.CUSTOMER.value)
+        db.add(user)
+        db.flush()
+        service_id = db.query(models.Service.id).first()[0]
+        origin = datetime(2033, 3, 1, 9)
+        db.add_all([
+            models.Booking(
+                customer_id=user.id, service_id=service_id, service_price_snapshot=10, total_amount=10,
+                start_time=origin + timedelta(days=i // 3), end_time=origin + timedelta(days=i // 3, hours=1),
+                status=models.BookingStatus.CANCELLED.value if i % 4 == 0 else models.BookingStatus.PENDING.value,
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    token = client.post("/auth/login", data={"username": email, "password": "Paging@123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def walk(path, headers, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        res = client.get(path, headers=headers, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert res.status_code == 200, res.text
+        ids += [b["id"] for b in res.json()]
+        pages += 1
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_walk_returns_every_row_once_newest_first():
+    headers = seed_history("pager@example.com", 23)
+    ids, pages = walk("/bookings/me", headers, limit=5)
+    assert pages == 5 and len(ids) == len(set(ids)) == 23
+
+    with SessionLocal() as db:
+        rows = db.query(models.Booking).filter(models.Booking.id.in_(ids)).all()
+    expected = [b.id for b in sorted(rows, key=lambda b: (b.start_time, b.id), reverse=True)]
+    assert ids == expected
+
+
+def test_filters_combine_with_cursor():
+    headers = seed_history("pager-filter@example.com", 24)
+    ids, _ = walk("/bookings/me", headers, limit=4, status="pending", date_from="2033-03-02", date_to="2033-03-05")
+    with SessionLocal() as db:
+        rows = db.query(models.Booking).filter(models.Booking.id.in_(ids)).all()
+    assert len(rows) == 9
+    assert all(b.status == "pending" and datetime(2033, 3, 2) <= b.start_time < datetime(2033, 3, 6) for b in rows)
+
+    assert client.get("/bookings/me", headers=headers, params={"cursor": "garbage"}).status_code == 400
+
+
+def test_admin_pages_seek_through_indexes():
+    owner = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {owner}"}
+    first = client.get("/admin/bookings", headers=headers, params={"limit": 2})
+    cursor = first.headers["X-Next-Cursor"]
+
+    statements = []
+    listener = lambda conn, cursor, stmt, params, *args: statements.append((stmt, params))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for params in ({"limit": 2, "cursor": cursor}, {"limit": 2, "cursor": cursor, "status": "pending"}):
+            assert client.get("/admin/bookings", headers=headers, params=params).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    with engine.connect() as conn:
+        for stmt, params in statements:
+            plan = " ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + stmt, params))
+            assert "USING INDEX ix_bookings_" in plan
+            assert "TEMP B-TREE" not in plan
+
+    users = client.get("/admin/users", headers=headers, params={"limit": 1})
+    second = client.get("/admin/users", headers=headers, params={"limit": 1, "cursor": users.headers["X-Next-Cursor"]})
+    assert second.json()[0]["id"] > users.json()[0]["id"]
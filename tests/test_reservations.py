@@ -0,0 +1,162 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import models, schemas
+from app.database import Base
+from app.reservations import reserve_booking, claim_buckets
+from conftest import TEST_DB_DIR
+
+ATTEMPTS = 400
+WORKERS = 32
+
+
+def make_session_factory(name: str):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(TEST_DB_DIR, name)}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def test_claim_buckets_cover_partial_buckets():
+    buckets = claim_buckets(datetime(2030, 1, 1, 10, 2), datetime(2030, 1, 1, 10, 11))
+    assert [b.minute for b in buckets] == [0, 5, 10]
+
+
+def test_parallel_reservations_never_overlap(record_property):
+    Session = make_session_factory("stress.db")
+    with Session() as db:
+        owner = models.User(email="stress@example.com", hashed_password="x", role=models.Role.STYLIST.value)
+        db.add(owner)
+        db.flush()
+        stylists = [models.Stylist(user_id=owner.id, display_name="A")]
+        other = models.User(email="stress2@example.com", hashed_password="x", role=models.Role.STYLIST.value)
+        db.add(other)
+        db.flush()
+        stylists.append(models.Stylist(user_id=other.id, display_name="B"))
+        svc = models.Service(name="Stress Cut", price=10.0, duration_minutes=60)
+        db.add_all(stylists + [svc])
+        db.commit()
+        stylist_ids = [s.id for s in stylists]
+        service_id = svc.id
+
+    day = datetime(2031, 3, 3, 9)
+    # Starts every 30 minutes with 60-minute bookings, so neighbouring attempts overlap too.
+    starts = [day + timedelta(minutes=30 * i) for i in range(12)]
+
+    def attempt(i: int) -> str:
+        start = starts[i % len(starts)]
+        with Session() as db:
+            booking = models.Booking(
+                customer_name=f"Client {i}", service_id=service_id, stylist_id=stylist_ids[i % 2],
+                start_time=start, end_time=start + timedelta(minutes=60),
+                status=models.BookingStatus.PENDING.value, service_price_snapshot=10.0, total_amount=10.0,
+            )
+            try:
+                reserve_booking(db, booking)
+                db.commit()
+                return "booked"
+            except HTTPException as e:
+                assert e.status_code == 409
+                return "conflict"
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        outcomes = list(pool.map(attempt, range(ATTEMPTS)))
+    elapsed = time.perf_counter() - began
+    record_property("reservation_attempts_per_second", round(ATTEMPTS / elapsed))
+
+    assert outcomes.count("booked") + outcomes.count("conflict") == ATTEMPTS
+    with Session() as db:
+        for stylist_id in stylist_ids:
+            booked = db.query(models.Booking).filter(models.Booking.stylist_id == stylist_id).order_by(models.Booking.start_time).all()
+            assert booked, "every stylist should win at least one slot"
+            for prev, nxt in zip(booked, booked[1:]):
+                assert prev.end_time <= nxt.start_time, f"overlap between bookings {prev.id} and {nxt.id}"
+    assert outcomes.count("booked") <= len(starts)
+
+
+def test_recurring_batch_uses_a_few_statements_and_reports_conflicts():
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.main import app
+    from app.database import async_engine
+    engine = async_engine.sync_engine
+
+    client = TestClient(app)
+    owner = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {owner}"}
+    stylist_id = client.get("/stylists/").json()[0]["id"]
+    service_id = client.get("/services/").json()[0]["id"]
+    first = datetime(2033, 1, 4, 10)
+
+    res = client.post("/bookings/walkin", json={
+        "service_id": service_id, "stylist_id": stylist_id,
+        "start_time": (first + timedelta(weeks=4)).isoformat(), "customer_name": "Already there",
+    }, headers=headers)
+    assert res.status_code == 200, res.text
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        res = client.post("/bookings/batch", json={
+            "service_id": service_id, "stylist_id": stylist_id, "start_time": first.isoformat(),
+            "recurrence": {"interval_weeks": 2, "count": 26}, "customer_name": "Regular",
+        }, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert (body["booked"], body["conflicts"]) == (25, 1)
+    assert body["occurrences"][2]["status"] == "conflict"
+    assert len(statements) <= 8, statements
+
+    res = client.post("/bookings/batch", json={
+        "service_id": service_id, "stylist_id": stylist_id, "start_times": [first.isoformat()], "skip_conflicts": False,
+    }, headers=headers)
+    assert res.status_code == 409
+
+
+def test_bookings_stay_on_the_claim_grid(caplog):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.migrations import MIGRATIONS
+
+    client = TestClient(app)
+    owner = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {owner}"}
+    stylist_id = client.get("/stylists/").json()[0]["id"]
+    res = client.post("/services/", json={"name": "Odd Trim", "price": 20, "duration_minutes": 32}, headers=headers)
+    assert res.status_code == 422
+
+    # A legacy 32-minute service is moved onto the grid, so back-to-back bookings never share a bucket.
+    Session = make_session_factory("grid.db")
+    with Session() as db:
+        db.add(models.Service(name="Odd Trim", price=20.0, duration_minutes=32))
+        db.commit()
+        step = dict((version, step) for version, _, step in MIGRATIONS)[9]
+        with caplog.at_level("WARNING", logger="app.migrations"):
+            step(db.connection())
+        assert db.query(models.Service.duration_minutes).scalar() == 35
+    assert "'Odd Trim': duration 32 -> 35 minutes" in caplog.text
+    # Only input is constrained: legacy rows still serialize.
+    assert schemas.ServiceOut(id=1, name="Odd Trim", price=20.0, duration_minutes=32, is_active=True).duration_minutes == 32
+
+    service_id = client.post("/services/", json={"name": "Grid Trim", "price": 20, "duration_minutes": 35}, headers=headers).json()["id"]
+    first = datetime(2034, 2, 6, 9)
+    walkin = lambda start: client.post("/bookings/walkin", json={
+        "service_id": service_id, "stylist_id": stylist_id, "start_time": start.isoformat(), "customer_name": "Grid",
+    }, headers=headers)
+    assert walkin(first).status_code == 200
+    # 09:35 touches 09:00-09:35 without overlapping it.
+    assert walkin(first + timedelta(minutes=35)).status_code == 200
+    assert walkin(first + timedelta(minutes=30)).status_code == 409
+    res = walkin(first + timedelta(hours=2, minutes=32))
+    assert res.status_code == 422 and "5-minute boundary" in res.text
@@ -0,0 +1,105 @@
+import re
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+from app import models, rollups
+from app.database import SessionLocal, engine
+from app.main import app
+
+client = TestClient(app)
+CARD = {"amount": 0, "card_number": "4242424242424242", "expiry_month": 12, "expiry_year": 2099, "cvv": "123", "cardholder_name": "Roll"}
+
+
+def owner_headers():
+    token = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def assert_rollups_match_a_rebuild():
+    with engine.connect() as conn:
+        with conn.begin() as trans:
+            maintained = rollups.snapshot(conn)
+            rollups.rebuild(conn)
+            fresh = rollups.snapshot(conn)
+            trans.rollback()
+    assert maintained == fresh
+
+
+def test_every_write_path_keeps_rollups_in_step():
+    headers = owner_headers()
+    with SessionLocal() as db:
+        service = db.query(models.Service).filter(models.Service.is_active == True, models.Service.duration_minutes == 60).first()
+        stylists = db.query(models.Stylist).filter(models.Stylist.is_active == True).limit(2).all()
+    stylist = stylists[0]
+    guest = lambda day, name: {
+        "service_id": service.id, "stylist_id": stylist.id, "customer_name": name,
+        "start_time": datetime(2038, 5, day, stylist.start_hour).isoformat(),
+    }
+
+    paid = client.post("/bookings/guest", json=guest(3, "Roll Paid")).json()
+    assert client.post(f"/bookings/{paid['id']}/pay-deposit", json=CARD).status_code == 200
+    assert client.post(f"/bookings/{paid['id']}/pay", json=CARD).status_code == 200
+    cancelled = client.post("/bookings/guest", json=guest(4, "Roll Cancel")).json()
+    assert client.put(f"/bookings/{cancelled['id']}/cancel", headers=headers).status_code == 200
+    walkin = client.post("/bookings/walkin", json=guest(5, "Roll Walkin"), headers=headers)
+    assert walkin.status_code == 200
+    deleted = client.post("/bookings/guest", json=guest(6, "Roll Delete")).json()
+    client.post(f"/bookings/{deleted['id']}/pay-deposit", json=CARD)
+    assert client.delete(f"/bookings/{deleted['id']}", headers=headers).status_code == 200
+    with engine.begin() as conn:  # core bulk insert, no ORM involved
+        conn.execute(insert(models.Booking), [{
+            "service_id": service.id, "stylist_id": stylist.id, "service_price_snapshot": 10, "total_amount": 10,
+            "start_time": datetime(2038, 5, 7, 9 + i), "end_time": datetime(2038, 5, 7, 10 + i), "status": "confirmed",
+        } for i in range(3)])
+    if len(stylists) > 1:
+        with SessionLocal() as db:  # reassigning a paid booking moves its revenue
+            db.get(models.Booking, paid["id"]).stylist_id = stylists[1].id
+            db.commit()
+    assert_rollups_match_a_rebuild()
+
+    may = {"date_from": "2038-05-01", "date_to": "2038-05-31"}
+    counts = client.get("/admin/reports/bookings", headers=headers, params={**may, "period": "all"}).json()
+    by_status = {row["status"]: row for row in counts}
+    assert by_status["cancelled"]["bookings"] >= 1 and by_status["confirmed"]["bookings"] >= 5
+    assert by_status["confirmed"]["minutes"] >= 300
+
+
+def test_reports_read_only_the_rollup_tables():
+    headers = owner_headers()
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        revenue = client.get("/admin/reports/revenue", headers=headers, params={
+            "date_from": "2030-01-01", "date_to": "2039-12-31", "period": "month", "by": "stylist",
+        })
+        util = client.get("/admin/reports/utilization", headers=headers, params={"date_from": "2038-05-01", "date_to": "2038-05-31"})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert revenue.status_code == 200 and util.status_code == 200
+    assert all(set(row) == {"period", "stylist_id", "amount", "payments"} for row in revenue.json())
+    assert all(re.fullmatch(r"\d{4}-\d{2}", row["period"]) for row in revenue.json())
+    assert not any(re.search(r"\b(FROM|JOIN)\s+(payments|bookings)\b", stmt) for stmt in statements)
+
+    with SessionLocal() as db:
+        total = db.execute(text("SELECT ROUND(SUM(amount), 2) FROM payments WHERE status = 'success'")).scalar()
+    everything = client.get("/admin/reports/revenue", headers=headers, params={
+        "date_from": (date.today() - timedelta(days=3000)).isoformat(), "date_to": date.today().isoformat(), "period": "all",
+    }).json()
+    assert everything == [{"amount": total, "payments": everything[0]["payments"]}]
+    assert all(0 <= row["utilization"] <= 1 for row in util.json() if row["utilization"] is not None)
+
+    assert client.get("/admin/reports/revenue", headers=headers, params={"date_from": "2030-01-02", "date_to": "2030-01-01"}).status_code == 400
+
+
+def test_rollups_refuse_other_databases():
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import postgresql
+    from app.migrations import MIGRATIONS
+    conn = SimpleNamespace(dialect=postgresql.dialect())
+    step = dict((version, step) for version, _, step in MIGRATIONS)[8]
+    with pytest.raises(RuntimeError, match="SQLite triggers"):
+        step(conn)
+    month = rollups._month(models.DailyRevenue.day, "postgresql")
+    assert "to_char" in str(month.compile(dialect=postgresql.dialect()))
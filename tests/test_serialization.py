@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app import models, schemas, serialization
+from app.database import SessionLocal
+from app.main import app
+from tests.test_pagination import seed_history
+
+client = TestClient(app)
+
+
+def as_response_model(schema, objects):
+    """What the endpoints returned before: ORM objects validated through the response model."""
+    return TypeAdapter(List[schema]).dump_python(objects, mode="json")
+
+
+def test_projections_match_the_response_models():
+    headers = seed_history("projection@example.com", 7)
+    with SessionLocal() as db:
+        services = db.query(models.Service).filter(models.Service.is_active == True).all()
+        stylists = db.query(models.Stylist).all()
+        user_id = db.query(models.User.id).filter(models.User.email == "projection@example.com").scalar()
+        mine = db.query(models.Booking).filter(models.Booking.customer_id == user_id) \
+            .order_by(models.Booking.start_time.desc(), models.Booking.id.desc()).all()
+        assert client.get("/services/").json() == as_response_model(schemas.ServiceOut, services)
+        assert client.get("/stylists/").json() == as_response_model(schemas.StylistOut, stylists)
+        assert client.get("/bookings/me", headers=headers).json() == as_response_model(schemas.BookingOut, mine)
+
+        owner = client.post("/auth/login", data={"username": "owner@salon.local", "password": "Owner@12345"}).json()["access_token"]
+        res = client.get("/admin/bookings", headers={"Authorization": f"Bearer {owner}"}, params={"limit": 3})
+        newest = db.query(models.Booking).order_by(models.Booking.start_time.desc(), models.Booking.id.desc()).limit(3).all()
+        assert res.json() == jsonable_encoder(newest)
+        assert res.headers["X-Next-Cursor"]
+
+
+def test_availability_slots_keep_their_shape():
+    with SessionLocal() as db:
+        service_id = db.query(models.Service.id).filter(models.Service.is_active == True).first()[0]
+        stylist_id = db.query(models.Stylist.id).filter(models.Stylist.is_active == True).first()[0]
+    day = (datetime.now() + timedelta(days=400)).date().isoformat()
+    for params in ({}, {"stylist_id": stylist_id}):
+        slots = client.get("/bookings/availability", params={"service_id": service_id, "date": day, **params}).json()
+        assert slots
+        TypeAdapter(List[schemas.TimeSlot]).validate_python(slots)
+        assert all(set(s) == {"start_time", "end_time", "stylist_id", "stylist_ids"} for s in slots)
+
+
+def test_large_lists_are_gzipped_and_msgpack_is_negotiated(monkeypatch):
+    with SessionLocal() as db:
+        service_id = db.query(models.Service.id).filter(models.Service.is_active == True).first()[0]
+    day = (datetime.now() + timedelta(days=401)).date().isoformat()
+    res = client.get("/bookings/availability", params={"service_id": service_id, "date": day}, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    small = client.get("/stylists/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers or len(small.content) >= 1024
+
+    monkeypatch.setattr(serialization, "msgpack", None)
+    res = client.get("/services/", headers={"Accept": "application/msgpack"})
+    assert res.headers["content-type"] == "application/json"
+
+
+def test_msgpack_when_installed():
+    msgpack = pytest.importorskip("msgpack")
+    res = client.get("/services/", headers={"Accept": "application/msgpack"})
+    assert res.headers["content-type"] == serialization.MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(res.content) == client.get("/services/").json()
@@ -0,0 +1,100 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import httpx
+import pytest
+from sqlalchemy import create_engine, func, select
+from app import models
+from app.config import settings
+from app.serve import UVICORN_VERSION, default_workers, main
+from conftest import ROOT, TEST_DB_DIR
+
+
+def test_default_workers(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 3)
+    assert default_workers() == 3
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", None)
+    monkeypatch.setattr(settings, "SERVE_MAX_WORKERS", 1)
+    assert default_workers() == 1
+    monkeypatch.setattr(settings, "SERVE_MAX_WORKERS", 64)
+    assert 1 <= default_workers() <= (os.cpu_count() or 1)
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite:///:memory:")
+    assert default_workers() == 1
+
+
+def test_serve_refuses_other_uvicorn_versions(monkeypatch):
+    monkeypatch.setattr("uvicorn.__version__", "0.0.0")
+    assert main(["--no-init"]) == 1
+
+
+def test_uvicorn_pin_matches_requirements():
+    with open(os.path.join(ROOT, "requirements.txt")) as f:
+        assert f"uvicorn[standard]=={UVICORN_VERSION}\n" in f.read()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="rolling restart is driven by SIGHUP")
+def test_serve_initialises_once_and_reloads_without_dropping_requests():
+    path = os.path.join(TEST_DB_DIR, "serve.db")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--workers", "1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{url}/readyz").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            assert time.monotonic() < deadline and server.poll() is None
+            time.sleep(0.2)
+
+        statuses, stop = [], threading.Event()
+
+        def get(client, target):
+            # A draining worker closes its idle keep-alive connections; a request already sent on one sees
+            # the close (or a reset) instead of a response. Browsers and proxies retry idempotent requests then.
+            try:
+                return client.get(target)
+            except (httpx.RemoteProtocolError, httpx.ReadError):
+                return client.get(target)
+
+        def hammer():
+            with httpx.Client() as client:
+                while not stop.is_set():
+                    try:
+                        statuses.append(get(client, f"{url}/services/").status_code)
+                    except httpx.HTTPError as e:
+                        statuses.append(repr(e))
+
+        clients = [threading.Thread(target=hammer) for _ in range(3)]
+        for t in clients:
+            t.start()
+        server.send_signal(signal.SIGHUP)  # init again, then replace the only worker
+        time.sleep(12)
+        stop.set()
+        for t in clients:
+            t.join()
+        assert statuses and set(statuses) == {200}
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(60) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        owners = conn.scalar(select(func.count()).select_from(models.User).where(models.User.role == models.Role.OWNER.value))
+        services = conn.scalar(select(func.count()).select_from(models.Service))
+    assert (owners, services) == (1, 3)